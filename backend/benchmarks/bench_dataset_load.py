@@ -0,0 +1,66 @@
+"""
+Benchmark dataset loading
+Compares parsing the CSV with reading the columnar cache
+
+Run from the backend directory:
+    python -m benchmarks.bench_dataset_load --csv path/to/cumulative.csv
+"""
+
+import argparse
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Any
+
+import pandas as pd
+
+from models.dataset_store import DatasetStore
+from models.exoplanet_model import TRAINING_COLUMNS
+
+
+def best_of(fn: Callable[[], Any], repeat: int) -> float:
+    """Best wall time of `repeat` runs, in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--csv", default="./data/nasa_exoplanets.csv",
+                        help="CSV dataset, e.g. the Kepler KOI cumulative table")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Work on a copy so the real dataset's cache is left untouched
+        csv_path = Path(tmp) / "dataset.csv"
+        shutil.copy(args.csv, csv_path)
+        store = DatasetStore(csv_path)
+
+        df = pd.read_csv(csv_path)
+        print(f"Dataset: {args.csv} ({len(df):,} rows x {len(df.columns)} columns, "
+              f"{csv_path.stat().st_size / 1e6:.1f} MB CSV)")
+
+        results = {
+            "csv, all columns": best_of(lambda: pd.read_csv(csv_path), args.repeat),
+            "csv, training columns": best_of(
+                lambda: pd.read_csv(csv_path, usecols=lambda col: col in TRAINING_COLUMNS),
+                args.repeat
+            ),
+            "cache build": best_of(lambda: store.build_cache(df), 1),
+            "cache, all columns": best_of(lambda: store.load(), args.repeat),
+            "cache, training columns": best_of(lambda: store.load(columns=TRAINING_COLUMNS), args.repeat),
+        }
+
+        print(f"Cache file: {store.cache_path.stat().st_size / 1e6:.1f} MB\n")
+        for name, ms in results.items():
+            print(f"{name:<26}{ms:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
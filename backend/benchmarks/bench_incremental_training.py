@@ -0,0 +1,90 @@
+"""
+Benchmark incremental training against a full retrain
+Trains each model type on most of the dataset, then adds the remaining rows
+
+The "new" rows and the test split of the updated dataset are held out from
+the base fit. The updated model is then either trained from scratch with as
+many estimators as the incremental model ends up with, or continued with
+train_incremental; both are scored on that same test split.
+
+Run from the backend directory:
+    python -m benchmarks.bench_incremental_training --csv path/to/cumulative.csv
+"""
+
+import argparse
+import copy
+import time
+from typing import Dict, Any, List
+
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+from models.exoplanet_model import ExoplanetModel
+from utils.helpers import load_sample_dataset
+
+
+def run(df: pd.DataFrame, model_types: List[str], new_fraction: float,
+        base_estimators: int, additional_estimators: int) -> List[Dict[str, Any]]:
+    """Compare full and incremental retraining for each model type"""
+    results = []
+    shuffled = df.sample(frac=1.0, random_state=0).reset_index(drop=True)
+
+    for model_type in model_types:
+        base = ExoplanetModel(model_type=model_type)
+        base.update_hyperparameters({"n_estimators": base_estimators})
+        X, y = base.preprocess_data(shuffled)
+
+        # Same split as train and train_incremental use on the updated dataset
+        X_train, _, y_train, _ = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+        n_base = int(len(X_train) * (1 - new_fraction))
+        base.train(X_train.iloc[:n_base], y_train.iloc[:n_base])
+
+        full = ExoplanetModel(model_type=model_type)
+        full.update_hyperparameters({"n_estimators": base_estimators + additional_estimators})
+        start = time.perf_counter()
+        full_metrics = full.train(X, y)
+        full_s = time.perf_counter() - start
+
+        incremental = copy.deepcopy(base)
+        start = time.perf_counter()
+        incremental_metrics = incremental.train_incremental(X, y, additional_estimators)
+        incremental_s = time.perf_counter() - start
+
+        results.append({
+            "model_type": model_type,
+            "base_rows": n_base,
+            "new_rows": len(X_train) - n_base,
+            "full_s": full_s,
+            "incremental_s": incremental_s,
+            "full_accuracy": full_metrics["accuracy"],
+            "incremental_accuracy": incremental_metrics["accuracy"],
+            "full_f1": full_metrics["f1_score"],
+            "incremental_f1": incremental_metrics["f1_score"]
+        })
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--csv", help="Training dataset (defaults to the built-in sample dataset)")
+    parser.add_argument("--models", nargs="+", default=["random_forest", "gradient_boost", "xgboost"])
+    parser.add_argument("--new-fraction", type=float, default=0.05)
+    parser.add_argument("--base-estimators", type=int, default=100)
+    parser.add_argument("--additional-estimators", type=int, default=20)
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.csv) if args.csv else load_sample_dataset()
+    results = run(df, args.models, args.new_fraction, args.base_estimators, args.additional_estimators)
+
+    print(f"\n{'model':<16}{'full (s)':>10}{'incr. (s)':>11}{'speedup':>9}"
+          f"{'full acc':>10}{'incr. acc':>11}{'full f1':>9}{'incr. f1':>10}")
+    for r in results:
+        print(f"{r['model_type']:<16}{r['full_s']:>10.2f}{r['incremental_s']:>11.2f}"
+              f"{r['full_s'] / r['incremental_s']:>8.1f}x"
+              f"{r['full_accuracy']:>10.4f}{r['incremental_accuracy']:>11.4f}"
+              f"{r['full_f1']:>9.4f}{r['incremental_f1']:>10.4f}")
+
+
+if __name__ == "__main__":
+    main()
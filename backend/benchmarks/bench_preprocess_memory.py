@@ -0,0 +1,95 @@
+"""
+Benchmark preprocess_data memory use against the previous pandas implementation
+Peak memory allocated while preprocessing a wide table, and the time taken
+
+The input is the seeded synthetic KOI dataset widened with extra float64
+columns, like the full KOI cumulative table (~140 columns) before column
+projection. Peak memory is measured with tracemalloc, which sees NumPy
+and pandas buffers, relative to the memory held before the call.
+
+Run from the backend directory:
+    python -m benchmarks.bench_preprocess_memory --rows 1000000
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+from typing import Callable, Dict, Any, Tuple
+
+import numpy as np
+import pandas as pd
+
+from models.exoplanet_model import ExoplanetModel, LABEL_COLUMNS, POTENTIAL_FEATURES
+from utils.helpers import load_sample_dataset
+
+
+def legacy_preprocess(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.Series]:
+    """preprocess_data before the float32 single-copy rewrite"""
+    data = df.copy()
+    disposition_map = {'FALSE POSITIVE': 0, 'CANDIDATE': 1, 'CONFIRMED': 2}
+    label_col = next(col for col in LABEL_COLUMNS if col in data.columns)
+    data['label'] = data[label_col].str.upper().map(disposition_map)
+    data = data[data['label'].notna()].copy()
+    available_features = [f for f in POTENTIAL_FEATURES if f in data.columns]
+    X = data[available_features].copy()
+    y = data['label'].copy()
+    X = X.fillna(X.median())
+    return X, y
+
+
+def measure(fn: Callable[[], Any]) -> Dict[str, float]:
+    """Peak memory allocated by fn beyond what was held before, and its wall time"""
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+    X, _ = result
+    return {
+        "peak_mb": peak / 1e6,
+        "output_mb": X.memory_usage(index=False).sum() / 1e6,
+        "time_s": elapsed
+    }
+
+
+def wide_dataset(n_rows: int, extra_columns: int, seed: int) -> pd.DataFrame:
+    """Synthetic KOI rows plus extra float64 columns"""
+    df = load_sample_dataset(n_rows, seed=seed)
+    rng = np.random.default_rng(seed)
+    extra = pd.DataFrame(
+        rng.standard_normal((n_rows, extra_columns)),
+        columns=[f"extra_{i}" for i in range(extra_columns)]
+    )
+    return pd.concat([df, extra], axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--extra-columns", type=int, default=128)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    df = wide_dataset(args.rows, args.extra_columns, args.seed)
+    input_mb = df.memory_usage(index=False, deep=True).sum() / 1e6
+    print(f"Input: {len(df)} rows x {len(df.columns)} columns, {input_mb:.0f} MB\n")
+
+    X_old, y_old = legacy_preprocess(df)
+    X_new, y_new = ExoplanetModel().preprocess_data(df)
+    assert np.allclose(X_old.to_numpy(), X_new.to_numpy(), rtol=1e-6), "features differ"
+    assert (y_old.to_numpy() == y_new.to_numpy()).all(), "labels differ"
+    del X_old, y_old, X_new, y_new
+
+    print(f"{'implementation':<16}{'peak (MB)':>12}{'output (MB)':>13}{'time (s)':>10}")
+    for name, fn in (("legacy", lambda: legacy_preprocess(df)),
+                     ("float32", lambda: ExoplanetModel().preprocess_data(df))):
+        r = measure(fn)
+        print(f"{name:<16}{r['peak_mb']:>12.1f}{r['output_mb']:>13.1f}{r['time_s']:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark the response encodings of /api/predict-batch
+Payload size and encode time of each format, against the previous JSON path
+
+Batch predictions are computed once; each encoding is then timed from the
+columnar predictions to the response bytes. "json rows (legacy)" is the
+path before content negotiation: one dictionary per row, FastAPI's
+jsonable_encoder and the standard json module. The rows layouts include
+building the per-row dictionaries, as the endpoint does.
+
+Run from the backend directory:
+    python -m benchmarks.bench_response_formats --rows 100000
+"""
+
+import argparse
+import gzip
+import time
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from models.exoplanet_model import ExoplanetModel
+from utils import response_formats
+from utils.helpers import load_sample_dataset
+
+
+def time_encode(fn: Callable[[], bytes], repeat: int) -> Dict[str, float]:
+    """Median encode time in milliseconds, and the size of the encoded body"""
+    body = fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        "time_ms": float(np.median(timings)),
+        "size_mb": len(body) / 1e6,
+        "gzip_mb": len(gzip.compress(body, compresslevel=1)) / 1e6
+    }
+
+
+def encoders(columns: Dict[str, Any]) -> Dict[str, Callable[[], bytes]]:
+    """Encoding of each format, from the output of predict_batch_columnar"""
+    total = len(columns["index"])
+    table = ExoplanetModel.columnar_to_table(columns)
+    cases = {
+        "json rows (legacy)": lambda: JSONResponse(content=jsonable_encoder({
+            "predictions": ExoplanetModel.columnar_to_rows(columns), "total_count": total
+        })).body,
+        "json rows": lambda: response_formats.encode_json({
+            "predictions": ExoplanetModel.columnar_to_rows(columns), "total_count": total
+        }),
+        "json columns": lambda: response_formats.encode_json({
+            "predictions": columns, "total_count": total, "layout": "columns"
+        }),
+        "csv": lambda: response_formats.encode_csv(table)
+    }
+    if response_formats.msgpack is not None:
+        cases["msgpack columns"] = lambda: response_formats.encode_msgpack({
+            "predictions": columns, "total_count": total, "layout": "columns"
+        })
+    if response_formats.pa is not None:
+        cases["arrow"] = lambda: response_formats.encode_arrow(table, {"total_count": total})
+    return cases
+
+
+def run(n_rows: int, repeat: int, seed: int) -> List[Dict[str, Any]]:
+    """Encode the predictions of n_rows synthetic rows in every available format"""
+    model = ExoplanetModel(model_type="xgboost")
+    model.update_hyperparameters({"n_estimators": 20})
+    X, y = model.preprocess_data(load_sample_dataset(5_000, seed=seed))
+    model.train(X, y)
+    model.record_metrics = False
+    columns = model.predict_batch_columnar(model._synthetic_features(n_rows, seed=seed))
+
+    results = []
+    for name, fn in encoders(columns).items():
+        results.append({"format": name, **time_encode(fn, repeat if n_rows <= 100_000 else 1)})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"orjson: {'yes' if response_formats.orjson is not None else 'no (standard library json)'}")
+    print(f"Predictions: {args.rows} rows\n")
+    print(f"{'format':<20}{'time (ms)':>12}{'size (MB)':>12}{'gzip (MB)':>12}")
+    for r in run(args.rows, args.repeat, args.seed):
+        print(f"{r['format']:<20}{r['time_ms']:>12.1f}{r['size_mb']:>12.2f}{r['gzip_mb']:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark single-row inference latency
+Compares ExoplanetModel.predict with the previous pandas-based path
+
+Run from the backend directory:
+    python -m benchmarks.bench_single_predict
+"""
+
+import argparse
+import time
+from typing import Dict, Any, Callable, List
+
+import numpy as np
+import pandas as pd
+
+from models.exoplanet_model import ExoplanetModel
+from utils.helpers import load_sample_dataset
+
+
+def pandas_predict(model: ExoplanetModel, features: Dict[str, float]) -> Dict[str, Any]:
+    """Single-row prediction as implemented before the NumPy fast path"""
+    X = pd.DataFrame([features])[model.feature_names]
+    X = X.fillna(0)
+    X_scaled = model.scaler.transform(X)
+
+    prediction = model.model.predict(X_scaled)[0]
+    probabilities = model.model.predict_proba(X_scaled)[0]
+
+    return {
+        "prediction": int(prediction),
+        "prediction_label": model.label_mapping[int(prediction)],
+        "confidence": float(max(probabilities)),
+        "probabilities": {
+            model.label_mapping[i]: float(prob)
+            for i, prob in enumerate(probabilities)
+        },
+        "features_used": features
+    }
+
+
+def time_calls(fn: Callable[[], Any], repeat: int) -> List[float]:
+    """Run fn `repeat` times and return per-call latencies in microseconds"""
+    fn()  # warm-up
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1e6)
+    return timings
+
+
+def run(model_types: List[str], repeat: int) -> List[Dict[str, Any]]:
+    """Benchmark both paths for each model type"""
+    df = load_sample_dataset()
+    results = []
+
+    for model_type in model_types:
+        model = ExoplanetModel(model_type=model_type)
+        # Single-threaded inference, as for one request
+        if model_type in ("random_forest", "xgboost"):
+            model.update_hyperparameters({"n_jobs": 1})
+        X, y = model.preprocess_data(df)
+        model.train(X, y)
+
+        features = X.iloc[0].to_dict()
+        fast = model.predict(features)
+        legacy = pandas_predict(model, features)
+        assert np.allclose(
+            list(fast["probabilities"].values()),
+            list(legacy["probabilities"].values())
+        ), "fast path probabilities differ from the pandas path"
+
+        for path, fn in (("pandas", lambda: pandas_predict(model, features)),
+                         ("numpy", lambda: model.predict(features))):
+            timings = time_calls(fn, repeat)
+            results.append({
+                "model_type": model_type,
+                "path": path,
+                "p50_us": float(np.percentile(timings, 50)),
+                "p99_us": float(np.percentile(timings, 99)),
+                "mean_us": float(np.mean(timings))
+            })
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--models", nargs="+",
+                        default=["random_forest", "xgboost", "svm", "gradient_boost"])
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+
+    results = run(args.models, args.repeat)
+
+    print(f"\n{'model':<16}{'path':<8}{'p50 (us)':>12}{'p99 (us)':>12}{'mean (us)':>12}")
+    for r in results:
+        print(f"{r['model_type']:<16}{r['path']:<8}{r['p50_us']:>12.1f}{r['p99_us']:>12.1f}{r['mean_us']:>12.1f}")
+
+    by_key = {(r["model_type"], r["path"]): r for r in results}
+    print()
+    for model_type in args.models:
+        before = by_key[(model_type, "pandas")]["p50_us"]
+        after = by_key[(model_type, "numpy")]["p50_us"]
+        print(f"{model_type:<16}p50 {before:.1f}us -> {after:.1f}us ({before / after:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark the compiled tree ensemble engine
+Compares native predict_proba with the compiled engine for 1-row and large inputs
+
+Single rows go through ExoplanetModel.predict with each backend; the large
+batch calls the engine and the native model directly, since the compiled
+backend hands large batches to the native model when serving.
+
+Run from the backend directory:
+    python -m benchmarks.bench_tree_engine --csv path/to/cumulative.csv
+"""
+
+import argparse
+import time
+from typing import Dict, Any, Callable, List
+
+import numpy as np
+import pandas as pd
+
+from models.exoplanet_model import ExoplanetModel
+from utils.helpers import load_sample_dataset
+
+
+def time_calls(fn: Callable[[], Any], repeat: int) -> List[float]:
+    """Run fn `repeat` times and return per-call latencies in microseconds"""
+    fn()  # warm-up
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1e6)
+    return timings
+
+
+def run(df: pd.DataFrame, model_types: List[str], repeat: int, batch_rows: int) -> List[Dict[str, Any]]:
+    """Benchmark both backends for each model type"""
+    results = []
+
+    for model_type in model_types:
+        model = ExoplanetModel(model_type=model_type)
+        # Single-threaded native inference, as for one request
+        if model_type in ("random_forest", "xgboost"):
+            model.update_hyperparameters({"n_jobs": 1})
+        X, y = model.preprocess_data(df)
+        model.train(X, y)
+
+        batch = model._synthetic_features(batch_rows, seed=7)
+        features = X.iloc[0].to_dict()
+
+        native = model.predict_batch_columnar(batch)
+        # Score the whole batch with the engine to check it against the native path
+        if model.set_inference_backend("compiled", max_batch_rows=batch_rows) != "compiled":
+            raise RuntimeError(f"{model_type} could not be compiled")
+        compiled = model.predict_batch_columnar(batch)
+
+        labels = list(native["probabilities"])
+        difference = max(
+            float(np.abs(native["probabilities"][label] - compiled["probabilities"][label]).max())
+            for label in labels
+        )
+        mismatches = int((native["prediction"] != compiled["prediction"]).sum())
+
+        raw = batch.to_numpy()
+        batch_calls = {
+            "native": lambda: model.model.predict_proba(model.scaler.transform(raw)),
+            "compiled": lambda: model.compiled.predict_proba(raw)
+        }
+
+        for backend in ("native", "compiled"):
+            model.set_inference_backend(backend)
+            single = time_calls(lambda: model.predict(features), repeat)
+            batch_ms = min(time_calls(batch_calls[backend], 3)) / 1000
+            results.append({
+                "model_type": model_type,
+                "backend": backend,
+                "single_p50_us": float(np.percentile(single, 50)),
+                "single_p99_us": float(np.percentile(single, 99)),
+                "batch_ms": batch_ms,
+                "max_difference": difference,
+                "class_mismatches": mismatches
+            })
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--csv", help="Training dataset (defaults to the built-in sample dataset)")
+    parser.add_argument("--models", nargs="+", default=["random_forest", "gradient_boost", "xgboost"])
+    parser.add_argument("--repeat", type=int, default=500)
+    parser.add_argument("--batch-rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.csv) if args.csv else load_sample_dataset()
+    results = run(df, args.models, args.repeat, args.batch_rows)
+
+    print(f"\n{'model':<16}{'backend':<10}{'1 row p50 (us)':>16}{'1 row p99 (us)':>16}"
+          f"{f'{args.batch_rows:,} rows (ms)':>20}")
+    for r in results:
+        print(f"{r['model_type']:<16}{r['backend']:<10}{r['single_p50_us']:>16.1f}"
+              f"{r['single_p99_us']:>16.1f}{r['batch_ms']:>20.1f}")
+
+    by_key = {(r["model_type"], r["backend"]): r for r in results}
+    print()
+    for model_type in args.models:
+        native, compiled = by_key[(model_type, "native")], by_key[(model_type, "compiled")]
+        print(f"{model_type:<16}1 row {native['single_p50_us'] / compiled['single_p50_us']:.2f}x, "
+              f"batch {native['batch_ms'] / compiled['batch_ms']:.2f}x, "
+              f"max |dp| {compiled['max_difference']:.1e}, "
+              f"class mismatches {compiled['class_mismatches']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+"""
+Benchmark suite for training and inference
+Measures preprocessing, training, prediction latency and throughput, and HTTP
+round trips, and writes the results as JSON for comparison between commits
+
+Every measurement is one record keyed by its benchmark name and parameters.
+`--compare` matches the records of two result files and reports the ones that
+regressed by more than the threshold (exit status 1 if any did).
+
+The training data is the given CSV resampled with a fixed seed to
+--train-rows rows, or that many rows of the seeded synthetic KOI dataset. Batch inputs are synthetic rows around
+the training distribution. HTTP timings run against the app in-process, in a
+temporary working directory, with the random forest model (--http-model).
+
+Run from the backend directory:
+    python -m benchmarks.run_suite --output results.json
+    python -m benchmarks.run_suite --compare baseline.json results.json --threshold 0.1
+"""
+
+import argparse
+import gc
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Dict, Any, Callable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from models.exoplanet_model import ExoplanetModel
+from models.model_registry import ModelRegistry
+from utils import response_formats
+from utils.helpers import load_sample_dataset
+
+
+MODEL_TYPES = ["random_forest", "xgboost", "gradient_boost", "svm"]
+BATCH_ROWS = [1_000, 100_000, 1_000_000]
+HTTP_BATCH_ROWS = [1_000, 100_000]
+
+# Benchmarks that are slow enough to be skipped above these sizes by default
+SVM_MAX_BATCH_ROWS = 100_000
+ROW_LAYOUT_MAX_ROWS = 100_000
+
+
+class Suite:
+    """Collects benchmark records"""
+
+    def __init__(self):
+        self.records: List[Dict[str, Any]] = []
+        self.skipped: List[Dict[str, Any]] = []
+
+    def add(self, benchmark: str, params: Dict[str, Any], value: float, unit: str,
+            higher_is_better: bool = False, samples: int = 1):
+        self.records.append({
+            "benchmark": benchmark,
+            "params": params,
+            "value": value,
+            "unit": unit,
+            "higher_is_better": higher_is_better,
+            "samples": samples
+        })
+        print(f"  {benchmark:<22}{_format_params(params):<48}{value:>14.3f} {unit}")
+
+    def skip(self, benchmark: str, params: Dict[str, Any], reason: str):
+        self.skipped.append({"benchmark": benchmark, "params": params, "reason": reason})
+        print(f"  {benchmark:<22}{_format_params(params):<48}{'skipped':>14} ({reason})")
+
+
+def _format_params(params: Dict[str, Any]) -> str:
+    return " ".join(f"{k}={v}" for k, v in params.items())
+
+
+def record_key(record: Dict[str, Any]) -> str:
+    """Identity of a measurement across result files"""
+    return f"{record['benchmark']} {json.dumps(record['params'], sort_keys=True)}"
+
+
+def time_calls(fn: Callable[[], Any], repeat: int, warm_up: int = 1) -> List[float]:
+    """Run fn `repeat` times and return wall times in seconds"""
+    for _ in range(warm_up):
+        fn()
+    gc.collect()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def training_data(csv: Optional[str], n_rows: int, seed: int) -> pd.DataFrame:
+    """Training data of n_rows rows, reproducible from the seed"""
+    if not csv:
+        return load_sample_dataset(n_rows, seed=seed)
+    df = pd.read_csv(csv)
+    return df.sample(n=n_rows, replace=n_rows > len(df), random_state=seed).reset_index(drop=True)
+
+
+def bench_preprocess(suite: Suite, df: pd.DataFrame, args):
+    """Feature extraction and label encoding of the training data"""
+    model = ExoplanetModel()
+    timings = time_calls(lambda: model.preprocess_data(df), args.repeat)
+    suite.add("preprocess_data", {"rows": len(df)}, float(np.median(timings)) * 1000, "ms",
+              samples=len(timings))
+
+    # Memory allocated by NumPy/pandas during the call, beyond what was held before
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    model.preprocess_data(df)
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+    suite.add("preprocess_peak", {"rows": len(df)}, peak / 1e6, "MB")
+
+
+def bench_model(suite: Suite, df: pd.DataFrame, model_type: str, args) -> ExoplanetModel:
+    """Training and model-level inference for one model type"""
+    params = {"model_type": model_type, "rows": len(df)}
+    X, y = ExoplanetModel().preprocess_data(df)
+    timings = []
+    for _ in range(args.train_repeat):
+        model = ExoplanetModel(model_type=model_type)
+        model.feature_names = list(X.columns)
+        gc.collect()
+        start = time.perf_counter()
+        model.train(X, y)
+        timings.append(time.perf_counter() - start)
+    suite.add("train", params, float(np.median(timings)), "s", samples=len(timings))
+
+    rows = model._synthetic_features(args.single_repeat, seed=args.seed)
+    features = rows.to_dict(orient="records")
+    calls = iter(features * 2)
+    timings = time_calls(lambda: model.predict(next(calls)), len(features))
+    timings_us = np.array(timings) * 1e6
+    suite.add("predict_single_p50", {"model_type": model_type}, float(np.percentile(timings_us, 50)),
+              "us", samples=len(timings))
+    suite.add("predict_single_p99", {"model_type": model_type}, float(np.percentile(timings_us, 99)),
+              "us", samples=len(timings))
+
+    for n_rows in args.batch_rows:
+        batch = model._synthetic_features(n_rows, seed=args.seed)
+        for layout, predict in (("columns", model.predict_batch_columnar), ("rows", model.predict_batch)):
+            params = {"model_type": model_type, "rows": n_rows, "layout": layout}
+            if model_type == "svm" and n_rows > args.svm_max_batch_rows:
+                suite.skip("predict_batch", params, f"svm above {args.svm_max_batch_rows} rows")
+                continue
+            if layout == "rows" and n_rows > args.row_layout_max_rows:
+                suite.skip("predict_batch", params, f"row layout above {args.row_layout_max_rows} rows")
+                continue
+            repeat = args.repeat if n_rows <= 100_000 else 1
+            timings = time_calls(lambda: predict(batch), repeat, warm_up=1 if n_rows <= 100_000 else 0)
+            suite.add("predict_batch", params, n_rows / float(np.median(timings)), "rows/s",
+                      higher_is_better=True, samples=len(timings))
+        del batch
+        gc.collect()
+
+    return model
+
+
+def bench_http(suite: Suite, model: ExoplanetModel, args):
+    """End-to-end timings of /api/predict and /api/predict-batch (in each format) against the in-process app"""
+    from fastapi.testclient import TestClient
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="bench-") as workdir:
+        # The app resolves its data and registry paths against the working directory
+        os.chdir(workdir)
+        sys.path.insert(0, cwd)
+        try:
+            registry = ModelRegistry("./models/registry")
+            registry.activate(registry.publish(model))
+
+            import main
+            with TestClient(main.app) as client:
+                rows = model._synthetic_features(args.http_requests, seed=args.seed + 1)
+                # Distinct rows, so every request misses the prediction cache
+                bodies = iter(rows.to_dict(orient="records") * 2)
+                timings = time_calls(
+                    lambda: client.post("/api/predict", json=next(bodies)).raise_for_status(),
+                    args.http_requests
+                )
+                timings_ms = np.array(timings) * 1000
+                params = {"model_type": model.model_type}
+                suite.add("http_predict_p50", params, float(np.percentile(timings_ms, 50)), "ms",
+                          samples=len(timings))
+                suite.add("http_predict_p99", params, float(np.percentile(timings_ms, 99)), "ms",
+                          samples=len(timings))
+
+                for n_rows in args.http_batch_rows:
+                    payload = model._synthetic_features(n_rows, seed=args.seed).to_csv(index=False).encode()
+                    for layout in ("rows", "columns"):
+                        def post():
+                            files = {"file": ("batch.csv", io.BytesIO(payload), "text/csv")}
+                            client.post(f"/api/predict-batch?layout={layout}", files=files).raise_for_status()
+
+                        repeat = args.repeat if n_rows <= 10_000 else 1
+                        timings = time_calls(post, repeat)
+                        suite.add("http_predict_batch",
+                                  {"model_type": model.model_type, "rows": n_rows, "layout": layout},
+                                  float(np.median(timings)) * 1000, "ms", samples=len(timings))
+
+                    # Content-negotiated encodings other than JSON
+                    for fmt in response_formats.available_formats()[1:]:
+                        def post():
+                            files = {"file": ("batch.csv", io.BytesIO(payload), "text/csv")}
+                            headers = {"accept": response_formats.MEDIA_TYPES[fmt]}
+                            client.post("/api/predict-batch", files=files, headers=headers).raise_for_status()
+
+                        repeat = args.repeat if n_rows <= 10_000 else 1
+                        timings = time_calls(post, repeat)
+                        suite.add("http_predict_batch",
+                                  {"model_type": model.model_type, "rows": n_rows, "format": fmt},
+                                  float(np.median(timings)) * 1000, "ms", samples=len(timings))
+        finally:
+            os.chdir(cwd)
+            sys.path.remove(cwd)
+
+
+def environment() -> Dict[str, Any]:
+    """Machine and library versions the results were measured with"""
+    versions = {}
+    for package in ("numpy", "pandas", "sklearn", "xgboost", "fastapi"):
+        try:
+            versions[package] = __import__(package).__version__
+        except ImportError:
+            versions[package] = None
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "created_at": datetime.now().isoformat(),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "packages": versions
+    }
+
+
+def compare(baseline_path: str, results_path: str, threshold: float) -> int:
+    """
+    Print the change of every measurement present in both files
+
+    Returns:
+        Number of regressions beyond the threshold
+    """
+    with open(baseline_path) as f:
+        baseline = {record_key(r): r for r in json.load(f)["results"]}
+    with open(results_path) as f:
+        results = json.load(f)["results"]
+
+    regressions = 0
+    print(f"{'benchmark':<70}{'baseline':>14}{'current':>14}{'change':>10}")
+    for record in results:
+        key = record_key(record)
+        if key not in baseline or not baseline[key]["value"]:
+            continue
+        old, new = baseline[key]["value"], record["value"]
+        change = (new - old) / old
+        # Positive means worse, whichever direction the metric improves in
+        worse = -change if record["higher_is_better"] else change
+        flag = ""
+        if worse > threshold:
+            regressions += 1
+            flag = "  REGRESSION"
+        print(f"{key:<70}{old:>14.3f}{new:>14.3f}{change:>+10.1%}{flag}")
+
+    print(f"\n{regressions} regression(s) beyond {threshold:.0%}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--csv", help="Training dataset (defaults to the built-in sample dataset)")
+    parser.add_argument("--train-rows", type=int, default=5_000)
+    parser.add_argument("--models", nargs="+", default=MODEL_TYPES, choices=MODEL_TYPES)
+    parser.add_argument("--batch-rows", nargs="+", type=int, default=BATCH_ROWS)
+    parser.add_argument("--http-batch-rows", nargs="+", type=int, default=HTTP_BATCH_ROWS)
+    parser.add_argument("--http-model", default="random_forest", choices=MODEL_TYPES)
+    parser.add_argument("--http-requests", type=int, default=200)
+    parser.add_argument("--no-http", action="store_true", help="Skip the HTTP benchmarks")
+    parser.add_argument("--svm-max-batch-rows", type=int, default=SVM_MAX_BATCH_ROWS)
+    parser.add_argument("--row-layout-max-rows", type=int, default=ROW_LAYOUT_MAX_ROWS)
+    parser.add_argument("--repeat", type=int, default=5, help="Repetitions of fast measurements")
+    parser.add_argument("--train-repeat", type=int, default=1)
+    parser.add_argument("--single-repeat", type=int, default=1_000, help="Single-row predictions timed")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "RESULTS"),
+                        help="Compare two result files instead of running the suite")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="Relative change counted as a regression by --compare")
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, args.threshold) else 0)
+
+    suite = Suite()
+    df = training_data(args.csv, args.train_rows, args.seed)
+    bench_preprocess(suite, df, args)
+    models = {}
+    for model_type in args.models:
+        print(f"\n{model_type}")
+        models[model_type] = bench_model(suite, df, model_type, args)
+
+    if not args.no_http:
+        print("\nHTTP")
+        model = models.get(args.http_model) or bench_model(Suite(), df, args.http_model, args)
+        bench_http(suite, model, args)
+
+    output = {
+        "environment": environment(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "compare", "threshold")},
+        "results": suite.records,
+        "skipped": suite.skipped
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(output, f, indent=2)
+        print(f"\n✅ Results written to {args.output}")
+    else:
+        print(json.dumps(output, indent=2))
+
+
+if __name__ == "__main__":
+    main()
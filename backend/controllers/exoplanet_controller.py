@@ -3,25 +3,284 @@ CONTROLLER LAYER - API Endpoints
 Handles HTTP requests and connects Views to Models
 """
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, Form
+from fastapi import APIRouter, UploadFile, File, HTTPException, Form, Query, Request
+from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import Dict, List, Any, Optional
 import pandas as pd
 import io
+import os
+import csv
+import hashlib
+import tempfile
+import time
 from pathlib import Path
 import json
 from datetime import datetime
+from functools import partial
 
-from models.exoplanet_model import ExoplanetModel
+from models.exoplanet_model import ExoplanetModel, LABEL_COLUMNS, OUT_OF_CORE_MODEL_TYPES, DISTILLATION_STUDENT_TYPES
+from models.planet_store import PlanetStore
+from models.dataset_store import DatasetStore, dataset_stats_table
+from models.model_registry import ModelRegistry
+from utils.training_jobs import TrainingJobManager, run_distillation
+from utils.hyperparameter_search import run_search, sample_candidates, SCORING_METRICS
+from utils.micro_batcher import MicroBatcher
+from utils.prediction_cache import PredictionCache
+from utils.metrics import registry as metrics_registry, TRAINING_BUCKETS
+from utils import profiling, response_formats
+from utils.response_formats import TABLE_FORMATS
 
 router = APIRouter(prefix="/api", tags=["exoplanet"])
 
-# Global model instance
-model = ExoplanetModel()
-model_trained = False
+# Versioned model registry; the serving version is loaded and warmed up in startup()
+MODEL_REGISTRY_PATH = Path(os.getenv("MODEL_REGISTRY_PATH", "./models/registry"))
+model_registry = ModelRegistry(
+    root=MODEL_REGISTRY_PATH,
+    max_loaded=int(os.getenv("MODEL_REGISTRY_MAX_LOADED", "3")),
+    max_versions=int(os.getenv("MODEL_REGISTRY_MAX_VERSIONS", "20")),
+    mmap_mode=os.getenv("MODEL_MMAP_MODE") or None,
+    warm_up_rows=int(os.getenv("MODEL_WARMUP_ROWS", "256")),
+    inference_backend=os.getenv("MODEL_INFERENCE_BACKEND", "native"),
+    compiled_max_batch_rows=int(os.getenv("MODEL_COMPILED_MAX_BATCH_ROWS", "32"))
+)
 
-# Path for storing planets data
+# Startup progress reported by /api/health
+startup_state: Dict[str, Any] = {
+    "ready": False,
+    "stages_ms": {},
+    "warm_up_ms": {},
+    "error": None
+}
+
+# Saved planets database (imports the legacy JSON file on first start)
 PLANETS_DATA_PATH = Path("./data/saved_planets.json")
+PLANETS_DB_PATH = Path("./data/planets.db")
+
+planet_store = PlanetStore(PLANETS_DB_PATH)
+planet_store.migrate_from_json(PLANETS_DATA_PATH)
+
+# Path of the training dataset (with its columnar cache alongside)
+DATASET_PATH = Path("./data/nasa_exoplanets.csv")
+dataset_store = DatasetStore(DATASET_PATH)
+
+# Columns an uploaded dataset must have, and the upload copy block size
+REQUIRED_DATASET_COLUMNS = ['koi_period', 'koi_duration', 'koi_depth', 'koi_prad']
+TRAINING_MODES = ["full", "incremental", "out_of_core"]
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Planets per page when a cursor is given without a limit
+PLANETS_PAGE_SIZE = 50
+
+# Streaming batch prediction settings
+STREAM_CHUNK_SIZE = 10000
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv"
+}
+
+# Model tiers of single predictions: "auto" uses the distilled student when
+# the serving version has one, "teacher" always uses the serving version
+PREDICTION_TIERS = ["auto", "student", "teacher"]
+
+
+# Job and serving metrics exported at /metrics
+JOBS_FINISHED = metrics_registry.counter(
+    "exoplanet_jobs_total", "Finished training and tuning jobs", ["kind", "status"]
+)
+JOB_SECONDS = metrics_registry.histogram(
+    "exoplanet_job_duration_seconds", "Wall time of jobs from start to finish, including data loading",
+    ["kind", "status"], buckets=TRAINING_BUCKETS
+)
+TRAINING_FIT_SECONDS = metrics_registry.histogram(
+    "exoplanet_training_fit_seconds", "Model fit time of successful training jobs",
+    ["model_type", "mode"], buckets=TRAINING_BUCKETS
+)
+MODEL_INFO = metrics_registry.gauge(
+    "exoplanet_model_info", "Model version being served (always 1)",
+    ["version", "model_type", "inference_backend", "pinned"]
+)
+
+
+def _activate_trained_model(job: Dict[str, Any]):
+    """Serve the version published by a finished training job, unless a version is pinned"""
+    if model_registry.activate_unless_pinned(job["model_version"]):
+        prediction_cache.invalidate()
+
+
+def _serve_student(job: Dict[str, Any]):
+    """Serve a distilled student alongside its teacher, if the job asked for it"""
+    if job["config"].get("serve", True):
+        model_registry.set_student(job["teacher_version"], job["model_version"])
+        prediction_cache.invalidate()
+
+
+def _job_metrics_recorder(kind: str):
+    """Build a job callback recording the outcome and duration of finished jobs"""
+    def record(job: Dict[str, Any]):
+        JOBS_FINISHED.labels(kind, job["status"]).inc()
+        if job["started_at"] and job["finished_at"]:
+            elapsed = datetime.fromisoformat(job["finished_at"]) - datetime.fromisoformat(job["started_at"])
+            JOB_SECONDS.labels(kind, job["status"]).observe(elapsed.total_seconds())
+        metrics = job.get("metrics")
+        if metrics and "fit_time_s" in metrics:
+            TRAINING_FIT_SECONDS.labels(metrics["model_type"], metrics.get("training_mode", "full")).observe(
+                metrics["fit_time_s"]
+            )
+    return record
+
+
+def _collect_serving_metrics():
+    """Refresh the served-model gauge before /metrics is rendered"""
+    MODEL_INFO.clear()
+    if model_registry.is_serving():
+        model = model_registry.serving()
+        MODEL_INFO.labels(model.version, model.model_type, model.inference_backend,
+                          str(model_registry.is_pinned()).lower()).set(1)
+
+
+metrics_registry.add_collector(_collect_serving_metrics)
+
+
+# Finished jobs kept per queue for status queries
+JOBS_MAX_FINISHED = int(os.getenv("JOBS_MAX_FINISHED", "100"))
+
+# Training jobs run in worker processes, one at a time
+training_jobs = TrainingJobManager(
+    dataset_path=DATASET_PATH,
+    registry_root=MODEL_REGISTRY_PATH,
+    max_concurrent_jobs=1,
+    on_success=_activate_trained_model,
+    on_finish=_job_metrics_recorder("training"),
+    registry_max_versions=model_registry.max_versions,
+    max_finished_jobs=JOBS_MAX_FINISHED
+)
+
+# Hyperparameter searches; each search runs its own process pool, so the
+# search process must not be a daemon
+tuning_jobs = TrainingJobManager(
+    dataset_path=DATASET_PATH,
+    max_concurrent_jobs=1,
+    runner=run_search,
+    result_fields=["leaderboard", "best", "search"],
+    daemon=False,
+    on_finish=_job_metrics_recorder("tuning"),
+    max_finished_jobs=JOBS_MAX_FINISHED
+)
+
+# Distillation of a published version into a low-latency student
+distill_jobs = TrainingJobManager(
+    dataset_path=DATASET_PATH,
+    registry_root=MODEL_REGISTRY_PATH,
+    max_concurrent_jobs=1,
+    runner=partial(run_distillation, registry_root=str(MODEL_REGISTRY_PATH),
+                   max_versions=model_registry.max_versions),
+    result_fields=["metrics", "model_version", "teacher_version"],
+    on_success=_serve_student,
+    on_finish=_job_metrics_recorder("distillation"),
+    max_finished_jobs=JOBS_MAX_FINISHED
+)
+
+
+def startup():
+    """
+    Load and warm up the serving model before requests are accepted
+    
+    Called from the application lifespan. Each stage is timed and the
+    breakdown is published in startup_state; /api/health reports ready
+    once this has finished.
+    """
+    stages = startup_state["stages_ms"]
+    
+    try:
+        start = time.perf_counter()
+        model_registry.import_legacy()
+        stages["legacy_import"] = (time.perf_counter() - start) * 1000
+        
+        version = model_registry.current_version()
+        if version is not None:
+            start = time.perf_counter()
+            serving_model = model_registry.load(version, warm_up=False)
+            stages["model_load"] = (time.perf_counter() - start) * 1000
+            
+            if model_registry.warm_up_rows > 0:
+                start = time.perf_counter()
+                startup_state["warm_up_ms"] = serving_model.warm_up(model_registry.warm_up_rows)
+                stages["warm_up"] = (time.perf_counter() - start) * 1000
+            
+            model_registry.serving()
+        
+        startup_state["ready"] = True
+        print("✅ Startup complete: " + ", ".join(f"{k} {v:.1f} ms" for k, v in stages.items()))
+    
+    except Exception as e:
+        # Stay up so /api/health can report the failure
+        startup_state["error"] = str(e)
+        print(f"⚠️ Failed to load the serving model: {e}")
+
+
+def shutdown():
+    """Stop training, tuning and distillation workers when the application shuts down"""
+    training_jobs.shutdown()
+    tuning_jobs.shutdown()
+    distill_jobs.shutdown()
+
+
+def _score_feature_batch(features: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Score a list of feature dictionaries with one vectorized model call"""
+    return model_registry.serving().predict_batch(pd.DataFrame(features))
+
+
+# Opt-in micro-batching of concurrent /api/predict requests
+MICRO_BATCHING_ENABLED = os.getenv("PREDICT_MICRO_BATCHING", "false").lower() in ("1", "true", "yes")
+predict_batcher = MicroBatcher(
+    score_batch=_score_feature_batch,
+    max_batch_size=int(os.getenv("PREDICT_MAX_BATCH_SIZE", "64")),
+    max_wait_ms=float(os.getenv("PREDICT_BATCH_WINDOW_MS", "5"))
+)
+
+# Cache of single predictions, keyed on model version and feature vector
+prediction_cache = PredictionCache(max_size=int(os.getenv("PREDICTION_CACHE_SIZE", "10000")))
+
+
+async def _predict_features(features: Dict[str, Any], tier: str = "auto") -> Dict[str, Any]:
+    """
+    Predict a single feature dictionary through the cache and micro-batcher
+    
+    With tier "auto" or "student", the distilled student of the serving
+    version answers instead when there is one; it is fast enough to skip
+    the micro-batcher.
+    
+    Args:
+        features: Dictionary of feature values
+        tier: "auto", "student" or "teacher"
+        
+    Returns:
+        Prediction result
+    """
+    serving_model = model_registry.serving()
+    student = model_registry.student() if tier != "teacher" else None
+    if tier == "student" and student is None:
+        raise HTTPException(
+            status_code=404,
+            detail="The serving model has no distilled student. Submit one with POST /api/distill."
+        )
+    model = student or serving_model
+    key = PredictionCache.make_key(model.version, model.feature_names, features)
+    
+    result = prediction_cache.get(key)
+    if result is None:
+        # Make prediction, grouped with concurrent requests when micro-batching
+        if MICRO_BATCHING_ENABLED and student is None:
+            result = await predict_batcher.submit(features)
+        else:
+            result = model.predict(features)
+        # Batched results carry their row "index"; drop it so both paths answer alike
+        result = {k: v for k, v in result.items() if k not in ("features_used", "index")}
+        prediction_cache.put(key, result)
+    
+    return {**result, "features_used": features}
 
 
 # Pydantic schemas for request/response validation
@@ -77,6 +336,44 @@ class TrainingConfig(BaseModel):
     n_estimators: Optional[int] = 100
     max_depth: Optional[int] = 20
     learning_rate: Optional[float] = 0.1
+    # Any other estimator hyperparameters, e.g. from a /api/tune leaderboard
+    params: Optional[Dict[str, Any]] = None
+    # "incremental" continues training base_version (default: serving version)
+    # with additional_estimators more trees or boosting rounds
+    mode: str = "full"
+    base_version: Optional[str] = None
+    additional_estimators: int = 50
+    fallback_to_full: bool = True
+    # "out_of_core" streams the dataset in chunks of chunk_rows rows (xgboost
+    # or sgd); epochs is the number of partial_fit passes for sgd
+    chunk_rows: Optional[int] = None
+    epochs: Optional[int] = None
+
+
+class DistillationConfig(BaseModel):
+    student_type: str = "xgboost"
+    # Version to distill (default: serving version)
+    teacher_version: Optional[str] = None
+    # Random rows around the training distribution added to the transfer set
+    synthetic_rows: int = 20000
+    test_size: float = 0.2
+    # Student hyperparameters, on top of the small defaults
+    params: Optional[Dict[str, Any]] = None
+    # Serve the student alongside its teacher once distilled
+    serve: bool = True
+
+
+class TuningConfig(BaseModel):
+    model_types: List[str] = ["random_forest", "xgboost", "gradient_boost"]
+    strategy: str = "random"
+    n_candidates: int = 16
+    eta: int = 3
+    min_rows: int = 500
+    scoring: str = "f1_score"
+    validation_size: float = 0.2
+    n_workers: Optional[int] = None
+    seed: int = 42
+    search_spaces: Optional[Dict[str, Dict[str, List[Any]]]] = None
 
 
 class PredictionResponse(BaseModel):
@@ -95,93 +392,312 @@ class MetricsResponse(BaseModel):
     model_type: str
 
 
-@router.post("/train", response_model=MetricsResponse)
+@router.post("/train", status_code=202)
 async def train_model(config: TrainingConfig):
     """
-    Train the exoplanet classification model
+    Submit a training job for the exoplanet classification model
+    
+    Training runs in a separate worker process; poll
+    GET /api/train/{job_id} for its status and metrics. With
+    mode "incremental" the base version keeps its scaler and trees and
+    only gets additional estimators fitted on the current dataset; with
+    mode "out_of_core" the dataset is streamed in chunks instead of loaded.
     
     Args:
         config: Training configuration including model type and hyperparameters
         
     Returns:
-        Training metrics
+        The queued training job
     """
-    global model, model_trained
-    
-    try:
-        # Load dataset
-        dataset_path = Path("./data/nasa_exoplanets.csv")
-        if not dataset_path.exists():
+    if not DATASET_PATH.exists():
+        raise HTTPException(
+            status_code=404,
+            detail="Dataset not found. Please upload a dataset first."
+        )
+    if config.mode not in TRAINING_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown training mode: {config.mode}. Use one of: {', '.join(TRAINING_MODES)}"
+        )
+    if config.mode == "incremental":
+        base_version = config.base_version or model_registry.current_version()
+        if base_version is None or not model_registry.exists(base_version):
             raise HTTPException(
                 status_code=404,
-                detail="Dataset not found. Please upload a dataset first."
+                detail="Base model version not found. Train a model first."
             )
+        if config.additional_estimators < 1:
+            raise HTTPException(status_code=400, detail="additional_estimators must be at least 1")
+    if config.mode == "out_of_core":
+        if config.model_type not in OUT_OF_CORE_MODEL_TYPES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Out-of-core training supports: {', '.join(OUT_OF_CORE_MODEL_TYPES)}"
+            )
+        if (config.chunk_rows is not None and config.chunk_rows < 1) or (config.epochs is not None and config.epochs < 1):
+            raise HTTPException(status_code=400, detail="chunk_rows and epochs must be at least 1")
+    
+    job_config = config.model_dump()
+    profile = profiling.active()
+    if profile is not None:
+        # The job profiles itself in the worker; results appear in the job's "profile" field
+        job_config["profile"] = {"dump_dir": profile.dump_dir}
+    
+    try:
+        return training_jobs.submit(job_config)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/train/{job_id}")
+async def get_training_job(job_id: str):
+    """
+    Get the status of a training job
+    
+    Args:
+        job_id: Training job ID
         
-        df = pd.read_csv(dataset_path)
-        
-        # Initialize model with specified type
-        model = ExoplanetModel(model_type=config.model_type)
-        
-        # Update hyperparameters if provided
-        params = {}
-        if config.n_estimators:
-            params['n_estimators'] = config.n_estimators
-        if config.max_depth:
-            params['max_depth'] = config.max_depth
-        if config.learning_rate and config.model_type in ['xgboost', 'gradient_boost']:
-            params['learning_rate'] = config.learning_rate
-        
-        if params:
-            model.update_hyperparameters(params)
+    Returns:
+        Job status, and training metrics once the job has succeeded
+    """
+    job = training_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Training job not found")
+    
+    return job
+
+
+@router.post("/train/{job_id}/cancel")
+async def cancel_training_job(job_id: str):
+    """
+    Cancel a queued or running training job
+    
+    Args:
+        job_id: Training job ID
         
-        # Preprocess data
-        X, y = model.preprocess_data(df)
+    Returns:
+        The cancelled job
+    """
+    job = training_jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Training job not found")
+    if job["status"] != "cancelled":
+        raise HTTPException(
+            status_code=409,
+            detail=f"Training job already finished with status '{job['status']}'"
+        )
+    
+    return job
+
+
+@router.post("/tune", status_code=202)
+async def tune_model(config: TuningConfig):
+    """
+    Submit a hyperparameter search
+    
+    Candidates are drawn by random or grid search and evaluated with
+    successive halving in a process pool; poll GET /api/tune/{job_id}
+    for the ranked leaderboard.
+    
+    Args:
+        config: Search configuration
         
-        # Train model
-        metrics = model.train(X, y, test_size=config.test_size)
+    Returns:
+        The queued search job
+    """
+    if not DATASET_PATH.exists():
+        raise HTTPException(
+            status_code=404,
+            detail="Dataset not found. Please upload a dataset first."
+        )
+    if config.scoring not in SCORING_METRICS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported scoring metric: {config.scoring}. Use one of: {', '.join(SCORING_METRICS)}"
+        )
+    
+    try:
+        # Validate model types, strategy and search spaces before queueing
+        sample_candidates(config.model_types, config.strategy, config.n_candidates,
+                          config.search_spaces, config.seed)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        return tuning_jobs.submit(config.model_dump())
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/tune/{job_id}")
+async def get_tuning_job(job_id: str):
+    """
+    Get the status of a hyperparameter search
+    
+    Args:
+        job_id: Search job ID
         
-        # Save model
-        model.save_model()
+    Returns:
+        Job status, and the ranked leaderboard once the search has succeeded
+    """
+    job = tuning_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Tuning job not found")
+    
+    return job
+
+
+@router.post("/tune/{job_id}/cancel")
+async def cancel_tuning_job(job_id: str):
+    """
+    Cancel a queued or running hyperparameter search
+    
+    Args:
+        job_id: Search job ID
         
-        model_trained = True
+    Returns:
+        The cancelled job
+    """
+    job = tuning_jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Tuning job not found")
+    if job["status"] != "cancelled":
+        raise HTTPException(
+            status_code=409,
+            detail=f"Tuning job already finished with status '{job['status']}'"
+        )
+    
+    return job
+
+
+@router.post("/distill", status_code=202)
+async def distill_model(config: DistillationConfig):
+    """
+    Submit a distillation job
+    
+    A compact student is trained on the teacher's predicted probabilities
+    over the training set plus synthetic rows, published as a new version
+    and (with serve) used for single predictions while the teacher keeps
+    serving everything else. Poll GET /api/distill/{job_id} for the
+    student's accuracy, its agreement with the teacher and both latencies.
+    
+    Args:
+        config: Distillation configuration
         
-        return MetricsResponse(
-            accuracy=metrics['accuracy'],
-            precision=metrics['precision'],
-            recall=metrics['recall'],
-            f1_score=metrics['f1_score'],
-            confusion_matrix=metrics['confusion_matrix'],
-            model_type=metrics['model_type']
+    Returns:
+        The queued distillation job
+    """
+    if not DATASET_PATH.exists():
+        raise HTTPException(
+            status_code=404,
+            detail="Dataset not found. Please upload a dataset first."
         )
+    if config.student_type not in DISTILLATION_STUDENT_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported student type: {config.student_type}. Use one of: {', '.join(DISTILLATION_STUDENT_TYPES)}"
+        )
+    if config.synthetic_rows < 0:
+        raise HTTPException(status_code=400, detail="synthetic_rows must not be negative")
+    teacher_version = config.teacher_version or model_registry.current_version()
+    if teacher_version is None or not model_registry.exists(teacher_version):
+        raise HTTPException(
+            status_code=404,
+            detail="Teacher model version not found. Train a model first."
+        )
+    
+    job_config = {**config.model_dump(), "teacher_version": teacher_version}
+    profile = profiling.active()
+    if profile is not None:
+        job_config["profile"] = {"dump_dir": profile.dump_dir}
     
+    try:
+        return distill_jobs.submit(job_config)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/distill/{job_id}")
+async def get_distillation_job(job_id: str):
+    """
+    Get the status of a distillation job
+    
+    Args:
+        job_id: Distillation job ID
+        
+    Returns:
+        Job status, and the student's metrics and latency comparison once it has succeeded
+    """
+    job = distill_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Distillation job not found")
+    
+    return job
+
+
+@router.post("/distill/{job_id}/cancel")
+async def cancel_distillation_job(job_id: str):
+    """
+    Cancel a queued or running distillation job
+    
+    Args:
+        job_id: Distillation job ID
+        
+    Returns:
+        The cancelled job
+    """
+    job = distill_jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Distillation job not found")
+    if job["status"] != "cancelled":
+        raise HTTPException(
+            status_code=409,
+            detail=f"Distillation job already finished with status '{job['status']}'"
+        )
+    
+    return job
+
+
+@router.delete("/distill/student")
+async def remove_student():
+    """
+    Stop serving the distilled student of the serving version
+    
+    Returns:
+        Status message
+    """
+    version = model_registry.current_version()
+    if version is None or not model_registry.remove_student(version):
+        raise HTTPException(status_code=404, detail="The serving model has no distilled student")
+    prediction_cache.invalidate()
+    
+    return {"message": f"Model version {version} now serves every prediction itself"}
+
+
 @router.post("/predict", response_model=PredictionResponse)
-async def predict_single(input_data: PredictionInput):
+async def predict_single(input_data: PredictionInput, tier: str = Query("auto")):
     """
     Make prediction for a single exoplanet
     
     Args:
         input_data: Exoplanet features
+        tier: "auto" (the distilled student if there is one), "student" or "teacher"
         
     Returns:
         Prediction result with probabilities
     """
-    global model, model_trained
+    if tier not in PREDICTION_TIERS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown prediction tier: {tier}. Use one of: {', '.join(PREDICTION_TIERS)}"
+        )
     
     try:
-        # Load model if not trained
-        if not model_trained:
-            model.load_model()
-            model_trained = True
-        
         # Convert input to dictionary
         features = input_data.model_dump()
         
         # Make prediction
-        result = model.predict(features)
+        result = await _predict_features(features, tier)
         
         return PredictionResponse(
             prediction=result['prediction'],
@@ -190,6 +706,8 @@ async def predict_single(input_data: PredictionInput):
             probabilities=result['probabilities']
         )
     
+    except HTTPException:
+        raise
     except FileNotFoundError:
         raise HTTPException(
             status_code=404,
@@ -199,168 +717,430 @@ async def predict_single(input_data: PredictionInput):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/predict/batching")
+async def get_batching_stats():
+    """
+    Get micro-batching statistics for /api/predict
+    
+    Returns:
+        Whether micro-batching is enabled, batch size distribution and queueing delay
+    """
+    return {
+        "enabled": MICRO_BATCHING_ENABLED,
+        **predict_batcher.stats()
+    }
+
+
+@router.get("/predict/cache")
+async def get_prediction_cache_stats():
+    """
+    Get prediction cache statistics
+    
+    Returns:
+        Cache size and hit/miss/eviction counters
+    """
+    return prediction_cache.stats()
+
+
+@router.delete("/predict/cache")
+async def clear_prediction_cache():
+    """
+    Drop all cached predictions
+    
+    Returns:
+        Cache statistics after clearing
+    """
+    prediction_cache.invalidate()
+    return prediction_cache.stats()
+
+
 @router.post("/predict-batch")
-async def predict_batch(file: UploadFile = File(...)):
+async def predict_batch(
+    request: Request,
+    file: UploadFile = File(...),
+    layout: Optional[str] = None,
+    stream: bool = False,
+    output_format: str = "ndjson",
+    chunk_size: int = Query(STREAM_CHUNK_SIZE, ge=1, le=1_000_000)
+):
     """
     Make predictions for multiple exoplanets from CSV file
     
+    The response format follows the Accept header: JSON (default),
+    MessagePack, Arrow IPC stream or CSV.
+    
     Args:
+        request: Incoming request (for its Accept header)
         file: CSV file with exoplanet features
+        layout: "rows" for one dictionary per planet, "columns" for one array per field
+            (JSON and MessagePack; defaults to "rows" for JSON, "columns" for MessagePack)
+        stream: Parse and score the CSV in chunks, streaming results as they are produced
+        output_format: Streaming output format, "ndjson" or "csv"
+        chunk_size: Rows parsed and scored per chunk when streaming
         
     Returns:
-        List of predictions
+        Predictions, or a streamed NDJSON/CSV body when stream=true
     """
-    global model, model_trained
+    if layout not in (None, "rows", "columns"):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported layout: {layout}. Use 'rows' or 'columns'"
+        )
+    
+    if stream and output_format not in STREAM_MEDIA_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported output format: {output_format}. Use 'ndjson' or 'csv'"
+        )
+    
+    fmt = "json" if stream else _response_format(request)
+    if layout is None:
+        layout = "columns" if fmt == "msgpack" else "rows"
     
     try:
-        # Load model if not trained
-        if not model_trained:
-            model.load_model()
-            model_trained = True
+        model = model_registry.serving()
+        
+        if stream:
+            return _stream_batch_predictions(model, file, output_format, chunk_size)
         
         # Read CSV file
-        contents = await file.read()
-        df = pd.read_csv(io.StringIO(contents.decode('utf-8')))
+        with profiling.stage("read"):
+            contents = await file.read()
+        with profiling.stage("parse"):
+            df = pd.read_csv(io.StringIO(contents.decode('utf-8')))
+        
+        # Make predictions; tables and the columns layout are encoded from the arrays
+        if fmt in TABLE_FORMATS:
+            columns = model.predict_batch_columnar(df)
+            return response_formats.table_response(fmt, ExoplanetModel.columnar_to_table(columns), {
+                "total_count": len(columns["index"])
+            })
+        
+        if layout == "columns":
+            columns = model.predict_batch_columnar(df)
+            return response_formats.document_response(fmt, {
+                "predictions": columns,
+                "total_count": len(columns["index"]),
+                "layout": layout
+            })
         
-        # Make predictions
         results = model.predict_batch(df)
         
-        return {
+        return response_formats.document_response(fmt, {
             "predictions": results,
             "total_count": len(results)
-        }
+        })
     
     except FileNotFoundError:
         raise HTTPException(
             status_code=404,
             detail="Model not found. Please train the model first."
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _response_format(request: Request) -> str:
+    """
+    Response format asked for by the Accept header of a bulk endpoint
+    
+    Raises:
+        HTTPException: 406 if none of the accepted media types can be produced
+    """
+    fmt = response_formats.negotiate(request.headers.get("accept"))
+    if fmt is None:
+        available = ", ".join(response_formats.MEDIA_TYPES[name] for name in response_formats.available_formats())
+        raise HTTPException(
+            status_code=406,
+            detail=f"None of the accepted media types can be produced. Available: {available}"
+        )
+    return fmt
+
+
+def _stream_batch_predictions(serving_model: ExoplanetModel, file: UploadFile,
+                              output_format: str, chunk_size: int) -> StreamingResponse:
+    """
+    Build a streaming response that scores an uploaded CSV chunk by chunk
+    
+    The multipart parser has already spooled the upload to a temporary file,
+    so only one chunk of rows and its predictions are held in memory at a time.
+    """
+    file.file.seek(0)
+    reader = pd.read_csv(file.file, chunksize=chunk_size, encoding='utf-8')
+    
+    # Parse the first chunk eagerly so bad input fails with a proper status code
+    try:
+        first_chunk = next(reader)
+    except StopIteration:
+        first_chunk = pd.DataFrame(columns=serving_model.feature_names)
+    
+    missing_cols = [col for col in serving_model.feature_names if col not in first_chunk.columns]
+    if missing_cols:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Missing required columns: {', '.join(missing_cols)}"
+        )
+    
+    def chunks():
+        yield first_chunk
+        yield from reader
+    
+    def ndjson_lines():
+        try:
+            for results in serving_model.iter_predict_batch(chunks()):
+                yield "".join(json.dumps(result) + "\n" for result in results)
+        except Exception as e:
+            yield json.dumps({"error": str(e)}) + "\n"
+    
+    def csv_lines():
+        header = True
+        try:
+            for columns in serving_model.iter_predict_batch(chunks(), columnar=True):
+                rows = pd.DataFrame(ExoplanetModel.columnar_to_table(columns))
+                yield rows.to_csv(index=False, header=header)
+                header = False
+        except Exception as e:
+            yield f"# error: {e}\n"
+    
+    body = ndjson_lines() if output_format == "ndjson" else csv_lines()
+    return StreamingResponse(body, media_type=STREAM_MEDIA_TYPES[output_format])
+
+
 @router.post("/upload-dataset")
 async def upload_dataset(file: UploadFile = File(...)):
     """
     Upload NASA exoplanet dataset (CSV)
     
+    The upload is copied to a temporary file in chunks, its header is
+    validated from the first bytes, and statistics and the columnar cache
+    are built in one incremental pass before the file is moved into place.
+    
     Args:
         file: CSV file containing NASA exoplanet data
         
     Returns:
         Dataset statistics
     """
+    # Validate file type
+    if not file.filename.endswith('.csv'):
+        raise HTTPException(
+            status_code=400,
+            detail="Only CSV files are supported"
+        )
+    
+    DATASET_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = tempfile.NamedTemporaryFile(
+        dir=DATASET_PATH.parent, prefix=".upload-", suffix=".csv", delete=False
+    )
+    
     try:
-        # Validate file type
-        if not file.filename.endswith('.csv'):
-            raise HTTPException(
-                status_code=400,
-                detail="Only CSV files are supported"
-            )
-        
-        # Read and validate CSV
-        contents = await file.read()
-        df = pd.read_csv(io.StringIO(contents.decode('utf-8')))
+        digest = hashlib.sha256()
+        head = b""
+        header_checked = False
         
-        # Check for required columns
-        required_cols = ['koi_period', 'koi_duration', 'koi_depth', 'koi_prad']
-        missing_cols = [col for col in required_cols if col not in df.columns]
+        with tmp:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                tmp.write(chunk)
+                
+                # Validate the header as soon as its line is complete
+                if not header_checked:
+                    head += chunk
+                    if b"\n" in head or len(head) > UPLOAD_CHUNK_SIZE:
+                        _validate_dataset_header(head)
+                        header_checked = True
+                        head = b""
         
-        if missing_cols:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Missing required columns: {', '.join(missing_cols)}"
-            )
+        if not header_checked:
+            _validate_dataset_header(head)
         
-        # Save dataset
-        save_path = Path("./data/nasa_exoplanets.csv")
-        save_path.parent.mkdir(parents=True, exist_ok=True)
-        df.to_csv(save_path, index=False)
+        content_hash = digest.hexdigest()
+        stats = await run_in_threadpool(dataset_store.ingest, tmp.name, content_hash)
         
-        # Return statistics
-        stats = {
+        return {
             "filename": file.filename,
-            "total_rows": len(df),
-            "total_columns": len(df.columns),
-            "columns": df.columns.tolist(),
-            "sample_data": df.head(5).to_dict(orient='records'),
-            "missing_values": df.isnull().sum().to_dict()
+            "content_hash": content_hash,
+            **stats
         }
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        # Gone already when ingest moved it into place
+        if os.path.exists(tmp.name):
+            os.unlink(tmp.name)
+
+
+@router.post("/append-dataset")
+async def append_dataset(file: UploadFile = File(...)):
+    """
+    Append new labeled rows (CSV) to the current dataset
+    
+    The rows are added to the end of the stored CSV and the cache and
+    statistics are rebuilt. Follow up with POST /api/train and
+    {"mode": "incremental"} to update the model without a full retrain.
+    
+    Args:
+        file: CSV file with the new rows, including a disposition column
         
-        return stats
+    Returns:
+        Number of rows appended and the updated dataset statistics
+    """
+    if not file.filename.endswith('.csv'):
+        raise HTTPException(
+            status_code=400,
+            detail="Only CSV files are supported"
+        )
+    if not dataset_store.exists():
+        raise HTTPException(
+            status_code=404,
+            detail="Dataset not found. Please upload a dataset first."
+        )
+    
+    contents = await file.read()
+    _validate_dataset_header(contents)
     
+    try:
+        rows = pd.read_csv(io.BytesIO(contents), encoding='utf-8')
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Could not parse CSV: {e}")
+    
+    # Rows are written in the stored dataset's columns, so they need its label column
+    dataset_columns = await run_in_threadpool(dataset_store.columns)
+    label_col = next((col for col in LABEL_COLUMNS if col in dataset_columns), None)
+    if label_col is not None and label_col not in rows.columns:
+        raise HTTPException(
+            status_code=400,
+            detail=f"New rows must be labeled with a '{label_col}' column"
+        )
+    
+    try:
+        stats = await run_in_threadpool(dataset_store.append, rows)
+        return {
+            "filename": file.filename,
+            "rows_appended": len(rows),
+            **stats
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _validate_dataset_header(head: bytes):
+    """
+    Check the header line of an uploaded CSV for the required columns
+    
+    Args:
+        head: First bytes of the upload, including the header line
+        
+    Raises:
+        HTTPException: If the header is unreadable or required columns are missing
+    """
+    try:
+        header_line = head.split(b"\n", 1)[0].decode('utf-8-sig')
+        columns = next(csv.reader([header_line]), [])
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Dataset must be UTF-8 encoded CSV")
+    
+    columns = [col.strip() for col in columns]
+    missing_cols = [col for col in REQUIRED_DATASET_COLUMNS if col not in columns]
+    
+    if missing_cols:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Missing required columns: {', '.join(missing_cols)}"
+        )
+
+
 @router.get("/metrics")
 async def get_metrics():
     """
-    Get current model metrics
+    Get the metrics of the serving model
+    
+    Metrics are computed at training time, stored with the model version
+    and loaded into memory with it.
+    
+    Returns:
+        Model performance metrics, per-class report, feature importances,
+        timings and the fingerprint of the training dataset
+    """
+    try:
+        metrics = model_registry.serving().metrics
+    except FileNotFoundError:
+        metrics = None
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    if metrics is None:
+        raise HTTPException(
+            status_code=404,
+            detail="No metrics available. Train the model first."
+        )
+    
+    return metrics
+
+
+@router.get("/dataset-info")
+async def get_dataset_info(request: Request):
+    """
+    Get information about the current dataset
+    
+    Statistics are computed once per dataset version (content hash)
+    and served from the stored copy afterwards. Arrow and CSV responses
+    hold one row of statistics per dataset column.
+    
+    Args:
+        request: Incoming request (for its Accept header)
     
     Returns:
-        Model performance metrics
+        Dataset statistics, sample data and per-feature distributions
     """
-    global model, model_trained
+    fmt = _response_format(request)
     
     try:
-        if not model_trained:
-            model.load_model()
-            model_trained = True
-        
-        # Return stored metrics
-        metrics_path = Path("./models/metrics.json")
-        if metrics_path.exists():
-            import json
-            with open(metrics_path, 'r') as f:
-                metrics = json.load(f)
-            return metrics
-        else:
+        if not dataset_store.exists():
             raise HTTPException(
                 status_code=404,
-                detail="No metrics available. Train the model first."
+                detail="No dataset found. Please upload a dataset first."
             )
+        
+        # Stale statistics are recomputed from the whole dataset; keep that off the event loop
+        stats = await run_in_threadpool(dataset_store.get_stats)
+        if fmt in TABLE_FORMATS:
+            return response_formats.table_response(fmt, *dataset_stats_table(stats))
+        return response_formats.document_response(fmt, stats)
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/dataset-info")
-async def get_dataset_info():
+@router.post("/dataset-info/recompute")
+async def recompute_dataset_info():
     """
-    Get information about the current dataset
+    Recompute and store the statistics of the current dataset
     
     Returns:
-        Dataset statistics and sample data
+        Freshly computed dataset statistics
     """
     try:
-        dataset_path = Path("./data/nasa_exoplanets.csv")
-        if not dataset_path.exists():
+        if not dataset_store.exists():
             raise HTTPException(
                 status_code=404,
                 detail="No dataset found. Please upload a dataset first."
             )
         
-        df = pd.read_csv(dataset_path)
-        
-        # Calculate statistics
-        stats = {
-            "total_rows": len(df),
-            "total_columns": len(df.columns),
-            "columns": df.columns.tolist(),
-            "missing_values": df.isnull().sum().to_dict(),
-            "data_types": df.dtypes.astype(str).to_dict(),
-            "sample_data": df.head(10).to_dict(orient='records')
-        }
-        
-        # Add distribution info if disposition column exists
-        for col in ['koi_disposition', 'disposition', 'exoplanet_status']:
-            if col in df.columns:
-                stats['class_distribution'] = df[col].value_counts().to_dict()
-                break
-        
-        return stats
+        return await run_in_threadpool(dataset_store.get_stats, recompute=True)
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -373,49 +1153,167 @@ async def get_model_info():
     Returns:
         Model configuration and metadata
     """
-    global model, model_trained
-    
     try:
-        if not model_trained:
-            model.load_model()
-            model_trained = True
+        model = model_registry.serving()
+        student = model_registry.student()
         
         return {
             "model_type": model.model_type,
             "feature_names": model.feature_names,
             "label_mapping": model.label_mapping,
             "n_features": len(model.feature_names),
-            "is_trained": model_trained
+            "is_trained": True,
+            "model_version": model.version,
+            "pinned": model_registry.is_pinned(),
+            "inference_backend": model.inference_backend,
+            "student": {
+                "model_version": student.version,
+                "model_type": student.model_type,
+                "inference_backend": student.inference_backend
+            } if student is not None else None
         }
     
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=404,
+            detail="Model not found. Please train the model first."
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/health")
-async def health_check():
-    """Health check endpoint"""
-    return {
-        "status": "healthy",
-        "model_trained": model_trained,
-        "version": "1.0.0"
-    }
+@router.get("/models")
+async def list_model_versions():
+    """
+    List the model versions stored in the registry
+    
+    Returns:
+        Versions (newest first) with the serving and pinned flags
+    """
+    try:
+        return {
+            "serving_version": model_registry.current_version(),
+            "pinned": model_registry.is_pinned(),
+            "versions": model_registry.list_versions()
+        }
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/models/{version}/metrics")
+async def get_model_version_metrics(version: str):
+    """
+    Get the training metrics of a stored model version
+    
+    Args:
+        version: Model version
+        
+    Returns:
+        Metrics stored with the version
+    """
+    try:
+        metrics = await run_in_threadpool(model_registry.metrics, version)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Model version not found: {version}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    if metrics is None:
+        raise HTTPException(status_code=404, detail=f"No metrics stored for model version {version}")
+    
+    return metrics
+
+
+@router.post("/models/{version}/activate")
+async def activate_model_version(version: str, pin: bool = Query(False)):
+    """
+    Serve a stored model version
+    
+    The version is loaded before the swap, so requests keep being served
+    by the previous version until it is ready.
+    
+    Args:
+        version: Model version to serve
+        pin: Keep serving this version when training publishes new versions
+        
+    Returns:
+        The serving version
+    """
+    try:
+        model = await run_in_threadpool(model_registry.activate, version, pin)
+        prediction_cache.invalidate()
+        
+        return {"serving_version": model.version, "pinned": pin}
+    
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Model version not found: {version}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
 
-# Helper functions for planet data management
-def load_planets_data() -> List[Dict]:
-    """Load planets data from JSON file"""
-    if PLANETS_DATA_PATH.exists():
-        with open(PLANETS_DATA_PATH, 'r') as f:
-            return json.load(f)
-    return []
+@router.post("/models/rollback")
+async def rollback_model_version():
+    """
+    Serve the version that was served before the current one
+    
+    Returns:
+        The serving version
+    """
+    try:
+        model = await run_in_threadpool(model_registry.rollback)
+        prediction_cache.invalidate()
+        
+        return {"serving_version": model.version, "pinned": model_registry.is_pinned()}
+    
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
 
-def save_planets_data(planets: List[Dict]):
-    """Save planets data to JSON file"""
-    PLANETS_DATA_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with open(PLANETS_DATA_PATH, 'w') as f:
-        json.dump(planets, f, indent=2)
+@router.post("/models/unpin")
+async def unpin_model_version():
+    """
+    Unpin the serving version so newly trained versions are served again
+    
+    Returns:
+        The serving version
+    """
+    try:
+        model_registry.unpin()
+        return {"serving_version": model_registry.current_version(), "pinned": False}
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/health")
+async def health_check():
+    """
+    Health check endpoint
+    
+    Responds 503 until the serving model has been loaded and warmed up,
+    so load balancers only route traffic to warm instances.
+    """
+    ready = startup_state["ready"]
+    content = {
+        "status": "healthy" if ready else "starting",
+        "ready": ready,
+        "model_trained": model_registry.current_version() is not None,
+        "model_version": model_registry.current_version(),
+        "startup": {
+            "stages_ms": startup_state["stages_ms"],
+            "warm_up_ms": startup_state["warm_up_ms"],
+            "error": startup_state["error"]
+        },
+        "version": "1.0.0"
+    }
+    return JSONResponse(content=content, status_code=200 if ready else 503)
 
 
 @router.post("/planets/predict-and-save", response_model=SavedPlanet)
@@ -429,14 +1327,7 @@ async def predict_and_save_planet(planet: PlanetInput):
     Returns:
         Saved planet with prediction results
     """
-    global model, model_trained
-    
     try:
-        # Load model if not trained
-        if not model_trained:
-            model.load_model()
-            model_trained = True
-        
         # Prepare features for prediction
         features = {
             'koi_period': planet.koi_period,
@@ -454,17 +1345,10 @@ async def predict_and_save_planet(planet: PlanetInput):
         }
         
         # Make prediction
-        prediction_result = model.predict(features)
-        
-        # Load existing planets
-        planets = load_planets_data()
-        
-        # Generate new ID
-        new_id = max([p.get('id', 0) for p in planets], default=0) + 1
+        prediction_result = await _predict_features(features)
         
         # Create saved planet object
         saved_planet = {
-            'id': new_id,
             'name': planet.name,
             'koi_period': planet.koi_period,
             'koi_depth': planet.koi_depth,
@@ -481,13 +1365,8 @@ async def predict_and_save_planet(planet: PlanetInput):
             'created_at': datetime.now().isoformat()
         }
         
-        # Add to planets list
-        planets.append(saved_planet)
-        
-        # Save to file
-        save_planets_data(planets)
-        
-        return saved_planet
+        # Save to database (assigns the ID)
+        return planet_store.add(saved_planet)
     
     except FileNotFoundError:
         raise HTTPException(
@@ -499,19 +1378,93 @@ async def predict_and_save_planet(planet: PlanetInput):
 
 
 @router.get("/planets")
-async def get_all_planets():
+async def get_all_planets(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
+    sort_by: str = "id",
+    order: str = "asc",
+    prediction: Optional[str] = None,
+    min_confidence: Optional[float] = None,
+    max_confidence: Optional[float] = None,
+    created_after: Optional[str] = None,
+    created_before: Optional[str] = None,
+    name_prefix: Optional[str] = None,
+    include_total: bool = False
+):
     """
-    Get all saved planets
+    Get saved planets, all at once or one page at a time
+    
+    Without limit or cursor every matching planet is returned, as before
+    pagination existed; with either, pages of `limit` planets (default 50).
+    Pages carry a total only with include_total, since counting visits
+    every matching planet.
+    Arrow and CSV responses hold one row per planet, with one probability
+    column per class; the cursor and counts are sent as X- headers.
     
+    Args:
+        request: Incoming request (for its Accept header)
+        limit: Maximum number of planets per page (default: all, or 50 with a cursor)
+        cursor: next_cursor from the previous page
+        sort_by: Sort column (id, created_at, confidence or name)
+        order: Sort order, "asc" or "desc"
+        prediction: Filter by prediction label
+        min_confidence: Filter by minimum confidence
+        max_confidence: Filter by maximum confidence
+        created_after: Filter by creation time (ISO timestamp, inclusive)
+        created_before: Filter by creation time (ISO timestamp, exclusive)
+        name_prefix: Filter by name prefix
+        include_total: Also count the planets matching the filters when paging
+        
     Returns:
-        List of all saved planets with predictions
+        Page of saved planets with predictions, the cursor of the next page
+        and the number of planets matching the filters (None for pages
+        requested without include_total)
     """
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="Invalid order. Use 'asc' or 'desc'")
+    fmt = _response_format(request)
+    if limit is None and cursor is not None:
+        limit = PLANETS_PAGE_SIZE
+    
+    filters = {
+        "prediction": prediction,
+        "min_confidence": min_confidence,
+        "max_confidence": max_confidence,
+        "created_after": created_after,
+        "created_before": created_before,
+        "name_prefix": name_prefix
+    }
+    
     try:
-        planets = load_planets_data()
-        return {
-            "planets": planets,
-            "total": len(planets)
+        planets, next_cursor = planet_store.query(
+            limit=limit,
+            cursor=cursor,
+            sort_by=sort_by,
+            descending=order == "desc",
+            columnar=fmt in TABLE_FORMATS,
+            **filters
+        )
+        
+        if limit is None:
+            # Every matching planet was returned, so counting them is free
+            total = len(planets["id"]) if fmt in TABLE_FORMATS else len(planets)
+        elif include_total:
+            total = planet_store.count(**filters)
+        else:
+            total = None
+        
+        metadata = {
+            "total": total,
+            "next_cursor": next_cursor,
+            "limit": limit
         }
+        
+        if fmt in TABLE_FORMATS:
+            return response_formats.table_response(fmt, planets, metadata)
+        return response_formats.document_response(fmt, {"planets": planets, **metadata})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -528,8 +1481,7 @@ async def get_planet(planet_id: int):
         Planet data with prediction
     """
     try:
-        planets = load_planets_data()
-        planet = next((p for p in planets if p['id'] == planet_id), None)
+        planet = planet_store.get(planet_id)
         
         if not planet:
             raise HTTPException(status_code=404, detail="Planet not found")
@@ -553,14 +1505,9 @@ async def delete_planet(planet_id: int):
         Success message
     """
     try:
-        planets = load_planets_data()
-        updated_planets = [p for p in planets if p['id'] != planet_id]
-        
-        if len(updated_planets) == len(planets):
+        if not planet_store.delete(planet_id):
             raise HTTPException(status_code=404, detail="Planet not found")
         
-        save_planets_data(updated_planets)
-        
         return {
             "message": "Planet deleted successfully",
             "deleted_id": planet_id
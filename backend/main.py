@@ -3,14 +3,47 @@ Main FastAPI Application
 Connects all MVC components
 """
 
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response
 from pathlib import Path
 import uvicorn
 
+_import_start = time.perf_counter()
+from controllers import exoplanet_controller
 from controllers.exoplanet_controller import router as exoplanet_router
+from utils import metrics, profiling
+_import_ms = (time.perf_counter() - _import_start) * 1000
+
+# Load the model in the background and serve /api/health (503) meanwhile,
+# instead of holding back the listening socket until the model is warm
+MODEL_LOAD_IN_BACKGROUND = os.getenv("MODEL_LOAD_IN_BACKGROUND", "false").lower() in ("1", "true", "yes")
+
+# Directory for cProfile dumps of requests sent with "X-Profile: cprofile";
+# unset, such requests only get the Server-Timing breakdown
+PROFILE_DUMP_DIR = os.getenv("PROFILE_DUMP_DIR") or None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load and warm up the serving model on startup, stop training workers on shutdown"""
+    exoplanet_controller.startup_state["stages_ms"]["controller_import"] = _import_ms
+    
+    loop = asyncio.get_running_loop()
+    loading = loop.run_in_executor(None, exoplanet_controller.startup)
+    if not MODEL_LOAD_IN_BACKGROUND:
+        await loading
+    
+    yield
+    
+    exoplanet_controller.shutdown()
+
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -18,7 +51,8 @@ app = FastAPI(
     description="AI/ML API for detecting and classifying exoplanets using NASA data",
     version="1.0.0",
     docs_url="/api/docs",
-    redoc_url="/api/redoc"
+    redoc_url="/api/redoc",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -37,10 +71,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route request counts and latencies, exported at /metrics
+app.add_middleware(metrics.MetricsMiddleware, excluded_paths=["/metrics"])
+
+# Opt-in per-request stage timings (Server-Timing header) and cProfile dumps
+app.add_middleware(profiling.ProfilingMiddleware, dump_dir=PROFILE_DUMP_DIR)
+
 # Include routers
 app.include_router(exoplanet_router)
 
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Metrics of this process in the Prometheus text format"""
+    return Response(content=metrics.registry.render(), headers={"Content-Type": metrics.CONTENT_TYPE})
+
+
 # Root endpoint
 @app.get("/")
 async def root():
@@ -61,13 +107,26 @@ async def api_info():
         "version": "1.0.0",
         "endpoints": {
             "train": "POST /api/train",
+            "training_job": "GET /api/train/{job_id}",
+            "cancel_training_job": "POST /api/train/{job_id}/cancel",
+            "tune": "POST /api/tune",
+            "tuning_job": "GET /api/tune/{job_id}",
+            "distill": "POST /api/distill",
+            "distillation_job": "GET /api/distill/{job_id}",
+            "remove_student": "DELETE /api/distill/student",
             "predict": "POST /api/predict",
             "predict_batch": "POST /api/predict-batch",
             "upload_dataset": "POST /api/upload-dataset",
+            "append_dataset": "POST /api/append-dataset",
             "metrics": "GET /api/metrics",
             "dataset_info": "GET /api/dataset-info",
             "model_info": "GET /api/model-info",
-            "health": "GET /api/health"
+            "model_versions": "GET /api/models",
+            "model_version_metrics": "GET /api/models/{version}/metrics",
+            "activate_model_version": "POST /api/models/{version}/activate",
+            "rollback_model_version": "POST /api/models/rollback",
+            "health": "GET /api/health",
+            "prometheus_metrics": "GET /metrics"
         }
     }
 
@@ -0,0 +1,668 @@
+"""
+MODEL LAYER - Dataset Storage
+Uploaded CSV dataset with a typed, memory-mappable columnar cache
+and precomputed statistics
+"""
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from models.exoplanet_model import LABEL_COLUMNS, POTENTIAL_FEATURES
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+except ImportError:  # Without pyarrow the CSV is parsed on every load
+    pa = None
+    feather = None
+    pq = None
+
+
+# Quantiles and histogram resolution of the per-feature statistics
+STATS_QUANTILES = [0.05, 0.25, 0.5, 0.75, 0.95]
+STATS_HISTOGRAM_BINS = 20
+
+# Values per feature kept for quantiles and histograms; exact below this size
+STATS_RESERVOIR_SIZE = 100_000
+
+# Number of rows included as sample data in the statistics
+STATS_SAMPLE_ROWS = 10
+
+# Rows parsed per chunk when ingesting an uploaded CSV
+INGEST_CHUNK_ROWS = 50_000
+
+
+def iter_file_chunks(path: str, columns: Optional[List[str]] = None,
+                     chunk_rows: int = INGEST_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """
+    Read a CSV, Parquet or Feather (Arrow IPC) file in chunks of rows
+
+    Only one chunk is held in memory at a time; Feather files are memory-mapped.
+
+    Args:
+        path: File to read; the format is taken from the extension
+        columns: Columns to read; names not in the file are ignored.
+                 All columns are read when omitted.
+        chunk_rows: Rows per chunk
+
+    Yields:
+        DataFrames of at most chunk_rows rows
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+
+    if suffix in (".parquet", ".feather", ".arrow"):
+        if pa is None:
+            raise ValueError(f"Reading {suffix} files requires pyarrow")
+        if suffix == ".parquet":
+            parquet_file = pq.ParquetFile(str(path))
+            names = parquet_file.schema_arrow.names
+            selected = None if columns is None else [col for col in names if col in columns]
+            for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=selected):
+                yield batch.to_pandas()
+        else:
+            with pa.memory_map(str(path)) as source:
+                table = pa.ipc.open_file(source).read_all()
+                if columns is not None:
+                    table = table.select([col for col in table.column_names if col in columns])
+                for batch in table.to_batches(max_chunksize=chunk_rows):
+                    yield batch.to_pandas()
+        return
+
+    usecols = None if columns is None else (lambda col: col in columns)
+    yield from pd.read_csv(path, usecols=usecols, chunksize=chunk_rows)
+
+
+def _json_safe_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Convert rows to dictionaries with missing values as None"""
+    return df.astype(object).where(df.notna(), None).to_dict(orient='records')
+
+
+class _FeatureAccumulator:
+    """
+    Single-pass statistics of one numeric column
+
+    Count, min, max, mean and standard deviation are exact (chunk moments
+    are merged with Chan's parallel algorithm). Quantiles and histograms
+    come from a fixed-size uniform reservoir sample, so they are exact
+    when the column has at most STATS_RESERVOIR_SIZE values.
+    """
+
+    def __init__(self, rng: np.random.Generator):
+        self.rng = rng
+        self.count = 0
+        self.missing = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.reservoir = np.empty(STATS_RESERVOIR_SIZE, dtype=np.float64)
+
+    def update(self, values: pd.Series):
+        data = values.to_numpy(dtype=np.float64, na_value=np.nan)
+        present = data[np.isfinite(data)]
+        self.missing += len(data) - len(present)
+
+        n = len(present)
+        if n == 0:
+            return
+
+        # Merge chunk moments
+        chunk_mean = present.mean()
+        chunk_m2 = ((present - chunk_mean) ** 2).sum()
+        total = self.count + n
+        delta = chunk_mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += chunk_m2 + delta ** 2 * self.count * n / total
+        self.min = min(self.min, present.min())
+        self.max = max(self.max, present.max())
+
+        # Reservoir sampling (Algorithm R, vectorized over the chunk)
+        free = max(0, STATS_RESERVOIR_SIZE - self.count)
+        head = present[:free]
+        self.reservoir[self.count:self.count + len(head)] = head
+        rest = present[free:]
+        if len(rest):
+            seen = np.arange(self.count + len(head), total) + 1
+            slots = (self.rng.random(len(rest)) * seen).astype(np.int64)
+            keep = slots < STATS_RESERVOIR_SIZE
+            self.reservoir[slots[keep]] = rest[keep]
+
+        self.count = total
+
+    def result(self) -> Dict[str, Any]:
+        stats = {"count": int(self.count), "missing": int(self.missing)}
+        if self.count == 0:
+            return stats
+
+        sample = self.reservoir[:min(self.count, STATS_RESERVOIR_SIZE)]
+        quantiles = np.quantile(sample, STATS_QUANTILES)
+        counts, edges = np.histogram(sample, bins=STATS_HISTOGRAM_BINS,
+                                     range=(self.min, self.max))
+        if len(sample) < self.count:
+            # Scale sampled counts up to the full column
+            counts = np.round(counts * (self.count / len(sample))).astype(np.int64)
+
+        stats.update({
+            "min": float(self.min),
+            "max": float(self.max),
+            "mean": float(self.mean),
+            "std": float(np.sqrt(self.m2 / self.count)),
+            "quantiles": {
+                f"p{int(q * 100)}": float(v) for q, v in zip(STATS_QUANTILES, quantiles)
+            },
+            "histogram": {
+                "bin_edges": edges.tolist(),
+                "counts": counts.tolist()
+            }
+        })
+        return stats
+
+
+class DatasetStatsAccumulator:
+    """
+    Dataset statistics computed incrementally, one chunk of rows at a time
+
+    Produces the /api/dataset-info payload while holding only the
+    current chunk, a few sample rows and fixed-size per-feature state.
+    """
+
+    def __init__(self, seed: int = 42):
+        """
+        Initialize the accumulator
+
+        Args:
+            seed: Seed of the reservoir sampling used for quantiles and histograms
+        """
+        self.rng = np.random.default_rng(seed)
+        self.total_rows = 0
+        self.columns: List[str] = []
+        self.missing_values: Dict[str, int] = {}
+        self.dtypes: Dict[str, np.dtype] = {}
+        self.sample_rows: Optional[pd.DataFrame] = None
+        self.label_col: Optional[str] = None
+        self.class_counts: Dict[str, int] = {}
+        self.features: Dict[str, _FeatureAccumulator] = {}
+
+    def update(self, chunk: pd.DataFrame):
+        """
+        Add a chunk of rows
+
+        Args:
+            chunk: Next rows of the dataset
+        """
+        if self.sample_rows is None:
+            self.columns = chunk.columns.tolist()
+            self.missing_values = {col: 0 for col in self.columns}
+            self.sample_rows = chunk.head(STATS_SAMPLE_ROWS)
+            self.label_col = next((col for col in LABEL_COLUMNS if col in chunk.columns), None)
+        elif len(self.sample_rows) < STATS_SAMPLE_ROWS:
+            needed = STATS_SAMPLE_ROWS - len(self.sample_rows)
+            self.sample_rows = pd.concat([self.sample_rows, chunk.head(needed)])
+
+        self.total_rows += len(chunk)
+
+        for col, n in chunk.isnull().sum().items():
+            self.missing_values[col] += int(n)
+
+        # Track the dtype a full parse would produce
+        for col, dtype in chunk.dtypes.items():
+            previous = self.dtypes.get(col)
+            if previous is None or previous == dtype:
+                self.dtypes[col] = dtype
+            elif pd.api.types.is_numeric_dtype(previous) and pd.api.types.is_numeric_dtype(dtype):
+                self.dtypes[col] = np.result_type(previous, dtype)
+            else:
+                self.dtypes[col] = np.dtype(object)
+
+        if self.label_col is not None:
+            for label, n in chunk[self.label_col].value_counts().items():
+                self.class_counts[str(label)] = self.class_counts.get(str(label), 0) + int(n)
+
+        for col in POTENTIAL_FEATURES:
+            if col in chunk.columns and pd.api.types.is_numeric_dtype(chunk[col]):
+                if col not in self.features:
+                    self.features[col] = _FeatureAccumulator(self.rng)
+                self.features[col].update(chunk[col])
+
+    def result(self) -> Dict[str, Any]:
+        """
+        Get the statistics of all rows added so far
+
+        Returns:
+            Row/column counts, missing values, data types, sample rows,
+            class distribution and per-feature statistics
+        """
+        stats = {
+            "total_rows": self.total_rows,
+            "total_columns": len(self.columns),
+            "columns": self.columns,
+            "missing_values": self.missing_values,
+            "data_types": {col: str(dtype) for col, dtype in self.dtypes.items()},
+            "sample_data": (
+                _json_safe_records(self.sample_rows) if self.sample_rows is not None else []
+            )
+        }
+
+        if self.label_col is not None:
+            stats["class_distribution"] = dict(
+                sorted(self.class_counts.items(), key=lambda item: item[1], reverse=True)
+            )
+
+        stats["feature_stats"] = {
+            col: self.features[col].result()
+            for col in POTENTIAL_FEATURES
+            if col in self.features
+        }
+
+        return stats
+
+
+def compute_dataset_stats(df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Statistics of a dataset as served by /api/dataset-info
+
+    Args:
+        df: Dataset DataFrame
+
+    Returns:
+        Row/column counts, missing values, data types, sample rows,
+        class distribution and per-feature statistics
+    """
+    accumulator = DatasetStatsAccumulator()
+    accumulator.update(df)
+    return accumulator.result()
+
+
+def dataset_stats_table(stats: Dict[str, Any]) -> Tuple[Dict[str, List[Any]], Dict[str, Any]]:
+    """
+    Dataset statistics as a table with one row per dataset column
+
+    Args:
+        stats: Output of DatasetStore.get_stats
+
+    Returns:
+        Tuple of (columns: name, data type, missing values and, for
+        features, count, min, max, mean, std and quantiles; fields that are
+        not per column: row/column counts, class distribution, content hash).
+        Sample rows and histograms are left out.
+    """
+    names = stats.get("columns", [])
+    feature_stats = stats.get("feature_stats", {})
+    quantiles = [f"p{int(q * 100)}" for q in STATS_QUANTILES]
+
+    columns: Dict[str, List[Any]] = {
+        "column": list(names),
+        "data_type": [stats.get("data_types", {}).get(name) for name in names],
+        "missing": [stats.get("missing_values", {}).get(name) for name in names]
+    }
+    for field in ["count", "min", "max", "mean", "std"]:
+        columns[field] = [feature_stats.get(name, {}).get(field) for name in names]
+    for q in quantiles:
+        columns[q] = [feature_stats.get(name, {}).get("quantiles", {}).get(q) for name in names]
+
+    metadata = {
+        "total_rows": stats.get("total_rows"),
+        "total_columns": stats.get("total_columns"),
+        "class_distribution": stats.get("class_distribution"),
+        "content_hash": stats.get("content_hash")
+    }
+    return columns, metadata
+
+
+class _FeatherChunkWriter:
+    """
+    Writes DataFrame chunks to an uncompressed Feather (Arrow IPC) file
+
+    The schema is taken from the first chunk and later chunks are cast
+    to it. If a chunk cannot be cast (e.g. a column that was empty in the
+    first chunk holds text later), writing is abandoned and `ok` is False.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.ok = feather is not None
+        self._writer = None
+        self._schema = None
+
+    def write(self, chunk: pd.DataFrame):
+        if not self.ok:
+            return
+        try:
+            table = pa.Table.from_pandas(chunk, preserve_index=False).replace_schema_metadata(None)
+            if self._writer is None:
+                self._schema = table.schema
+                self._writer = pa.ipc.new_file(
+                    str(self.path), self._schema,
+                    options=pa.ipc.IpcWriteOptions(compression=None)
+                )
+            else:
+                table = table.cast(self._schema)
+            self._writer.write_table(table)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError):
+            self.abort()
+
+    def close(self) -> bool:
+        """Finish the file; returns whether it is complete"""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if not self.ok or self._schema is None:
+            self.abort()
+        return self.ok
+
+    def abort(self):
+        """Stop writing and delete the partial file"""
+        self.ok = False
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self.path.exists():
+            self.path.unlink()
+
+
+class DatasetStore:
+    """
+    Training dataset stored as CSV plus an uncompressed Feather cache
+
+    The Feather (Arrow IPC) file keeps the parsed column types and is
+    memory-mapped on load, so readers only touch the columns they ask
+    for. A sidecar JSON file records the CSV fingerprint and content
+    hash the cache was built from; the cache is rebuilt only when the
+    CSV changes. Dataset statistics are computed once per content hash
+    and stored next to the dataset.
+    """
+
+    def __init__(self, csv_path: str = "./data/nasa_exoplanets.csv"):
+        """
+        Initialize the dataset store
+
+        Args:
+            csv_path: Path to the source CSV dataset
+        """
+        self.csv_path = Path(csv_path)
+        self.cache_path = self.csv_path.with_suffix(".feather")
+        self.cache_info_path = self.csv_path.with_suffix(".cache.json")
+        self.stats_path = self.csv_path.with_suffix(".stats.json")
+
+        # Statistics already served, keyed by content hash
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._stats_lock = threading.Lock()
+
+    def exists(self) -> bool:
+        """Whether the source dataset exists"""
+        return self.csv_path.exists()
+
+    def source_fingerprint(self) -> Dict[str, int]:
+        """Size and modification time of the source CSV"""
+        stat = self.csv_path.stat()
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def hash_source(self) -> str:
+        """SHA-256 of the source CSV, read in blocks"""
+        digest = hashlib.sha256()
+        with open(self.csv_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _write_json(self, path: Path, data: Dict[str, Any]):
+        """Write a JSON file atomically"""
+        tmp_path = path.with_name(path.name + f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def _cache_info(self) -> Optional[Dict[str, Any]]:
+        """Read the cache sidecar, or None if there is no cache"""
+        if not self.cache_info_path.exists() or not self.cache_path.exists():
+            return None
+        with open(self.cache_info_path, 'r') as f:
+            return json.load(f)
+
+    def is_cache_fresh(self) -> bool:
+        """Whether the columnar cache was built from the current CSV"""
+        if feather is None:
+            return False
+        info = self._cache_info()
+        return info is not None and info["source"] == self.source_fingerprint()
+
+    def build_cache(self, df: Optional[pd.DataFrame] = None, content_hash: Optional[str] = None):
+        """
+        Write the columnar cache for the current CSV
+
+        Args:
+            df: Already-parsed contents of the CSV, to avoid parsing it again
+            content_hash: Already-computed SHA-256 of the CSV
+        """
+        if feather is None:
+            return
+
+        source = self.source_fingerprint()
+        if content_hash is None:
+            content_hash = self.hash_source()
+        if df is None:
+            df = pd.read_csv(self.csv_path)
+
+        # Write to a temporary file and rename, so readers never see a partial cache
+        tmp_cache = self.cache_path.with_name(
+            self.cache_path.name + f".{os.getpid()}.{threading.get_ident()}.tmp"
+        )
+        feather.write_feather(df, str(tmp_cache), compression="uncompressed")
+        os.replace(tmp_cache, self.cache_path)
+
+        self._write_json(self.cache_info_path, {
+            "source": source,
+            "content_hash": content_hash,
+            "rows": len(df),
+            "columns": df.columns.tolist()
+        })
+
+    def content_hash(self, build_cache: bool = True) -> str:
+        """
+        SHA-256 of the current dataset, from the cache sidecar when fresh
+
+        Args:
+            build_cache: Rebuild a stale cache (which parses the whole CSV in
+                memory) instead of only hashing the file
+        """
+        if self.is_cache_fresh():
+            return self._cache_info()["content_hash"]
+        if feather is not None and build_cache:
+            self.build_cache()
+            return self._cache_info()["content_hash"]
+        return self.hash_source()
+
+    def columns(self) -> List[str]:
+        """Column names of the dataset"""
+        if self.is_cache_fresh():
+            return self._cache_info()["columns"]
+        return pd.read_csv(self.csv_path, nrows=0).columns.tolist()
+
+    def load(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Load the dataset, rebuilding the cache first if the CSV changed
+
+        Args:
+            columns: Columns to read; names not in the dataset are ignored.
+                     All columns are read when omitted.
+
+        Returns:
+            Dataset DataFrame
+        """
+        if feather is None:
+            usecols = None if columns is None else (lambda col: col in columns)
+            return pd.read_csv(self.csv_path, usecols=usecols)
+
+        if not self.is_cache_fresh():
+            self.build_cache()
+
+        if columns is not None:
+            available = set(self._cache_info()["columns"])
+            columns = [col for col in columns if col in available]
+
+        return feather.read_feather(str(self.cache_path), columns=columns, memory_map=True)
+
+    def iter_chunks(self, columns: Optional[List[str]] = None,
+                    chunk_rows: int = INGEST_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+        """
+        Read the dataset in chunks of rows, without loading it whole
+
+        Chunks come from the memory-mapped cache when it is fresh; otherwise
+        the CSV is parsed chunk by chunk (a stale cache is not rebuilt, as
+        that would parse the whole CSV in memory).
+
+        Args:
+            columns: Columns to read; names not in the dataset are ignored.
+                     All columns are read when omitted.
+            chunk_rows: Rows per chunk
+
+        Yields:
+            DataFrames of at most chunk_rows rows
+        """
+        path = self.cache_path if self.is_cache_fresh() else self.csv_path
+        yield from iter_file_chunks(str(path), columns, chunk_rows)
+
+    def ingest(self, source_path: str, content_hash: str,
+               chunk_rows: int = INGEST_CHUNK_ROWS) -> Dict[str, Any]:
+        """
+        Make an uploaded CSV the current dataset
+
+        The file is parsed once, in chunks: each chunk updates the
+        statistics and is appended to the columnar cache. The CSV is then
+        moved into place atomically, so memory use does not grow with
+        the file size and readers never see a partially written dataset.
+
+        Args:
+            source_path: Uploaded CSV, on the same filesystem as the dataset
+            content_hash: SHA-256 of the uploaded file
+            chunk_rows: Rows parsed per chunk
+
+        Returns:
+            Dataset statistics
+        """
+        tmp_cache = self.cache_path.with_name(
+            self.cache_path.name + f".{os.getpid()}.{threading.get_ident()}.tmp"
+        )
+        accumulator = DatasetStatsAccumulator()
+        writer = _FeatherChunkWriter(tmp_cache)
+
+        try:
+            for chunk in pd.read_csv(source_path, chunksize=chunk_rows):
+                accumulator.update(chunk)
+                writer.write(chunk)
+            cache_ok = writer.close()
+        except Exception:
+            writer.abort()
+            raise
+
+        stats = accumulator.result()
+
+        # Publish the dataset, then its cache; a cache that could not be
+        # written incrementally is rebuilt on first load instead
+        os.replace(source_path, self.csv_path)
+        if cache_ok:
+            os.replace(tmp_cache, self.cache_path)
+            self._write_json(self.cache_info_path, {
+                "source": self.source_fingerprint(),
+                "content_hash": content_hash,
+                "rows": accumulator.total_rows,
+                "columns": accumulator.columns
+            })
+        elif self.cache_info_path.exists():
+            self.cache_info_path.unlink()
+
+        self.store_stats(stats, content_hash)
+        return stats
+
+    def append(self, rows: pd.DataFrame, block_size: int = 1024 * 1024) -> Dict[str, Any]:
+        """
+        Append rows to the current dataset
+
+        The rows are written after a copy of the current CSV, in its column
+        order (missing columns are left empty, extra columns are dropped),
+        and the result is ingested like an upload, so the cache and the
+        statistics are updated together with the CSV.
+
+        Args:
+            rows: Rows to append
+            block_size: Copy block size in bytes
+
+        Returns:
+            Statistics of the updated dataset
+        """
+        tmp_path = self.csv_path.with_name(
+            self.csv_path.name + f".{os.getpid()}.{threading.get_ident()}.append.tmp"
+        )
+        digest = hashlib.sha256()
+        last_byte = b"\n"
+
+        try:
+            with open(self.csv_path, 'rb') as src, open(tmp_path, 'wb') as out:
+                for block in iter(lambda: src.read(block_size), b""):
+                    digest.update(block)
+                    out.write(block)
+                    last_byte = block[-1:]
+
+                data = rows.reindex(columns=self.columns()).to_csv(header=False, index=False).encode()
+                if last_byte != b"\n":
+                    data = b"\n" + data
+                digest.update(data)
+                out.write(data)
+
+            return self.ingest(str(tmp_path), digest.hexdigest())
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+    def store_stats(self, stats: Dict[str, Any], content_hash: str):
+        """
+        Store precomputed statistics for a dataset version
+
+        Args:
+            stats: Output of compute_dataset_stats
+            content_hash: SHA-256 of the dataset the statistics describe
+        """
+        self._write_json(self.stats_path, {"content_hash": content_hash, "stats": stats})
+        with self._stats_lock:
+            self._stats = {content_hash: stats}
+
+    def get_stats(self, recompute: bool = False) -> Dict[str, Any]:
+        """
+        Get the statistics of the current dataset
+
+        Served from memory or the stats file when they match the current
+        content hash; computed and stored otherwise.
+
+        Args:
+            recompute: Ignore stored statistics and compute them again
+
+        Returns:
+            Dataset statistics including the content hash
+        """
+        content_hash = self.content_hash()
+
+        if not recompute:
+            with self._stats_lock:
+                stats = self._stats.get(content_hash)
+            if stats is None and self.stats_path.exists():
+                with open(self.stats_path, 'r') as f:
+                    stored = json.load(f)
+                if stored.get("content_hash") == content_hash:
+                    stats = stored["stats"]
+                    with self._stats_lock:
+                        self._stats = {content_hash: stats}
+            if stats is not None:
+                return {**stats, "content_hash": content_hash}
+
+        stats = compute_dataset_stats(self.load())
+        self.store_stats(stats, content_hash)
+        return {**stats, "content_hash": content_hash}
@@ -5,19 +5,169 @@ Handles data preprocessing, feature engineering, and ML model training
 
 import pandas as pd
 import numpy as np
+from sklearn.base import clone
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
 from sklearn.svm import SVC
+from sklearn.linear_model import SGDClassifier
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, confusion_matrix, classification_report
 import xgboost as xgb
+import copy
 import joblib
 import json
-from typing import Dict, Tuple, List, Any
+import os
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, Tuple, List, Any, Callable, Iterable, Iterator, Optional
 from pathlib import Path
 import warnings
 warnings.filterwarnings('ignore')
 
+from models.tree_engine import CompiledTreeEnsemble
+from utils.helpers import calculate_feature_importance
+from utils.metrics import registry as metrics_registry
+from utils import profiling
+
+
+# Inference timings exported at /metrics
+STAGE_SECONDS = metrics_registry.histogram(
+    "exoplanet_model_stage_seconds",
+    "Time spent in each stage of model inference (single: predict, batch: predict_batch)",
+    ["mode", "stage"]
+)
+ROWS_SCORED = metrics_registry.counter("exoplanet_rows_scored_total", "Rows scored by the model", ["mode"])
+_STAGES = {
+    mode: {stage: STAGE_SECONDS.labels(mode, stage) for stage in stages}
+    for mode, stages in (("single", ("features", "scale", "predict_proba", "response")),
+                         ("batch", ("features", "scale", "predict_proba", "response", "serialize")))
+}
+_ROWS_SCORED = {mode: ROWS_SCORED.labels(mode) for mode in ("single", "batch")}
+
+
+def _record_inference(mode: str, n_rows: int, started: float, assembled: float,
+                      scaled: Optional[float], scored: float, finished: float):
+    """Record stage timings of one inference call (scaled is None when scaling is folded into the model)"""
+    stages = _STAGES[mode]
+    stages["features"].observe(assembled - started)
+    if scaled is not None:
+        stages["scale"].observe(scaled - assembled)
+    stages["predict_proba"].observe(scored - (assembled if scaled is None else scaled))
+    stages["response"].observe(finished - scored)
+    _ROWS_SCORED[mode].inc(n_rows)
+    
+    profile = profiling.active()
+    if profile is not None:
+        profile.add("features", assembled - started)
+        if scaled is not None:
+            profile.add("scale", scaled - assembled)
+        profile.add("predict_proba", scored - (assembled if scaled is None else scaled))
+        profile.add("response", finished - scored)
+
+
+# Disposition/status columns used as labels, in order of preference
+LABEL_COLUMNS = ['koi_disposition', 'disposition', 'exoplanet_status']
+
+# Candidate feature columns, used when present in the dataset
+POTENTIAL_FEATURES = [
+    'koi_period',           # Orbital period (days)
+    'koi_duration',         # Transit duration (hours)
+    'koi_depth',           # Transit depth (ppm)
+    'koi_prad',            # Planetary radius (Earth radii)
+    'koi_teq',             # Equilibrium temperature (K)
+    'koi_insol',           # Insolation flux (Earth flux)
+    'koi_steff',           # Stellar effective temperature (K)
+    'koi_slogg',           # Stellar surface gravity (log10(cm/s²))
+    'koi_srad',            # Stellar radius (Solar radii)
+    'koi_smass',           # Stellar mass (Solar masses)
+    'koi_impact',          # Impact parameter
+    'koi_model_snr',       # Transit signal-to-noise ratio
+]
+
+# Columns preprocess_data reads; loaders can project datasets onto these
+TRAINING_COLUMNS = LABEL_COLUMNS + POTENTIAL_FEATURES
+
+# Feature matrix dtype produced by preprocess_data
+FEATURE_DTYPE = np.float32
+
+# Model types that can be trained incrementally (more trees / boosting rounds)
+INCREMENTAL_MODEL_TYPES = ["random_forest", "gradient_boost", "xgboost"]
+
+# Tree ensembles, which take n_estimators and max_depth
+TREE_MODEL_TYPES = ["random_forest", "gradient_boost", "xgboost"]
+
+# Model types that can be trained on a dataset streamed in chunks: XGBoost
+# from an external-memory DMatrix, SGD (linear model) with partial_fit
+OUT_OF_CORE_MODEL_TYPES = ["xgboost", "sgd"]
+
+# Model types a teacher can be distilled into: shallow boosted trees, or a linear model
+DISTILLATION_STUDENT_TYPES = ["xgboost", "sgd"]
+DISTILLATION_STUDENT_PARAMS = {
+    "xgboost": {"n_estimators": 50, "max_depth": 3},
+    "sgd": {}
+}
+
+# Out-of-core training: passes of partial_fit over the data (SGD), and the
+# size of the uniform sample of held-out rows the model is evaluated on
+OUT_OF_CORE_EPOCHS = 3
+OUT_OF_CORE_MAX_EVAL_ROWS = 200_000
+
+# The fitted scaler is reused for incremental training while the new training
+# data stays this close to it: mean shift in units of the fitted scale, and
+# ratio of standard deviations
+SCALER_MAX_MEAN_SHIFT = 0.25
+SCALER_MAX_STD_RATIO = 1.5
+
+# Serving backends: the model's own predict_proba, or the compiled tree engine
+INFERENCE_BACKENDS = ["native", "compiled"]
+
+# Batches above this size are scored natively even with the compiled backend:
+# the compiled engine wins on single rows and small batches, while the native
+# per-tree C/Cython loops are faster on large ones
+COMPILED_MAX_BATCH_ROWS = 32
+
+
+class _ChunkIterator(xgb.DataIter):
+    """Feeds (features, labels) chunks to XGBoost, which pages them to an on-disk cache"""
+    
+    def __init__(self, chunks: Callable[[], Iterator[Tuple[np.ndarray, np.ndarray]]], cache_prefix: str):
+        self._chunks = chunks
+        self._iterator = None
+        super().__init__(cache_prefix=cache_prefix)
+    
+    def next(self, input_data: Callable) -> int:
+        if self._iterator is None:
+            self._iterator = self._chunks()
+        try:
+            X, y = next(self._iterator)
+        except StopIteration:
+            return 0
+        input_data(data=X, label=y)
+        return 1
+    
+    def reset(self):
+        self._iterator = None
+
+
+def _smallest_draws(X_parts: List[np.ndarray], y_parts: List[np.ndarray], u_parts: List[np.ndarray],
+                    k: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, Optional[float]]:
+    """
+    Keep the k rows with the smallest random draws (a uniform sample of the rows)
+    
+    Returns:
+        Tuple of (features, labels, draws, threshold); rows with a draw below
+        the threshold are the ones kept, and it is None if nothing was dropped
+    """
+    X, y, u = np.concatenate(X_parts), np.concatenate(y_parts), np.concatenate(u_parts)
+    if len(u) <= k:
+        return X, y, u, None
+    order = np.argpartition(u, k)
+    keep = order[:k]
+    return X[keep], y[keep], u[keep], float(u[order[k]])
+
 
 class ExoplanetModel:
     """
@@ -30,21 +180,45 @@ class ExoplanetModel:
         Initialize the exoplanet detection model
         
         Args:
-            model_type: Type of ML model (random_forest, xgboost, svm, gradient_boost)
+            model_type: Type of ML model (random_forest, xgboost, svm, gradient_boost, sgd)
         """
         self.model_type = model_type
         self.model = None
+        self.version = None
         self.scaler = StandardScaler()
         self.feature_names = []
+        # Metrics of the last fit, saved and loaded with the model
+        self.metrics = None
         self.label_mapping = {
             0: "False Positive",
             1: "Candidate", 
             2: "Confirmed"
         }
         
+        # Per-thread input rows for single predictions
+        self._row_buffers = threading.local()
+        
+        # Compiled tree ensemble, when serving through the compiled backend
+        self.inference_backend = "native"
+        self.compiled = None
+        self.compiled_max_batch_rows = COMPILED_MAX_BATCH_ROWS
+        
+        # Record inference timings at /metrics (off while warming up)
+        self.record_metrics = True
+        
         # Initialize model based on type
         self._initialize_model()
     
+    def __getstate__(self):
+        # Thread-local buffers cannot be pickled; they are recreated on demand
+        state = self.__dict__.copy()
+        del state['_row_buffers']
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._row_buffers = threading.local()
+    
     def _initialize_model(self):
         """Initialize the ML model based on type"""
         models = {
@@ -75,6 +249,11 @@ class ExoplanetModel:
                 learning_rate=0.1,
                 max_depth=5,
                 random_state=42
+            ),
+            "sgd": SGDClassifier(
+                loss="log_loss",
+                alpha=0.0001,
+                random_state=42
             )
         }
         
@@ -84,15 +263,50 @@ class ExoplanetModel:
         """
         Preprocess the NASA exoplanet dataset
         
+        Only the label column and the feature columns of df are read. The
+        features are copied once, straight into a single float32 matrix
+        (the tree models train on float32 anyway), and missing values are
+        replaced by column medians in place, so peak memory stays close to
+        the size of that matrix however wide the input table is.
+        
         Args:
             df: Raw dataset DataFrame
             
         Returns:
             Tuple of (features, labels)
         """
-        # Create a copy to avoid modifying original
-        data = df.copy()
+        started = time.perf_counter()
+        
+        X, labels, available_features = self._feature_matrix(df)
         
+        # Fill missing values with column medians, in place
+        for j in range(X.shape[1]):
+            column = X[:, j]
+            missing = np.isnan(column)
+            if missing.any():
+                column[missing] = np.nanmedian(column)
+        
+        X = pd.DataFrame(X, columns=available_features, copy=False)
+        y = pd.Series(labels, name='label')
+        
+        # Store feature names
+        self.feature_names = available_features
+        profiling.record("preprocess", time.perf_counter() - started)
+        
+        return X, y
+    
+    @staticmethod
+    def _feature_matrix(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+        """
+        Extract the feature matrix and labels of the rows with a known disposition
+        
+        Args:
+            df: Raw dataset DataFrame (or a chunk of one)
+            
+        Returns:
+            Tuple of (float32 feature matrix with missing values as NaN,
+            int64 labels, feature names)
+        """
         # Map dispositions to numeric labels
         disposition_map = {
             'FALSE POSITIVE': 0,
@@ -101,54 +315,33 @@ class ExoplanetModel:
         }
         
         # Handle different column names from different datasets
-        label_col = None
-        for col in ['koi_disposition', 'disposition', 'exoplanet_status']:
-            if col in data.columns:
-                label_col = col
-                break
+        label_col = next((col for col in LABEL_COLUMNS if col in df.columns), None)
         
         if label_col is None:
             raise ValueError("No disposition/status column found in dataset")
         
-        # Create labels
-        data['label'] = data[label_col].str.upper().map(disposition_map)
-        
-        # Remove rows with missing labels
-        data = data[data['label'].notna()].copy()
-        
-        # Select relevant features based on available columns
-        potential_features = [
-            'koi_period',           # Orbital period (days)
-            'koi_duration',         # Transit duration (hours)
-            'koi_depth',           # Transit depth (ppm)
-            'koi_prad',            # Planetary radius (Earth radii)
-            'koi_teq',             # Equilibrium temperature (K)
-            'koi_insol',           # Insolation flux (Earth flux)
-            'koi_steff',           # Stellar effective temperature (K)
-            'koi_slogg',           # Stellar surface gravity (log10(cm/s²))
-            'koi_srad',            # Stellar radius (Solar radii)
-            'koi_smass',           # Stellar mass (Solar masses)
-            'koi_impact',          # Impact parameter
-            'koi_model_snr',       # Transit signal-to-noise ratio
-        ]
+        # Create labels, keeping only rows with a known disposition
+        labels = df[label_col].str.upper().map(disposition_map).to_numpy(dtype=np.float64, na_value=np.nan)
+        keep = ~np.isnan(labels)
+        if keep.all():
+            keep = None
+        else:
+            labels = labels[keep]
         
         # Use only features that exist in the dataset
-        available_features = [f for f in potential_features if f in data.columns]
+        available_features = [f for f in POTENTIAL_FEATURES if f in df.columns]
         
         if len(available_features) == 0:
             raise ValueError("No valid features found in dataset")
         
-        # Extract features
-        X = data[available_features].copy()
-        y = data['label'].copy()
+        # Extract features column by column into one matrix (Fortran-ordered,
+        # so each column is contiguous)
+        X = np.empty((len(labels), len(available_features)), dtype=FEATURE_DTYPE, order="F")
+        for j, name in enumerate(available_features):
+            values = df[name].to_numpy(dtype=FEATURE_DTYPE, na_value=np.nan)
+            X[:, j] = values if keep is None else values[keep]
         
-        # Handle missing values
-        X = X.fillna(X.median())
-        
-        # Store feature names
-        self.feature_names = available_features
-        
-        return X, y
+        return X, labels.astype(np.int64), available_features
     
     def train(self, X: pd.DataFrame, y: pd.Series, test_size: float = 0.2) -> Dict[str, Any]:
         """
@@ -163,24 +356,373 @@ class ExoplanetModel:
             Dictionary containing training metrics
         """
         # Split data
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=test_size, random_state=42, stratify=y
-        )
+        with profiling.stage("split"):
+            X_train, X_test, y_train, y_test = train_test_split(
+                X, y, test_size=test_size, random_state=42, stratify=y
+            )
         
         # Scale features
-        X_train_scaled = self.scaler.fit_transform(X_train)
-        X_test_scaled = self.scaler.transform(X_test)
+        with profiling.stage("scale"):
+            X_train_scaled = self.scaler.fit_transform(X_train)
+            X_test_scaled = self.scaler.transform(X_test)
         
         # Train model
         print(f"Training {self.model_type} model...")
+        start = time.perf_counter()
         self.model.fit(X_train_scaled, y_train)
+        fit_time = time.perf_counter() - start
+        profiling.record("fit", fit_time)
+        self._new_fit()
+        
+        with profiling.stage("evaluate"):
+            metrics = self._evaluate(X_test_scaled, y_test, len(X), test_size)
+        metrics.update({"training_mode": "full", "fit_time_s": fit_time})
+        self.metrics = metrics
         
+        print(f"✅ Training complete! Accuracy: {metrics['accuracy']:.4f}")
+        
+        return metrics
+    
+    def train_incremental(self, X: pd.DataFrame, y: pd.Series, additional_estimators: int = 50,
+                          test_size: float = 0.2) -> Dict[str, Any]:
+        """
+        Continue training the fitted model on an updated dataset
+        
+        Adds `additional_estimators` trees to a random forest or gradient
+        boosting model (warm_start) or boosting rounds to an XGBoost model,
+        fitted on the training split of the updated data, instead of
+        rebuilding the whole ensemble. The fitted scaler is kept, since the
+        existing trees' thresholds depend on it.
+        
+        Args:
+            X: Feature matrix of the updated dataset (existing and new rows)
+            y: Labels
+            additional_estimators: Trees / boosting rounds to add
+            test_size: Proportion of data to use for testing
+            
+        Returns:
+            Dictionary containing training metrics
+            
+        Raises:
+            ValueError: If the model type cannot be trained incrementally or
+                the fitted scaler does not fit the new data (train from scratch instead)
+        """
+        if self.model_type not in INCREMENTAL_MODEL_TYPES:
+            raise ValueError(f"Incremental training is not supported for {self.model_type}")
+        if additional_estimators < 1:
+            raise ValueError("additional_estimators must be at least 1")
+        
+        with profiling.stage("split"):
+            X_train, X_test, y_train, y_test = train_test_split(
+                X, y, test_size=test_size, random_state=42, stratify=y
+            )
+        
+        reason = self._scaler_mismatch(X_train)
+        if reason is not None:
+            raise ValueError(f"Fitted scaler cannot be reused: {reason}")
+        
+        with profiling.stage("scale"):
+            X_train_scaled = self.scaler.transform(X_train)
+            X_test_scaled = self.scaler.transform(X_test)
+        
+        print(f"Adding {additional_estimators} estimators to {self.model_type} model...")
+        start = time.perf_counter()
+        if self.model_type == "xgboost":
+            total = self.model.get_booster().num_boosted_rounds() + additional_estimators
+            model = xgb.XGBClassifier(**{**self.model.get_params(), "n_estimators": additional_estimators})
+            model.fit(X_train_scaled, y_train, xgb_model=self.model.get_booster())
+            model.set_params(n_estimators=total)
+            self.model = model
+        else:
+            total = self.model.n_estimators + additional_estimators
+            self.model.set_params(warm_start=True, n_estimators=total)
+            self.model.fit(X_train_scaled, y_train)
+            self.model.set_params(warm_start=False)
+        fit_time = time.perf_counter() - start
+        profiling.record("fit", fit_time)
+        self._new_fit()
+        
+        with profiling.stage("evaluate"):
+            metrics = self._evaluate(X_test_scaled, y_test, len(X), test_size)
+        metrics.update({
+            "training_mode": "incremental",
+            "fit_time_s": fit_time,
+            "additional_estimators": additional_estimators,
+            "n_estimators": total
+        })
+        self.metrics = metrics
+        
+        print(f"✅ Incremental training complete! Accuracy: {metrics['accuracy']:.4f}")
+        
+        return metrics
+    
+    def train_out_of_core(self, chunks: Callable[[], Iterable[pd.DataFrame]], test_size: float = 0.2,
+                          epochs: int = OUT_OF_CORE_EPOCHS, max_eval_rows: int = OUT_OF_CORE_MAX_EVAL_ROWS,
+                          cache_dir: Optional[str] = None, seed: int = 42) -> Dict[str, Any]:
+        """
+        Train on a dataset streamed in chunks, for datasets larger than memory
+        
+        Every row is assigned to the training or the test split by a seeded
+        random draw, the same on every pass. A first pass fits the scaler
+        with partial_fit on the training rows and keeps a uniform sample of
+        at most max_eval_rows test rows for evaluation. XGBoost then trains
+        on an external-memory DMatrix built from the scaled training chunks
+        (paged to disk in cache_dir); SGD runs `epochs` passes of
+        partial_fit. Missing values are imputed with the column mean (0 after
+        scaling), since the median would need the whole column.
+        
+        Args:
+            chunks: Function returning a new iterator over the dataset in chunks;
+                called once per pass, and must yield the same rows each time
+            test_size: Proportion of rows held out for testing
+            epochs: Passes of partial_fit over the training rows (SGD)
+            max_eval_rows: Largest number of held-out rows the model is evaluated on
+            cache_dir: Directory for XGBoost's external-memory pages (default: system temp)
+            seed: Seed of the train/test assignment
+            
+        Returns:
+            Dictionary containing training metrics
+            
+        Raises:
+            ValueError: If the model type cannot be trained out of core, or the
+                dataset has no labelled rows in one of the splits
+        """
+        if self.model_type not in OUT_OF_CORE_MODEL_TYPES:
+            raise ValueError(f"Out-of-core training is not supported for {self.model_type}. "
+                             f"Use one of: {', '.join(OUT_OF_CORE_MODEL_TYPES)}")
+        
+        # Pass 1: fit the scaler on the training rows and sample the test rows
+        scaler = StandardScaler()
+        feature_names = None
+        n_samples = 0
+        n_chunks = 0
+        eval_X, eval_y, eval_u = [], [], []
+        threshold = test_size
+        
+        with profiling.stage("scale"):
+            for X, y, u, names in self._split_chunks(chunks, seed):
+                if feature_names is None:
+                    feature_names = names
+                elif names != feature_names:
+                    raise ValueError(f"Chunk {n_chunks} has different feature columns")
+                n_samples += len(y)
+                n_chunks += 1
+                
+                train = u >= test_size
+                if train.any():
+                    scaler.partial_fit(X[train])
+                
+                held_out = u < threshold
+                eval_X.append(X[held_out])
+                eval_y.append(y[held_out])
+                eval_u.append(u[held_out])
+                if sum(len(part) for part in eval_u) > 2 * max_eval_rows:
+                    X_kept, y_kept, u_kept, cut = _smallest_draws(eval_X, eval_y, eval_u, max_eval_rows)
+                    eval_X, eval_y, eval_u = [X_kept], [y_kept], [u_kept]
+                    threshold = cut if cut is not None else threshold
+        
+        if n_chunks == 0 or not hasattr(scaler, "mean_"):
+            raise ValueError("No labelled training rows in dataset")
+        X_test, y_test, _, _ = _smallest_draws(eval_X, eval_y, eval_u, max_eval_rows)
+        del eval_X, eval_y, eval_u
+        if len(y_test) == 0:
+            raise ValueError("No labelled test rows in dataset; use a larger dataset or test_size")
+        
+        def training_chunks() -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+            for X, y, u, _ in self._split_chunks(chunks, seed):
+                train = u >= test_size
+                if train.any():
+                    yield np.nan_to_num(scaler.transform(X[train]), copy=False, nan=0.0), y[train]
+        
+        # Train model
+        print(f"Training {self.model_type} model out of core ({n_samples} rows in {n_chunks} chunks)...")
+        start = time.perf_counter()
+        if self.model_type == "xgboost":
+            self.model = self._fit_xgboost_external_memory(training_chunks, cache_dir)
+        else:
+            self.model = clone(self.model)
+            classes = np.array(sorted(self.label_mapping))
+            for _ in range(max(1, epochs)):
+                for X, y in training_chunks():
+                    self.model.partial_fit(X, y, classes=classes)
+        fit_time = time.perf_counter() - start
+        profiling.record("fit", fit_time)
+        
+        self.scaler = scaler
+        self.feature_names = feature_names
+        self._new_fit()
+        
+        X_test_scaled = np.nan_to_num(scaler.transform(X_test), copy=False, nan=0.0)
+        with profiling.stage("evaluate"):
+            metrics = self._evaluate(X_test_scaled, pd.Series(y_test), n_samples, test_size)
+        metrics.update({
+            "training_mode": "out_of_core",
+            "fit_time_s": fit_time,
+            "n_chunks": n_chunks,
+            "n_eval_samples": len(y_test)
+        })
+        if self.model_type == "sgd":
+            metrics["epochs"] = max(1, epochs)
+        self.metrics = metrics
+        
+        print(f"✅ Out-of-core training complete! Accuracy: {metrics['accuracy']:.4f}")
+        
+        return metrics
+    
+    def train_distilled(self, teacher: "ExoplanetModel", X: pd.DataFrame, y: pd.Series,
+                        synthetic_rows: int = 20_000, test_size: float = 0.2, seed: int = 42) -> Dict[str, Any]:
+        """
+        Train this model as a student of a trained teacher model
+        
+        The student is fitted to the teacher's predicted probabilities
+        (soft labels) over the training split plus `synthetic_rows` random
+        rows around the training distribution. Cross-entropy against soft
+        labels equals a weighted fit on hard labels with every row repeated
+        once per class, weighted by the teacher's probability of that class,
+        so any estimator that takes sample weights can be distilled into.
+        The student keeps the teacher's scaler and features, and both are
+        scored on the same test split.
+        
+        Args:
+            teacher: Trained model to imitate
+            X: Feature matrix (with at least the teacher's features)
+            y: Labels, used only for the train/test split and evaluation
+            synthetic_rows: Random rows added to the transfer set
+            test_size: Proportion of data to use for testing
+            seed: Seed of the synthetic rows
+            
+        Returns:
+            Dictionary containing the student's metrics, the teacher's
+            accuracy on the same test split, and their agreement
+        """
+        if teacher.model is None:
+            raise ValueError("Teacher model not trained. Please train the model first.")
+        missing = [name for name in teacher.feature_names if name not in X.columns]
+        if missing:
+            raise ValueError(f"Dataset is missing the teacher's features: {', '.join(missing)}")
+        
+        # Same split as the teacher's training, when the dataset is unchanged
+        with profiling.stage("split"):
+            X_train, X_test, y_train, y_test = train_test_split(
+                X, y, test_size=test_size, random_state=42, stratify=y
+            )
+        
+        # The student sees exactly the teacher's (scaled) inputs
+        self.scaler = copy.deepcopy(teacher.scaler)
+        self.feature_names = list(teacher.feature_names)
+        self.label_mapping = dict(teacher.label_mapping)
+        
+        with profiling.stage("soft_labels"):
+            transfer = X_train[self.feature_names].to_numpy(dtype=np.float64)
+            if synthetic_rows > 0:
+                synthetic = teacher._synthetic_features(synthetic_rows, seed=seed).to_numpy()
+                transfer = np.vstack([transfer, synthetic])
+            X_transfer = self.scaler.transform(transfer)
+            soft_labels = teacher.model.predict_proba(X_transfer)
+            classes = np.asarray(teacher.model.classes_).astype(int)
+            
+            # Every row once per class, weighted by the teacher's probability of it
+            X_fit = np.tile(X_transfer, (len(classes), 1))
+            y_fit = np.repeat(classes, len(X_transfer))
+            weights = soft_labels.T.ravel()
+        
+        # Train model
+        print(f"Distilling {teacher.model_type} model into {self.model_type} model...")
+        start = time.perf_counter()
+        self.model.fit(X_fit, y_fit, sample_weight=weights)
+        fit_time = time.perf_counter() - start
+        profiling.record("fit", fit_time)
+        self._new_fit()
+        
+        X_test_scaled = self.scaler.transform(X_test[self.feature_names].to_numpy(dtype=np.float64))
+        with profiling.stage("evaluate"):
+            metrics = self._evaluate(X_test_scaled, y_test, len(X), test_size)
+            teacher_pred = teacher.model.predict(teacher.scaler.transform(
+                X_test[teacher.feature_names].to_numpy(dtype=np.float64)
+            ))
+            student_pred = self.model.predict(X_test_scaled)
+        
+        metrics.update({
+            "training_mode": "distilled",
+            "fit_time_s": fit_time,
+            "teacher_version": teacher.version,
+            "teacher_model_type": teacher.model_type,
+            "teacher_accuracy": float(accuracy_score(y_test, teacher_pred)),
+            "teacher_f1_score": float(f1_score(y_test, teacher_pred, average='weighted', zero_division=0)),
+            "agreement": float(np.mean(np.asarray(student_pred).astype(int) == np.asarray(teacher_pred).astype(int))),
+            "transfer_rows": len(X_transfer),
+            "synthetic_rows": synthetic_rows
+        })
+        self.metrics = metrics
+        
+        print(f"✅ Distillation complete! Accuracy: {metrics['accuracy']:.4f} "
+              f"(teacher {metrics['teacher_accuracy']:.4f}, agreement {metrics['agreement']:.4f})")
+        
+        return metrics
+    
+    def _split_chunks(self, chunks: Callable[[], Iterable[pd.DataFrame]],
+                      seed: int) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray, List[str]]]:
+        """Features, labels, train/test draws and feature names of each chunk"""
+        for i, chunk in enumerate(chunks()):
+            X, y, names = self._feature_matrix(chunk)
+            # Seeded per chunk, so every pass assigns each row to the same split
+            u = np.random.default_rng([seed, i]).random(len(y))
+            yield X, y, u, names
+    
+    def _fit_xgboost_external_memory(self, training_chunks: Callable[[], Iterator[Tuple[np.ndarray, np.ndarray]]],
+                                     cache_dir: Optional[str] = None) -> xgb.XGBClassifier:
+        """Train the XGBoost model from an external-memory DMatrix over the training chunks"""
+        params = {k: v for k, v in self.model.get_xgb_params().items() if v is not None}
+        # External memory needs the histogram method
+        params.update(objective="multi:softprob", num_class=len(self.label_mapping), tree_method="hist")
+        
+        with tempfile.TemporaryDirectory(prefix="xgb-cache-", dir=cache_dir) as tmp:
+            dtrain = xgb.DMatrix(_ChunkIterator(training_chunks, os.path.join(tmp, "cache")), missing=np.nan)
+            booster = xgb.train(params, dtrain, num_boost_round=self.model.n_estimators)
+            del dtrain
+        
+        # Wrap the booster so the model serves like one fitted with XGBClassifier.fit
+        model = xgb.XGBClassifier(**self.model.get_params())
+        model.load_model(bytearray(booster.save_raw("ubj")))
+        return model
+    
+    def _scaler_mismatch(self, X: pd.DataFrame) -> Optional[str]:
+        """Why the fitted scaler does not fit X, or None if it can be reused"""
+        if list(X.columns) != list(getattr(self.scaler, "feature_names_in_", self.feature_names)):
+            return "the dataset has different feature columns"
+        
+        mean_shift = np.abs(X.mean().to_numpy() - self.scaler.mean_) / self.scaler.scale_
+        std_ratio = X.std(ddof=0).to_numpy() / self.scaler.scale_
+        std_ratio = np.maximum(std_ratio, 1 / np.maximum(std_ratio, 1e-12))
+        
+        for j, name in enumerate(X.columns):
+            if mean_shift[j] > SCALER_MAX_MEAN_SHIFT:
+                return f"{name} mean shifted by {mean_shift[j]:.2f} standard deviations"
+            if std_ratio[j] > SCALER_MAX_STD_RATIO:
+                return f"{name} spread changed by a factor of {std_ratio[j]:.2f}"
+        return None
+    
+    def _new_fit(self):
+        """Record that the model was (re)fitted"""
+        self.version = self._new_version()
+        
+        # A compiled copy of the previous fit no longer matches the model
+        self.inference_backend = "native"
+        self.compiled = None
+    
+    def _evaluate(self, X_test_scaled: np.ndarray, y_test: pd.Series,
+                  n_samples: int, test_size: float) -> Dict[str, Any]:
+        """Compute test-set metrics of the fitted model"""
         # Make predictions
         y_pred = self.model.predict(X_test_scaled)
+        start = time.perf_counter()
         y_pred_proba = self.model.predict_proba(X_test_scaled)
+        predict_time = time.perf_counter() - start
         
         # Calculate metrics
         metrics = {
+            "model_version": self.version,
+            "trained_at": datetime.now().isoformat(),
             "accuracy": float(accuracy_score(y_test, y_pred)),
             "precision": float(precision_score(y_test, y_pred, average='weighted', zero_division=0)),
             "recall": float(recall_score(y_test, y_pred, average='weighted', zero_division=0)),
@@ -191,20 +733,25 @@ class ExoplanetModel:
                                                           zero_division=0,
                                                           output_dict=True),
             "model_type": self.model_type,
-            "n_samples": len(X),
+            "n_samples": n_samples,
             "n_features": len(self.feature_names),
             "feature_names": self.feature_names,
-            "test_size": test_size
+            "feature_importance": calculate_feature_importance(self.model, self.feature_names),
+            "test_size": test_size,
+            "predict_time_s": predict_time,
+            "predict_us_per_row": predict_time / max(len(y_test), 1) * 1e6
         }
         
-        print(f"✅ Training complete! Accuracy: {metrics['accuracy']:.4f}")
-        
         return metrics
     
     def predict(self, features: Dict[str, float]) -> Dict[str, Any]:
         """
         Make prediction for a single exoplanet
         
+        Low-latency path: features are written straight into a reusable
+        NumPy row in feature_names order and scaled inline, avoiding
+        DataFrame construction, and the model is called once.
+        
         Args:
             features: Dictionary of feature values
             
@@ -214,70 +761,333 @@ class ExoplanetModel:
         if self.model is None:
             raise ValueError("Model not trained. Please train the model first.")
         
-        # Create DataFrame with proper feature order
-        X = pd.DataFrame([features])[self.feature_names]
-        
-        # Fill any missing values with 0
-        X = X.fillna(0)
-        
-        # Scale features
-        X_scaled = self.scaler.transform(X)
+        started = time.perf_counter()
+        X = self._feature_row()
+        for j, name in enumerate(self.feature_names):
+            value = features[name]
+            # Fill any missing values with 0
+            X[0, j] = 0.0 if value is None or value != value else value
+        assembled = time.perf_counter()
         
-        # Make prediction
-        prediction = self.model.predict(X_scaled)[0]
-        probabilities = self.model.predict_proba(X_scaled)[0]
+        compiled = self.compiled
+        if compiled is not None:
+            # The scaler is folded into the compiled thresholds
+            scaled = None
+            probabilities = compiled.predict_proba(X)[0]
+        else:
+            # Scale features (same arithmetic as StandardScaler.transform)
+            if self.scaler.with_mean:
+                X -= self.scaler.mean_
+            if self.scaler.with_std:
+                X /= self.scaler.scale_
+            scaled = time.perf_counter()
+            
+            # Make prediction
+            probabilities = self.model.predict_proba(X)[0]
+        scored = time.perf_counter()
+        best = int(probabilities.argmax())
+        prediction = int(self.model.classes_[best])
         
         result = {
-            "prediction": int(prediction),
-            "prediction_label": self.label_mapping[int(prediction)],
-            "confidence": float(max(probabilities)),
+            "prediction": prediction,
+            "prediction_label": self.label_mapping[prediction],
+            "confidence": float(probabilities[best]),
             "probabilities": {
-                self.label_mapping[i]: float(prob) 
-                for i, prob in enumerate(probabilities)
+                self.label_mapping[int(c)]: float(prob) 
+                for c, prob in zip(self.model.classes_, probabilities)
             },
             "features_used": features
         }
         
+        if self.record_metrics:
+            _record_inference("single", 1, started, assembled, scaled, scored, time.perf_counter())
         return result
     
-    def predict_batch(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
+    def _feature_row(self) -> np.ndarray:
+        """Get this thread's preallocated (1, n_features) input row"""
+        row = getattr(self._row_buffers, "row", None)
+        if row is None or row.shape[1] != len(self.feature_names):
+            row = np.empty((1, len(self.feature_names)), dtype=np.float64)
+            self._row_buffers.row = row
+        return row
+    
+    def predict_batch(self, df: pd.DataFrame, start_index: int = 0) -> List[Dict[str, Any]]:
         """
         Make predictions for multiple exoplanets
         
+        Row-oriented view of predict_batch_columnar, kept for compatibility.
+        
         Args:
             df: DataFrame with features
+            start_index: Index assigned to the first row (for chunked input)
             
         Returns:
             List of prediction dictionaries
         """
+        columns = self.predict_batch_columnar(df, start_index=start_index)
+        started = time.perf_counter()
+        rows = self.columnar_to_rows(columns)
+        if self.record_metrics:
+            elapsed = time.perf_counter() - started
+            _STAGES["batch"]["serialize"].observe(elapsed)
+            profiling.record("serialize", elapsed)
+        return rows
+    
+    def predict_batch_columnar(self, df: pd.DataFrame, start_index: int = 0) -> Dict[str, Any]:
+        """
+        Make predictions for multiple exoplanets as columns of NumPy arrays
+        
+        Predictions, labels and confidences are all derived from a single
+        predict_proba call, without any per-row Python work.
+        
+        Args:
+            df: DataFrame with features
+            start_index: Index assigned to the first row (for chunked input)
+            
+        Returns:
+            Dictionary with index, prediction, prediction_label and confidence
+            arrays, plus a per-class mapping of probability arrays
+        """
         if self.model is None:
             raise ValueError("Model not trained. Please train the model first.")
         
+        started = time.perf_counter()
         # Ensure all features are present
-        X = df[self.feature_names].copy()
-        X = X.fillna(0)
+        X = df[self.feature_names].fillna(0)
         
-        # Scale features
-        X_scaled = self.scaler.transform(X)
+        classes = np.asarray(self.model.classes_).astype(int)
+        labels = [self.label_mapping[int(c)] for c in classes]
+        assembled = time.perf_counter()
         
-        # Make predictions
-        predictions = self.model.predict(X_scaled)
-        probabilities = self.model.predict_proba(X_scaled)
-        
-        results = []
-        for i, (pred, probs) in enumerate(zip(predictions, probabilities)):
-            results.append({
-                "index": i,
-                "prediction": int(pred),
-                "prediction_label": self.label_mapping[int(pred)],
-                "confidence": float(max(probs)),
-                "probabilities": {
-                    self.label_mapping[j]: float(prob) 
-                    for j, prob in enumerate(probs)
-                }
-            })
-        
-        return results
+        compiled = self.compiled
+        scaled = None
+        if len(X) == 0:
+            probabilities = np.empty((0, len(classes)))
+        elif compiled is not None and len(X) <= self.compiled_max_batch_rows:
+            probabilities = compiled.predict_proba(X.to_numpy(dtype=np.float64))
+        else:
+            # Scale features and score
+            X_scaled = self.scaler.transform(X)
+            scaled = time.perf_counter()
+            probabilities = self.model.predict_proba(X_scaled)
+        scored = time.perf_counter()
+        
+        best = probabilities.argmax(axis=1)
+        # One contiguous array per class, so encoders can take them as they are
+        by_class = np.ascontiguousarray(probabilities.T)
+        
+        columns = {
+            "index": np.arange(start_index, start_index + len(X)),
+            "prediction": classes[best],
+            "prediction_label": np.asarray(labels, dtype=object)[best],
+            "confidence": probabilities.max(axis=1, initial=0.0),
+            "probabilities": {
+                label: by_class[j]
+                for j, label in enumerate(labels)
+            }
+        }
+        
+        if self.record_metrics:
+            _record_inference("batch", len(X), started, assembled, scaled, scored, time.perf_counter())
+        return columns
+    
+    @staticmethod
+    def columnar_to_rows(columns: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Convert columnar predictions into a list of prediction dictionaries
+        
+        Args:
+            columns: Output of predict_batch_columnar
+            
+        Returns:
+            List of prediction dictionaries
+        """
+        labels = list(columns["probabilities"])
+        probability_rows = zip(*(columns["probabilities"][label].tolist() for label in labels))
+        
+        return [
+            {
+                "index": index,
+                "prediction": prediction,
+                "prediction_label": label,
+                "confidence": confidence,
+                "probabilities": dict(zip(labels, probs))
+            }
+            for index, prediction, label, confidence, probs in zip(
+                columns["index"].tolist(),
+                columns["prediction"].tolist(),
+                columns["prediction_label"].tolist(),
+                columns["confidence"].tolist(),
+                probability_rows
+            )
+        ]
+    
+    @staticmethod
+    def columnar_to_lists(columns: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Convert columnar predictions into JSON-serializable lists
+        
+        Args:
+            columns: Output of predict_batch_columnar
+            
+        Returns:
+            Same structure with every array replaced by a list
+        """
+        return {
+            "index": columns["index"].tolist(),
+            "prediction": columns["prediction"].tolist(),
+            "prediction_label": columns["prediction_label"].tolist(),
+            "confidence": columns["confidence"].tolist(),
+            "probabilities": {
+                label: probs.tolist()
+                for label, probs in columns["probabilities"].items()
+            }
+        }
+    
+    @staticmethod
+    def columnar_to_table(columns: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Flatten columnar predictions into one column per field
+        
+        Args:
+            columns: Output of predict_batch_columnar
+            
+        Returns:
+            index, prediction, prediction_label and confidence arrays, and
+            one probability array per class named after its label
+        """
+        return {
+            "index": columns["index"],
+            "prediction": columns["prediction"],
+            "prediction_label": columns["prediction_label"],
+            "confidence": columns["confidence"],
+            **columns["probabilities"]
+        }
+    
+    def iter_predict_batch(self, chunks: Iterable[pd.DataFrame],
+                           columnar: bool = False) -> Iterator[Any]:
+        """
+        Make predictions chunk by chunk for inputs too large to hold at once
+        
+        Args:
+            chunks: Iterable of feature DataFrames (e.g. a pd.read_csv chunk reader)
+            columnar: Yield predict_batch_columnar output instead of row dictionaries
+            
+        Yields:
+            Predictions per chunk, indexed across all chunks
+        """
+        predict = self.predict_batch_columnar if columnar else self.predict_batch
+        offset = 0
+        for chunk in chunks:
+            yield predict(chunk, start_index=offset)
+            offset += len(chunk)
+    
+    def warm_up(self, n_rows: int = 256, seed: int = 42) -> Dict[str, float]:
+        """
+        Run synthetic inputs through both prediction paths
+        
+        The first calls into a freshly loaded model pay one-off costs (lazy
+        imports, thread pools, page faults on memory-mapped arrays), so they
+        are taken here rather than by the first request.
+        
+        Args:
+            n_rows: Rows in the warm-up batch (the single-row path is always run)
+            seed: Random seed for the synthetic feature values
+            
+        Returns:
+            Timings of the single-row and batch calls in milliseconds
+        """
+        if self.model is None:
+            raise ValueError("Model not trained. Please train the model first.")
+        
+        df = self._synthetic_features(max(n_rows, 1), seed)
+        
+        # Cold-start timings would distort the serving latency histograms
+        record_metrics, self.record_metrics = self.record_metrics, False
+        timings = {}
+        try:
+            start = time.perf_counter()
+            self.predict(df.iloc[0].to_dict())
+            timings["single_ms"] = (time.perf_counter() - start) * 1000
+            
+            if n_rows > 0:
+                start = time.perf_counter()
+                self.predict_batch_columnar(df)
+                timings["batch_ms"] = (time.perf_counter() - start) * 1000
+        finally:
+            self.record_metrics = record_metrics
+        
+        return timings
+    
+    def _synthetic_features(self, n_rows: int, seed: int = 42) -> pd.DataFrame:
+        """
+        Random feature rows spread around the training distribution
+        
+        Used to exercise the model without a dataset, so that trees are
+        walked down realistic paths.
+        """
+        rng = np.random.default_rng(seed)
+        values = rng.standard_normal((n_rows, len(self.feature_names)))
+        if self.scaler.with_std:
+            values *= self.scaler.scale_
+        if self.scaler.with_mean:
+            values += self.scaler.mean_
+        return pd.DataFrame(values, columns=self.feature_names)
+    
+    def set_inference_backend(self, backend: str, verify_rows: int = 1000,
+                              tolerance: float = 1e-6,
+                              max_batch_rows: int = COMPILED_MAX_BATCH_ROWS) -> str:
+        """
+        Select how predictions are computed
+        
+        "compiled" flattens random forest, gradient boosting and XGBoost
+        models into a CompiledTreeEnsemble, with the scaler folded into the
+        split thresholds. The compiled ensemble is checked against the
+        native model on synthetic rows and only used if every row gets the
+        same class and probabilities within `tolerance`; otherwise (and for
+        models that cannot be compiled, such as SVM) the native backend is kept.
+        Batches larger than `max_batch_rows` are always scored natively.
+        
+        Args:
+            backend: "native" or "compiled"
+            verify_rows: Rows compared between the compiled and native paths
+            tolerance: Largest allowed absolute probability difference
+            max_batch_rows: Largest batch scored by the compiled engine
+            
+        Returns:
+            The backend actually in use
+        """
+        if backend not in INFERENCE_BACKENDS:
+            raise ValueError(f"Unknown inference backend: {backend}. Use one of: {', '.join(INFERENCE_BACKENDS)}")
+        if self.model is None:
+            raise ValueError("Model not trained. Please train the model first.")
+        
+        if backend == "native":
+            self.compiled = None
+            self.inference_backend = "native"
+            return self.inference_backend
+        
+        try:
+            compiled = CompiledTreeEnsemble.from_model(self.model, self.scaler)
+        except TypeError as e:
+            print(f"⚠️ {e}; using the native backend")
+            return self.inference_backend
+        
+        X = self._synthetic_features(max(verify_rows, 1)).to_numpy()
+        expected = self.model.predict_proba(self.scaler.transform(X))
+        actual = compiled.predict_proba(X)
+        difference = float(np.abs(expected - actual).max())
+        if difference > tolerance or not np.array_equal(expected.argmax(axis=1), actual.argmax(axis=1)):
+            print(f"⚠️ Compiled model differs from the native model (max difference {difference:.2e}); "
+                  f"using the native backend")
+            return self.inference_backend
+        
+        self.compiled = compiled
+        self.compiled_max_batch_rows = max_batch_rows
+        self.inference_backend = "compiled"
+        print(f"✅ Compiled {compiled.n_trees} trees ({compiled.n_nodes} nodes), "
+              f"max difference {difference:.2e}")
+        return self.inference_backend
     
     def save_model(self, model_path: str = "./models/trained_model.joblib", 
                    scaler_path: str = "./models/scaler.joblib"):
@@ -294,6 +1104,7 @@ class ExoplanetModel:
         
         # Save metadata
         metadata = {
+            "version": self.version,
             "model_type": self.model_type,
             "feature_names": self.feature_names,
             "label_mapping": self.label_mapping
@@ -303,17 +1114,32 @@ class ExoplanetModel:
         with open(metadata_path, 'w') as f:
             json.dump(metadata, f, indent=2)
         
+        if self.metrics is not None:
+            metrics_path = str(Path(model_path).parent / "metrics.json")
+            with open(metrics_path, 'w') as f:
+                json.dump(self.metrics, f, indent=2)
+        
         print(f"✅ Model saved to {model_path}")
     
     def load_model(self, model_path: str = "./models/trained_model.joblib",
-                   scaler_path: str = "./models/scaler.joblib"):
-        """Load trained model and scaler"""
+                   scaler_path: str = "./models/scaler.joblib",
+                   mmap_mode: Optional[str] = None):
+        """
+        Load trained model and scaler
+        
+        With mmap_mode='r' the NumPy arrays of the model (e.g. the node
+        arrays of tree ensembles) are memory-mapped from the file instead of
+        copied into memory, so large ensembles load in near-constant time and
+        their pages are shared between worker processes.
+        """
         if not Path(model_path).exists():
             raise FileNotFoundError(f"Model file not found: {model_path}")
         
         # Load model and scaler
-        self.model = joblib.load(model_path)
+        self.model = joblib.load(model_path, mmap_mode=mmap_mode)
         self.scaler = joblib.load(scaler_path)
+        self.inference_backend = "native"
+        self.compiled = None
         
         # Load metadata
         metadata_path = str(Path(model_path).parent / "metadata.json")
@@ -323,9 +1149,26 @@ class ExoplanetModel:
             self.model_type = metadata["model_type"]
             self.feature_names = metadata["feature_names"]
             self.label_mapping = {int(k): v for k, v in metadata["label_mapping"].items()}
+            self.version = metadata.get("version")
+        
+        # Metrics are kept in memory with the model, so serving them needs no disk reads
+        metrics_path = Path(model_path).parent / "metrics.json"
+        self.metrics = None
+        if metrics_path.exists():
+            with open(metrics_path, 'r') as f:
+                self.metrics = json.load(f)
+        
+        # Models saved without a version are identified by their file timestamp
+        if self.version is None:
+            self.version = f"legacy-{int(Path(model_path).stat().st_mtime)}"
         
         print(f"✅ Model loaded from {model_path}")
     
+    @staticmethod
+    def _new_version() -> str:
+        """Generate a unique, time-ordered model version identifier"""
+        return f"{datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:6]}"
+    
     def update_hyperparameters(self, params: Dict[str, Any]):
         """Update model hyperparameters"""
         if self.model_type == "random_forest":
@@ -336,5 +1179,7 @@ class ExoplanetModel:
             self.model.set_params(**params)
         elif self.model_type == "gradient_boost":
             self.model.set_params(**params)
+        elif self.model_type == "sgd":
+            self.model.set_params(**params)
         
         print(f"✅ Hyperparameters updated: {params}")
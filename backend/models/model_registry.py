@@ -0,0 +1,456 @@
+"""
+MODEL LAYER - Model Registry
+Immutable, versioned storage of trained models with atomic serving swaps
+"""
+
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+from models.exoplanet_model import ExoplanetModel, TREE_MODEL_TYPES
+
+
+MODEL_FILE = "model.joblib"
+SCALER_FILE = "scaler.joblib"
+METADATA_FILE = "metadata.json"
+METRICS_FILE = "metrics.json"
+CURRENT_FILE = "current.json"
+
+
+class ModelRegistry:
+    """
+    Registry of trained model versions
+
+    Each version lives in its own directory, written under a temporary
+    name and renamed into place, and is never modified afterwards. The
+    serving version is recorded in current.json (replaced atomically) and
+    held in memory as a single reference, so a swap is one assignment:
+    requests that already hold the previous model finish with it.
+
+    A pinned version stays in service when new versions are published;
+    rollback returns to the version served before the current one.
+
+    A version can have a distilled student: a smaller version trained to
+    mimic it, served on latency-sensitive routes alongside it.
+    """
+
+    def __init__(self, root: str = "./models/registry", max_loaded: int = 3,
+                 max_versions: int = 20, mmap_mode: Optional[str] = None,
+                 warm_up_rows: int = 0, inference_backend: str = "native",
+                 compiled_max_batch_rows: int = 32):
+        """
+        Initialize the registry
+
+        Args:
+            root: Directory holding one subdirectory per version
+            max_loaded: Number of versions kept loaded in memory side by side
+            max_versions: Number of versions kept on disk (the serving and previous versions are never pruned)
+            mmap_mode: Memory-map model arrays when loading ('r'), or None to read them into memory
+            warm_up_rows: Rows in the warm-up batch run on each loaded version (0 disables)
+            inference_backend: Backend loaded versions serve with ("native" or "compiled")
+            compiled_max_batch_rows: Largest batch scored by the compiled backend
+        """
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_loaded = max(1, max_loaded)
+        self.max_versions = max(1, max_versions)
+        self.mmap_mode = mmap_mode
+        self.warm_up_rows = warm_up_rows
+        self.inference_backend = inference_backend
+        self.compiled_max_batch_rows = compiled_max_batch_rows
+
+        self._lock = threading.RLock()
+        self._loaded: OrderedDict = OrderedDict()
+        self._serving: Optional[ExoplanetModel] = None
+        # (teacher version, student model or None) of the serving version, once looked up;
+        # the None is cached too, so versions without a student skip the state file
+        self._student: Optional[tuple] = None
+        # Metrics of versions not loaded; versions are immutable, so they never go stale
+        self._metrics: Dict[str, Optional[Dict[str, Any]]] = {}
+
+    # ------------------------------------------------------------------
+    # Versions on disk
+    # ------------------------------------------------------------------
+
+    def _version_dir(self, version: str) -> Path:
+        path = self.root / version
+        if path.parent != self.root or version.startswith("."):
+            raise ValueError(f"Invalid model version: {version}")
+        return path
+
+    def exists(self, version: str) -> bool:
+        """Whether a version is stored in the registry"""
+        return (self._version_dir(version) / METADATA_FILE).exists()
+
+    def publish(self, model: ExoplanetModel) -> str:
+        """
+        Store a trained model as a new immutable version
+
+        Args:
+            model: Trained model; its `version` names the version directory
+
+        Returns:
+            The stored version
+        """
+        if model.version is None:
+            raise ValueError("Model has no version. Train the model first.")
+
+        final_dir = self._version_dir(model.version)
+        tmp_dir = self.root / f".tmp-{model.version}-{os.getpid()}"
+        if tmp_dir.exists():
+            shutil.rmtree(tmp_dir)
+        tmp_dir.mkdir(parents=True)
+
+        model.save_model(str(tmp_dir / MODEL_FILE), str(tmp_dir / SCALER_FILE))
+
+        # Renaming the complete directory publishes the version atomically
+        os.rename(tmp_dir, final_dir)
+        self._prune()
+
+        return model.version
+
+    def list_versions(self) -> List[Dict[str, Any]]:
+        """
+        Get all stored versions, newest first
+
+        Returns:
+            Metadata of each version, flagged when serving or pinned
+        """
+        state = self._read_state()
+        versions = []
+        for path in self.root.iterdir():
+            metadata_path = path / METADATA_FILE
+            if path.name.startswith(".") or not metadata_path.exists():
+                continue
+            with open(metadata_path, 'r') as f:
+                metadata = json.load(f)
+            versions.append({
+                "version": path.name,
+                "model_type": metadata.get("model_type"),
+                "n_features": len(metadata.get("feature_names", [])),
+                "created_at": datetime.fromtimestamp(metadata_path.stat().st_mtime).isoformat(),
+                "serving": path.name == state.get("version"),
+                "pinned": path.name == state.get("version") and state.get("pinned", False)
+            })
+        return sorted(versions, key=lambda v: v["version"], reverse=True)
+
+    def _prune(self):
+        """Delete the oldest versions beyond max_versions"""
+        state = self._read_state()
+        keep = {state.get("version")} | set(state.get("history", [])[-1:])
+        keep.add(state.get("students", {}).get(state.get("version")))
+        versions = sorted(
+            path.name for path in self.root.iterdir()
+            if not path.name.startswith(".") and path.is_dir()
+        )
+        for version in versions[:max(0, len(versions) - self.max_versions)]:
+            if version not in keep:
+                shutil.rmtree(self.root / version, ignore_errors=True)
+                self._metrics.pop(version, None)
+
+    # ------------------------------------------------------------------
+    # Serving state
+    # ------------------------------------------------------------------
+
+    def _read_state(self) -> Dict[str, Any]:
+        path = self.root / CURRENT_FILE
+        if not path.exists():
+            return {}
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def _write_state(self, state: Dict[str, Any]):
+        path = self.root / CURRENT_FILE
+        tmp_path = path.with_name(f".{CURRENT_FILE}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def current_version(self) -> Optional[str]:
+        """Version currently selected for serving, if any"""
+        return self._read_state().get("version")
+
+    def is_pinned(self) -> bool:
+        """Whether the serving version is pinned"""
+        return self._read_state().get("pinned", False)
+
+    def load(self, version: str, warm_up: bool = True) -> ExoplanetModel:
+        """
+        Load a version, reusing it if already in memory
+
+        Newly loaded versions are warmed up before they are returned, so a
+        version is never swapped into service cold.
+
+        Args:
+            version: Version to load
+            warm_up: Run the warm-up batch on a newly loaded version
+
+        Returns:
+            Loaded model
+        """
+        with self._lock:
+            model = self._loaded.get(version)
+            if model is not None:
+                self._loaded.move_to_end(version)
+                return model
+
+        if not self.exists(version):
+            raise FileNotFoundError(f"Model version not found: {version}")
+
+        version_dir = self._version_dir(version)
+        model = ExoplanetModel()
+        model.load_model(str(version_dir / MODEL_FILE), str(version_dir / SCALER_FILE),
+                         mmap_mode=self.mmap_mode)
+        model.version = version
+        if self.inference_backend != "native":
+            model.set_inference_backend(self.inference_backend,
+                                        max_batch_rows=self.compiled_max_batch_rows)
+        if warm_up and self.warm_up_rows > 0:
+            model.warm_up(self.warm_up_rows)
+
+        with self._lock:
+            self._loaded[version] = model
+            self._loaded.move_to_end(version)
+            while len(self._loaded) > self.max_loaded:
+                evicted, _ = self._loaded.popitem(last=False)
+                # Never evict the serving model; reinsert it as most recent
+                if self._serving is not None and evicted == self._serving.version:
+                    self._loaded[evicted] = self._serving
+        return model
+
+    def metrics(self, version: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the training metrics stored with a version
+
+        Args:
+            version: Version to look up
+
+        Returns:
+            Metrics, or None if the version was stored without them
+
+        Raises:
+            FileNotFoundError: If the version does not exist
+        """
+        with self._lock:
+            model = self._loaded.get(version)
+            if model is not None:
+                return model.metrics
+            if version in self._metrics:
+                return self._metrics[version]
+
+        if not self.exists(version):
+            raise FileNotFoundError(f"Model version not found: {version}")
+
+        metrics_path = self._version_dir(version) / METRICS_FILE
+        metrics = None
+        if metrics_path.exists():
+            with open(metrics_path, 'r') as f:
+                metrics = json.load(f)
+
+        with self._lock:
+            self._metrics[version] = metrics
+        return metrics
+
+    def serving(self) -> ExoplanetModel:
+        """
+        Get the model currently being served
+
+        Returns:
+            Serving model
+
+        Raises:
+            FileNotFoundError: If no version has been activated
+        """
+        model = self._serving
+        if model is not None:
+            return model
+
+        with self._lock:
+            if self._serving is None:
+                version = self.current_version()
+                if version is None:
+                    raise FileNotFoundError("No model version is active")
+                self._serving = self.load(version)
+            return self._serving
+
+    def is_serving(self) -> bool:
+        """Whether a model is loaded and being served"""
+        return self._serving is not None
+
+    def activate(self, version: str, pin: bool = False) -> ExoplanetModel:
+        """
+        Serve a version, swapping the serving reference atomically
+
+        Args:
+            version: Version to serve
+            pin: Keep serving this version when new versions are published
+
+        Returns:
+            The now-serving model
+        """
+        model = self.load(version)
+
+        with self._lock:
+            state = self._read_state()
+            history = state.get("history", [])
+            previous = state.get("version")
+            if previous is not None and previous != version:
+                history = (history + [previous])[-self.max_versions:]
+            self._write_state({**state, "version": version, "pinned": pin, "history": history})
+            self._serving = model
+            self._student = None
+
+        print(f"✅ Serving model version {version}{' (pinned)' if pin else ''}")
+        return model
+
+    def activate_unless_pinned(self, version: str) -> bool:
+        """
+        Activate a newly published version unless the serving one is pinned
+
+        Args:
+            version: Newly published version
+
+        Returns:
+            Whether the version was activated
+        """
+        with self._lock:
+            if self.is_pinned():
+                return False
+            self.activate(version)
+            return True
+
+    def rollback(self) -> ExoplanetModel:
+        """
+        Return to the version served before the current one
+
+        Returns:
+            The now-serving model
+
+        Raises:
+            ValueError: If there is no previous version to roll back to
+        """
+        with self._lock:
+            state = self._read_state()
+            history = [v for v in state.get("history", []) if self.exists(v)]
+            if not history:
+                raise ValueError("No previous model version to roll back to")
+
+            version = history.pop()
+            model = self.load(version)
+            self._write_state({**state, "version": version, "history": history})
+            self._serving = model
+            self._student = None
+
+        print(f"✅ Rolled back to model version {version}")
+        return model
+
+    def unpin(self):
+        """Let newly published versions replace the serving one again"""
+        with self._lock:
+            state = self._read_state()
+            if state:
+                self._write_state({**state, "pinned": False})
+
+    # ------------------------------------------------------------------
+    # Distilled students
+    # ------------------------------------------------------------------
+
+    def set_student(self, teacher_version: str, student_version: str):
+        """
+        Serve a version as the low-latency student of another
+
+        Args:
+            teacher_version: Version the student was distilled from
+            student_version: Distilled version
+        """
+        for version in (teacher_version, student_version):
+            if not self.exists(version):
+                raise FileNotFoundError(f"Model version not found: {version}")
+
+        with self._lock:
+            state = self._read_state()
+            students = {**state.get("students", {}), teacher_version: student_version}
+            self._write_state({**state, "students": students})
+            self._student = None
+
+        print(f"✅ Model version {student_version} is the student of {teacher_version}")
+
+    def remove_student(self, teacher_version: str) -> bool:
+        """
+        Stop serving the student of a version
+
+        Returns:
+            Whether the version had a student
+        """
+        with self._lock:
+            state = self._read_state()
+            students = dict(state.get("students", {}))
+            if students.pop(teacher_version, None) is None:
+                return False
+            self._write_state({**state, "students": students})
+            self._student = None
+        return True
+
+    def student_version(self, teacher_version: Optional[str] = None) -> Optional[str]:
+        """Student of a version (by default the serving one), if any"""
+        state = self._read_state()
+        teacher_version = teacher_version or state.get("version")
+        student = state.get("students", {}).get(teacher_version)
+        return student if student is not None and self.exists(student) else None
+
+    def student(self) -> Optional[ExoplanetModel]:
+        """
+        Get the student of the serving model
+
+        Tree-ensemble students are served with the compiled backend when it
+        matches the native model, whatever the registry's default backend.
+
+        Returns:
+            Student model, or None if the serving version has none
+        """
+        teacher = self._serving
+        cached = self._student
+        if teacher is not None and cached is not None and cached[0] == teacher.version:
+            return cached[1]
+
+        with self._lock:
+            teacher_version = teacher.version if teacher is not None else self.current_version()
+            version = self.student_version(teacher_version)
+            if version is None:
+                self._student = (teacher_version, None) if teacher is not None else None
+                return None
+            model = self.load(version)
+            if model.model_type in TREE_MODEL_TYPES and model.inference_backend != "compiled":
+                model.set_inference_backend("compiled", max_batch_rows=self.compiled_max_batch_rows)
+            self._student = (teacher_version, model)
+            return model
+
+    def import_legacy(self, model_path: str = "./models/trained_model.joblib",
+                      scaler_path: str = "./models/scaler.joblib") -> Optional[str]:
+        """
+        Import a model saved by ExoplanetModel.save_model before the registry existed
+
+        Only runs when the registry has no active version.
+
+        Args:
+            model_path: Legacy model file
+            scaler_path: Legacy scaler file
+
+        Returns:
+            Imported version, or None if nothing was imported
+        """
+        if self.current_version() is not None or not Path(model_path).exists():
+            return None
+
+        model = ExoplanetModel()
+        model.load_model(model_path, scaler_path)
+        version = model.version
+        if not self.exists(version):
+            self.publish(model)
+        self.activate(version)
+        return version
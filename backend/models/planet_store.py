@@ -0,0 +1,403 @@
+"""
+MODEL LAYER - Saved Planets Storage
+SQLite-backed store for planets saved with their predictions
+"""
+
+import base64
+import json
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+
+# Feature columns stored for each planet
+PLANET_FEATURE_COLUMNS = [
+    'koi_period',
+    'koi_depth',
+    'koi_prad',
+    'koi_teq',
+    'koi_insol',
+    'koi_model_snr',
+    'koi_steff',
+    'koi_srad',
+    'koi_smass',
+]
+
+PLANET_COLUMNS = ['id', 'name'] + PLANET_FEATURE_COLUMNS + [
+    'prediction',
+    'confidence',
+    'probabilities',
+    'created_at',
+]
+
+# Columns holding numbers (id aside)
+NUMERIC_COLUMNS = set(PLANET_FEATURE_COLUMNS) | {'confidence'}
+
+# Columns planets can be sorted by; each has an index ending in id
+SORT_COLUMNS = ['id', 'created_at', 'confidence', 'name']
+
+# Indexes serving the list filters and sort orders
+PLANET_INDEXES = {
+    'idx_planets_created_at': '(created_at, id)',
+    'idx_planets_confidence': '(confidence, id)',
+    'idx_planets_name': '(name, id)',
+    'idx_planets_prediction': '(prediction, id)',
+    'idx_planets_prediction_created_at': '(prediction, created_at, id)',
+    'idx_planets_prediction_confidence': '(prediction, confidence, id)',
+}
+
+
+class PlanetStore:
+    """
+    Saved planets stored in an embedded SQLite database
+
+    The database runs in WAL mode so readers never block the writer.
+    Each thread uses its own connection; every write is a single
+    transaction, so concurrent creates and deletes cannot lose updates.
+    """
+
+    def __init__(self, db_path: str = "./data/planets.db"):
+        """
+        Open (and create if needed) the planets database
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = str(db_path)
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._create_schema()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get this thread's database connection"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _create_schema(self):
+        """Create the planets table"""
+        column_defs = (
+            ["id INTEGER PRIMARY KEY AUTOINCREMENT", "name TEXT NOT NULL"]
+            + [f"{col} REAL" for col in PLANET_FEATURE_COLUMNS]
+            + [
+                "prediction TEXT NOT NULL",
+                "confidence REAL NOT NULL",
+                "probabilities TEXT NOT NULL",
+                "created_at TEXT NOT NULL",
+            ]
+        )
+        with self._connection() as conn:
+            conn.execute(f"CREATE TABLE IF NOT EXISTS planets ({', '.join(column_defs)})")
+            for name, columns in PLANET_INDEXES.items():
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON planets {columns}")
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        """Convert a database row to a planet dictionary"""
+        planet = dict(row)
+        planet['probabilities'] = json.loads(planet['probabilities'])
+        return planet
+
+    @staticmethod
+    def _to_columns(rows: List[sqlite3.Row]) -> Dict[str, List[Any]]:
+        """
+        Convert database rows to one list per column
+
+        Numeric columns become float64 arrays (NULL as NaN) and the
+        probabilities are split into one column per class label.
+        """
+        names = rows[0].keys() if rows else PLANET_COLUMNS
+        values = zip(*rows) if rows else ([] for _ in names)
+        columns = {
+            name: np.array(column, dtype=np.float64) if name in NUMERIC_COLUMNS else list(column)
+            for name, column in zip(names, values)
+        }
+
+        probabilities = [json.loads(value) for value in columns.pop('probabilities')]
+        labels = dict.fromkeys(label for probs in probabilities for label in probs)
+        for label in labels:
+            columns[label] = [probs.get(label) for probs in probabilities]
+        return columns
+
+    @staticmethod
+    def _to_params(planet: Dict[str, Any]) -> List[Any]:
+        """Convert a planet dictionary to insert parameters (without id)"""
+        return [
+            json.dumps(planet.get(col)) if col == 'probabilities' else planet.get(col)
+            for col in PLANET_COLUMNS[1:]
+        ]
+
+    def add(self, planet: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Insert a planet, assigning it a new ID
+
+        Args:
+            planet: Planet data without an ID
+
+        Returns:
+            The stored planet including its ID
+        """
+        columns = PLANET_COLUMNS[1:]
+        placeholders = ", ".join("?" for _ in columns)
+        with self._connection() as conn:
+            cursor = conn.execute(
+                f"INSERT INTO planets ({', '.join(columns)}) VALUES ({placeholders})",
+                self._to_params(planet)
+            )
+        return {'id': cursor.lastrowid, **{col: planet.get(col) for col in columns}}
+
+    def get(self, planet_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Get a planet by ID
+
+        Args:
+            planet_id: Planet ID
+
+        Returns:
+            Planet data, or None if it does not exist
+        """
+        row = self._connection().execute(
+            "SELECT * FROM planets WHERE id = ?", (planet_id,)
+        ).fetchone()
+        return self._to_dict(row) if row else None
+
+    def list_all(self) -> List[Dict[str, Any]]:
+        """Get all planets ordered by ID"""
+        rows = self._connection().execute("SELECT * FROM planets ORDER BY id").fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def query(self, limit: Optional[int] = 50, cursor: Optional[str] = None,
+              sort_by: str = 'id', descending: bool = False,
+              prediction: Optional[str] = None,
+              min_confidence: Optional[float] = None,
+              max_confidence: Optional[float] = None,
+              created_after: Optional[str] = None,
+              created_before: Optional[str] = None,
+              name_prefix: Optional[str] = None,
+              columnar: bool = False) -> Tuple[Any, Optional[str]]:
+        """
+        Get one page of planets matching the filters
+
+        Pages use keyset pagination on (sort column, id): the cursor holds
+        the last row's sort key, so each page is an index range scan no
+        matter how deep into the results it is.
+
+        Args:
+            limit: Maximum number of planets to return, or None for all matching planets
+            cursor: Cursor returned with the previous page
+            sort_by: Column to sort by (id, created_at, confidence or name)
+            descending: Sort in descending order
+            prediction: Only planets with this prediction label
+            min_confidence: Only planets with at least this confidence
+            max_confidence: Only planets with at most this confidence
+            created_after: Only planets created at or after this ISO timestamp
+            created_before: Only planets created before this ISO timestamp
+            name_prefix: Only planets whose name starts with this prefix
+            columnar: Return the page as one list per column instead of one dictionary per planet
+
+        Returns:
+            Tuple of (planets, cursor for the next page or None)
+
+        Raises:
+            ValueError: If the sort column or cursor is invalid
+        """
+        if sort_by not in SORT_COLUMNS:
+            raise ValueError(f"Invalid sort column: {sort_by}. Use one of: {', '.join(SORT_COLUMNS)}")
+
+        conditions, params = self._filter_conditions(
+            prediction, min_confidence, max_confidence, created_after, created_before, name_prefix
+        )
+
+        if cursor is not None:
+            last_value, last_id = self._decode_cursor(cursor, sort_by, descending)
+            comparison = "<" if descending else ">"
+            if sort_by == 'id':
+                conditions.append(f"id {comparison} ?")
+                params.append(last_id)
+            else:
+                conditions.append(f"({sort_by}, id) {comparison} (?, ?)")
+                params.extend([last_value, last_id])
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        direction = "DESC" if descending else "ASC"
+        order = "id" if sort_by == 'id' else f"{sort_by} {direction}, id"
+
+        # Fetch one extra row to know whether another page follows (LIMIT -1: no limit)
+        rows = self._connection().execute(
+            f"SELECT * FROM planets {where} ORDER BY {order} {direction} LIMIT ?",
+            params + [-1 if limit is None else limit + 1]
+        ).fetchall()
+
+        page = rows[:limit]
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            last = page[-1]
+            next_cursor = self._encode_cursor(last[sort_by], last['id'], sort_by, descending)
+
+        planets = self._to_columns(page) if columnar else [self._to_dict(row) for row in page]
+
+        return planets, next_cursor
+
+    @staticmethod
+    def _filter_conditions(prediction: Optional[str], min_confidence: Optional[float],
+                           max_confidence: Optional[float], created_after: Optional[str],
+                           created_before: Optional[str],
+                           name_prefix: Optional[str]) -> Tuple[List[str], List[Any]]:
+        """SQL conditions and parameters of the list filters"""
+        conditions = []
+        params: List[Any] = []
+
+        if prediction is not None:
+            conditions.append("prediction = ?")
+            params.append(prediction)
+        if min_confidence is not None:
+            conditions.append("confidence >= ?")
+            params.append(min_confidence)
+        if max_confidence is not None:
+            conditions.append("confidence <= ?")
+            params.append(max_confidence)
+        if created_after is not None:
+            conditions.append("created_at >= ?")
+            params.append(created_after)
+        if created_before is not None:
+            conditions.append("created_at < ?")
+            params.append(created_before)
+        if name_prefix:
+            # Range condition rather than LIKE so the name index is used
+            upper = PlanetStore._prefix_upper_bound(name_prefix)
+            if upper is None:
+                conditions.append("name >= ?")
+                params.append(name_prefix)
+            else:
+                conditions.append("name >= ? AND name < ?")
+                params.extend([name_prefix, upper])
+
+        return conditions, params
+
+    @staticmethod
+    def _prefix_upper_bound(prefix: str) -> Optional[str]:
+        """
+        Smallest string greater than every string starting with prefix
+
+        Trailing U+10FFFF code points cannot be incremented and are dropped;
+        surrogates are skipped since they cannot be stored.
+
+        Args:
+            prefix: Non-empty name prefix
+
+        Returns:
+            The bound, or None if every code point of the prefix is U+10FFFF
+        """
+        stem = prefix.rstrip(chr(sys.maxunicode))
+        if not stem:
+            return None
+        code_point = ord(stem[-1]) + 1
+        if 0xD800 <= code_point <= 0xDFFF:
+            code_point = 0xE000
+        return stem[:-1] + chr(code_point)
+
+    @staticmethod
+    def _encode_cursor(value: Any, planet_id: int, sort_by: str, descending: bool) -> str:
+        """Encode the sort key of the last row of a page as an opaque cursor"""
+        payload = json.dumps({"v": value, "id": planet_id, "s": sort_by, "d": descending})
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: str, sort_by: str, descending: bool) -> Tuple[Any, int]:
+        """Decode a cursor, checking it was issued for the same sort order"""
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            value, planet_id = payload["v"], int(payload["id"])
+            cursor_sort, cursor_descending = payload["s"], payload["d"]
+        except (ValueError, KeyError, TypeError):
+            raise ValueError("Invalid cursor")
+
+        if cursor_sort != sort_by or cursor_descending != descending:
+            raise ValueError("Cursor was issued for a different sort order")
+
+        return value, planet_id
+
+    def count(self, prediction: Optional[str] = None,
+              min_confidence: Optional[float] = None,
+              max_confidence: Optional[float] = None,
+              created_after: Optional[str] = None,
+              created_before: Optional[str] = None,
+              name_prefix: Optional[str] = None) -> int:
+        """
+        Get the number of saved planets matching the filters
+
+        Unlike a page, this visits every matching row, so its cost grows
+        with the number of planets.
+
+        Args:
+            prediction: Only planets with this prediction label
+            min_confidence: Only planets with at least this confidence
+            max_confidence: Only planets with at most this confidence
+            created_after: Only planets created at or after this ISO timestamp
+            created_before: Only planets created before this ISO timestamp
+            name_prefix: Only planets whose name starts with this prefix
+
+        Returns:
+            Number of matching planets
+        """
+        conditions, params = self._filter_conditions(
+            prediction, min_confidence, max_confidence, created_after, created_before, name_prefix
+        )
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return self._connection().execute(f"SELECT COUNT(*) FROM planets {where}", params).fetchone()[0]
+
+    def delete(self, planet_id: int) -> bool:
+        """
+        Delete a planet by ID
+
+        Args:
+            planet_id: Planet ID to delete
+
+        Returns:
+            True if the planet existed and was deleted
+        """
+        with self._connection() as conn:
+            cursor = conn.execute("DELETE FROM planets WHERE id = ?", (planet_id,))
+        return cursor.rowcount > 0
+
+    def migrate_from_json(self, json_path: str) -> int:
+        """
+        Import planets from the legacy saved_planets.json file
+
+        Runs once: planets keep their IDs, the import is a single
+        transaction, and the JSON file is renamed afterwards so it is
+        not imported again.
+
+        Args:
+            json_path: Path to the legacy JSON file
+
+        Returns:
+            Number of planets imported
+        """
+        path = Path(json_path)
+        if not path.exists():
+            return 0
+
+        with open(path, 'r') as f:
+            planets = json.load(f)
+
+        with self._connection() as conn:
+            conn.executemany(
+                f"INSERT OR IGNORE INTO planets ({', '.join(PLANET_COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in PLANET_COLUMNS)})",
+                [[planet.get('id')] + self._to_params(planet) for planet in planets]
+            )
+
+        path.rename(path.with_name(path.name + ".migrated"))
+        print(f"✅ Migrated {len(planets)} planets from {json_path} to {self.db_path}")
+
+        return len(planets)
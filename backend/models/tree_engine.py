@@ -0,0 +1,320 @@
+"""
+MODEL LAYER - Compiled Tree Ensemble Engine
+Flattened, array-based inference for random forest and boosted tree models
+"""
+
+import json
+from typing import Any, Optional, Tuple
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+from sklearn.preprocessing import StandardScaler
+import xgboost as xgb
+
+
+# Rows traversed at once are capped so the (rows, trees) node matrix stays small
+MAX_NODES_PER_STEP = 1 << 20
+
+AGGREGATE_MEAN = "mean"        # average of per-tree class probabilities (random forest)
+AGGREGATE_SOFTMAX = "softmax"  # per-class margin sums, softmax (multi-class boosting)
+AGGREGATE_SIGMOID = "sigmoid"  # single margin sum, logistic (binary boosting)
+
+
+def _fold_thresholds(threshold: np.ndarray, feature: np.ndarray,
+                     scaler: Optional[StandardScaler], strict: bool) -> np.ndarray:
+    """
+    Express split thresholds as "go left if x < boundary" in raw feature units
+
+    Both sklearn and XGBoost cast inputs to float32 before comparing
+    (z32 <= t and z32 < t respectively). Each test is first rewritten as
+    z < b, with b the float64 midpoint between the two float32 values
+    either side of the split, so splits placed exactly on a training value
+    agree with the native models. The scaler is then folded in:
+    (x - mean) / scale < b  is equivalent to  x < b * scale + mean,
+    as StandardScaler scales are always positive.
+    """
+    threshold = np.asarray(threshold, dtype=np.float64)
+    below = threshold.astype(np.float32)
+    if strict:
+        # z32 < t  <=>  z32 <= the float32 just below t
+        below = np.nextafter(below, np.float32(-np.inf))
+    else:
+        # z32 <= t  <=>  z32 <= the largest float32 not above t
+        below = np.where(below > threshold, np.nextafter(below, np.float32(-np.inf)), below)
+    above = np.nextafter(below, np.float32(np.inf))
+    threshold = (below.astype(np.float64) + above.astype(np.float64)) / 2
+
+    if scaler is None:
+        return threshold
+    if scaler.with_std:
+        threshold *= scaler.scale_[feature]
+    if scaler.with_mean:
+        threshold += scaler.mean_[feature]
+    return threshold
+
+
+class CompiledTreeEnsemble:
+    """
+    Tree ensemble flattened into contiguous NumPy arrays
+
+    All trees share one node table; a row goes to the left child when its
+    feature value is below the node's threshold. Leaves point to themselves
+    and compare against +inf, so every row can be advanced one level per
+    step for every tree at once, without per-tree Python calls or input
+    validation. The feature scaler is folded into the thresholds, so raw
+    (unscaled) features are passed in directly.
+    """
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray,
+                 children: np.ndarray, value: np.ndarray, roots: np.ndarray,
+                 depth: int, classes: np.ndarray, aggregate: str,
+                 learning_rate: float = 1.0,
+                 init: Optional[np.ndarray] = None):
+        """
+        Initialize from flattened arrays (see the from_* constructors)
+
+        Args:
+            feature: Split feature per node (int32)
+            threshold: Split threshold per node in raw feature units (float64)
+            children: Interleaved (right, left) child per node (int32, length 2 * nodes)
+            value: Leaf output per node, (nodes, outputs) for forests or (nodes,) for boosting
+            roots: Root node of each tree (int32)
+            depth: Maximum tree depth (number of traversal steps)
+            classes: Class labels, in model.classes_ order
+            aggregate: How leaf outputs are combined (mean, softmax or sigmoid)
+            learning_rate: Multiplier applied to summed leaf outputs
+            init: Initial margin per output, added before the link function
+        """
+        self.feature = np.ascontiguousarray(feature, dtype=np.int32)
+        self.threshold = np.ascontiguousarray(threshold, dtype=np.float64)
+        self.children = np.ascontiguousarray(children, dtype=np.int32)
+        self.value = np.ascontiguousarray(value, dtype=np.float64)
+        self.roots = np.ascontiguousarray(roots, dtype=np.int32)
+        self.depth = int(depth)
+        self.classes_ = np.asarray(classes)
+        self.aggregate = aggregate
+        self.learning_rate = float(learning_rate)
+        self.init = None if init is None else np.asarray(init, dtype=np.float64)
+
+    # ------------------------------------------------------------------
+    # Export
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_model(cls, model: Any, scaler: Optional[StandardScaler] = None) -> "CompiledTreeEnsemble":
+        """
+        Flatten a trained tree ensemble
+
+        Args:
+            model: Fitted RandomForestClassifier, GradientBoostingClassifier or XGBClassifier
+            scaler: Fitted scaler the model was trained behind, folded into the thresholds
+
+        Returns:
+            Compiled ensemble
+
+        Raises:
+            TypeError: If the model is not a supported tree ensemble
+        """
+        if isinstance(model, RandomForestClassifier):
+            return cls._from_random_forest(model, scaler)
+        if isinstance(model, GradientBoostingClassifier):
+            return cls._from_gradient_boosting(model, scaler)
+        if isinstance(model, xgb.XGBClassifier):
+            return cls._from_xgboost(model, scaler)
+        raise TypeError(f"Cannot compile {type(model).__name__}: not a supported tree ensemble")
+
+    @staticmethod
+    def _stack_sklearn_trees(trees, scaler) -> Tuple[np.ndarray, ...]:
+        """Concatenate sklearn Tree objects into one node table"""
+        features, thresholds, children, values, roots = [], [], [], [], []
+        depth = 0
+        offset = 0
+
+        for tree in trees:
+            n = tree.node_count
+            node_ids = np.arange(offset, offset + n, dtype=np.int64)
+            is_leaf = tree.children_left == -1
+
+            feature = np.where(is_leaf, 0, tree.feature)
+            threshold = _fold_thresholds(tree.threshold, feature, scaler, strict=False)
+            threshold[is_leaf] = np.inf
+
+            left = np.where(is_leaf, node_ids, tree.children_left + offset)
+            right = np.where(is_leaf, node_ids, tree.children_right + offset)
+            pairs = np.empty(2 * n, dtype=np.int64)
+            pairs[0::2] = right
+            pairs[1::2] = left
+
+            features.append(feature)
+            thresholds.append(threshold)
+            children.append(pairs)
+            values.append(tree.value[:, 0, :])
+            roots.append(offset)
+            depth = max(depth, tree.max_depth)
+            offset += n
+
+        return (np.concatenate(features), np.concatenate(thresholds),
+                np.concatenate(children), np.concatenate(values),
+                np.asarray(roots), depth)
+
+    @classmethod
+    def _from_random_forest(cls, model: RandomForestClassifier, scaler) -> "CompiledTreeEnsemble":
+        feature, threshold, children, value, roots, depth = cls._stack_sklearn_trees(
+            [est.tree_ for est in model.estimators_], scaler
+        )
+        # Leaves hold class counts (or fractions); forests average per-tree probabilities
+        totals = value.sum(axis=1, keepdims=True)
+        value = np.divide(value, totals, out=np.zeros_like(value), where=totals > 0)
+
+        return cls(feature, threshold, children, value, roots, depth,
+                   classes=model.classes_, aggregate=AGGREGATE_MEAN)
+
+    @classmethod
+    def _from_gradient_boosting(cls, model: GradientBoostingClassifier, scaler) -> "CompiledTreeEnsemble":
+        # estimators_ is (stages, outputs); flattening row-major keeps trees round-major
+        trees = [est.tree_ for est in model.estimators_.ravel()]
+        feature, threshold, children, value, roots, depth = cls._stack_sklearn_trees(trees, scaler)
+
+        n_outputs = model.estimators_.shape[1]
+        # The init estimator's raw prediction does not depend on the input
+        init = model._raw_predict_init(np.zeros((1, model.n_features_in_)))[0]
+
+        return cls(feature, threshold, children, value[:, 0], roots, depth,
+                   classes=model.classes_,
+                   aggregate=AGGREGATE_SOFTMAX if n_outputs > 1 else AGGREGATE_SIGMOID,
+                   learning_rate=model.learning_rate, init=init)
+
+    @classmethod
+    def _from_xgboost(cls, model: xgb.XGBClassifier, scaler) -> "CompiledTreeEnsemble":
+        learner = json.loads(model.get_booster().save_raw("json"))["learner"]
+        objective = learner["objective"]["name"]
+        booster = learner["gradient_booster"]
+        if booster["name"] != "gbtree":
+            raise TypeError(f"Cannot compile XGBoost booster {booster['name']}")
+        if objective not in ("multi:softprob", "multi:softmax", "binary:logistic"):
+            raise TypeError(f"Cannot compile XGBoost objective {objective}")
+
+        trees = booster["model"]["trees"]
+        n_outputs = max(1, int(learner["learner_model_param"]["num_class"]))
+        base_score = float(learner["learner_model_param"]["base_score"])
+
+        features, thresholds, children, values, roots = [], [], [], [], []
+        depth = 0
+        offset = 0
+
+        for tree in trees:
+            left_ids = np.asarray(tree["left_children"], dtype=np.int64)
+            right_ids = np.asarray(tree["right_children"], dtype=np.int64)
+            # Splits and leaf values are float32 in the booster
+            conditions = np.asarray(tree["split_conditions"], dtype=np.float32).astype(np.float64)
+            n = len(left_ids)
+            node_ids = np.arange(offset, offset + n, dtype=np.int64)
+            is_leaf = left_ids == -1
+
+            feature = np.where(is_leaf, 0, np.asarray(tree["split_indices"], dtype=np.int64))
+            threshold = _fold_thresholds(conditions, feature, scaler, strict=True)
+            threshold[is_leaf] = np.inf
+
+            pairs = np.empty(2 * n, dtype=np.int64)
+            pairs[0::2] = np.where(is_leaf, node_ids, right_ids + offset)
+            pairs[1::2] = np.where(is_leaf, node_ids, left_ids + offset)
+
+            features.append(feature)
+            thresholds.append(threshold)
+            children.append(pairs)
+            values.append(np.where(is_leaf, conditions, 0.0))
+            roots.append(offset)
+            depth = max(depth, cls._xgboost_depth(left_ids, right_ids))
+            offset += n
+
+        if n_outputs > 1:
+            # A constant margin shift does not change the softmax
+            aggregate, init = AGGREGATE_SOFTMAX, np.full(n_outputs, base_score)
+        else:
+            aggregate, init = AGGREGATE_SIGMOID, np.array([np.log(base_score / (1 - base_score))])
+
+        return cls(np.concatenate(features), np.concatenate(thresholds),
+                   np.concatenate(children), np.concatenate(values), np.asarray(roots),
+                   depth, classes=model.classes_, aggregate=aggregate, init=init)
+
+    @staticmethod
+    def _xgboost_depth(left_ids: np.ndarray, right_ids: np.ndarray) -> int:
+        """Depth of an XGBoost tree given its child arrays"""
+        depth = np.zeros(len(left_ids), dtype=np.int64)
+        # Children always have larger ids than their parent
+        for node in range(len(left_ids)):
+            if left_ids[node] != -1:
+                depth[left_ids[node]] = depth[right_ids[node]] = depth[node] + 1
+        return int(depth.max())
+
+    # ------------------------------------------------------------------
+    # Inference
+    # ------------------------------------------------------------------
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.feature)
+
+    def leaves(self, X: np.ndarray) -> np.ndarray:
+        """
+        Find the leaf reached in every tree for every row
+
+        Args:
+            X: Raw features, shape (rows, features), float64
+
+        Returns:
+            Leaf node ids, shape (rows, trees)
+        """
+        n_rows, n_features = X.shape
+        flat = X.reshape(-1)
+        row_base = (np.arange(n_rows, dtype=np.int64) * n_features)[:, None]
+
+        nodes = np.repeat(self.roots[None, :], n_rows, axis=0)
+        for _ in range(self.depth):
+            x = np.take(flat, row_base + np.take(self.feature, nodes))
+            go_left = np.less(x, np.take(self.threshold, nodes))
+            nodes = np.take(self.children, 2 * nodes + go_left)
+        return nodes
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """
+        Class probabilities for raw (unscaled) features
+
+        Args:
+            X: Raw features, shape (rows, features)
+
+        Returns:
+            Probabilities, shape (rows, classes), columns in classes_ order
+        """
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        step = max(1, MAX_NODES_PER_STEP // self.n_trees)
+        if len(X) <= step:
+            return self._predict_proba(X)
+        return np.concatenate([
+            self._predict_proba(X[start:start + step])
+            for start in range(0, len(X), step)
+        ])
+
+    def _predict_proba(self, X: np.ndarray) -> np.ndarray:
+        leaves = self.leaves(X)
+
+        if self.aggregate == AGGREGATE_MEAN:
+            return self.value[leaves].sum(axis=1) / self.n_trees
+
+        # Boosted trees are stored round by round, one tree per output
+        n_outputs = len(self.init)
+        margins = self.value[leaves].reshape(len(X), -1, n_outputs).sum(axis=1)
+        margins = self.init + self.learning_rate * margins
+
+        if self.aggregate == AGGREGATE_SIGMOID:
+            positive = 1.0 / (1.0 + np.exp(-margins[:, 0]))
+            return np.column_stack([1.0 - positive, positive])
+
+        margins -= margins.max(axis=1, keepdims=True)
+        np.exp(margins, out=margins)
+        margins /= margins.sum(axis=1, keepdims=True)
+        return margins
@@ -0,0 +1,9 @@
+"""
+Test configuration
+Puts the backend directory on the import path, as when the server runs from it
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
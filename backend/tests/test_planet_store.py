@@ -0,0 +1,65 @@
+"""
+Tests for the saved planets store
+"""
+
+import pytest
+
+from models.planet_store import PlanetStore
+
+
+def make_planet(name: str, prediction: str = "CONFIRMED", confidence: float = 0.9):
+    return {
+        "name": name,
+        "prediction": prediction,
+        "confidence": confidence,
+        "probabilities": {prediction: confidence},
+        "created_at": "2024-01-01T00:00:00"
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PlanetStore(str(tmp_path / "planets.db"))
+
+
+def test_count_applies_the_filters(store):
+    store.add(make_planet("a", "CONFIRMED", 0.9))
+    store.add(make_planet("b", "CONFIRMED", 0.5))
+    store.add(make_planet("c", "FALSE POSITIVE", 0.95))
+
+    assert store.count() == 3
+    assert store.count(prediction="CONFIRMED") == 2
+    assert store.count(prediction="CONFIRMED", min_confidence=0.8) == 1
+    assert store.count(name_prefix="c") == 1
+
+
+def names_with_prefix(store, prefix):
+    planets, _ = store.query(limit=None, sort_by="name", name_prefix=prefix)
+    return [planet["name"] for planet in planets]
+
+
+def test_name_prefix_boundaries(store):
+    for name in ["ab", "abc", "ab\U0010ffff", "ac", "aa\uffff", "b"]:
+        store.add(make_planet(name))
+
+    # A name equal to the prefix matches; the prefix followed by the next code point does not
+    assert names_with_prefix(store, "ab") == ["ab", "abc", "ab\U0010ffff"]
+    assert names_with_prefix(store, "a") == ["aa\uffff", "ab", "abc", "ab\U0010ffff", "ac"]
+    assert names_with_prefix(store, "abc") == ["abc"]
+    assert store.count(name_prefix="ab") == 3
+
+
+def test_name_prefix_ending_in_the_last_code_point(store):
+    for name in ["ab", "ab\U0010ffff", "ab\U0010ffffz", "ac", "\U0010ffff", "\U0010ffff\U0010ffff"]:
+        store.add(make_planet(name))
+
+    assert names_with_prefix(store, "ab\U0010ffff") == ["ab\U0010ffff", "ab\U0010ffffz"]
+    assert names_with_prefix(store, "\U0010ffff") == ["\U0010ffff", "\U0010ffff\U0010ffff"]
+    assert names_with_prefix(store, "\U0010ffff\U0010ffff") == ["\U0010ffff\U0010ffff"]
+
+
+def test_name_prefix_before_the_surrogate_range(store):
+    for name in ["x\ud7ff", "x\ud7ffa", "x", "y"]:
+        store.add(make_planet(name))
+
+    assert names_with_prefix(store, "x\ud7ff") == ["x\ud7ff", "x\ud7ffa"]
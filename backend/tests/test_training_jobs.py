@@ -0,0 +1,65 @@
+"""
+Tests for the training job queue
+"""
+
+import time
+
+from utils.training_jobs import (
+    FINISHED_STATES,
+    JOB_CANCELLED,
+    JOB_SUCCEEDED,
+    TrainingJobManager
+)
+
+
+def quick_runner(config, dataset_path):
+    """Runner that succeeds immediately"""
+    return {"metrics": {"job": config["name"]}, "model_version": None}
+
+
+def slow_runner(config, dataset_path):
+    """Runner that takes long enough to be cancelled while running"""
+    time.sleep(config.get("seconds", 0))
+    return {"metrics": {"job": config["name"]}, "model_version": None}
+
+
+def wait_for(condition, timeout: float = 60.0):
+    """Poll a condition until it holds or the timeout expires"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_keeps_only_the_most_recently_finished_jobs():
+    manager = TrainingJobManager("unused.csv", runner=quick_runner, max_finished_jobs=2)
+    job_ids = [manager.submit({"name": i})["job_id"] for i in range(4)]
+
+    assert wait_for(lambda: len(manager.list_jobs()) == 2 and all(
+        job["status"] in FINISHED_STATES for job in manager.list_jobs()
+    ))
+    assert [manager.get(job_id) for job_id in job_ids[:2]] == [None, None]
+    assert [manager.get(job_id)["status"] for job_id in job_ids[2:]] == [JOB_SUCCEEDED] * 2
+
+
+def test_cancelled_running_job_is_not_evicted_before_its_process_exits():
+    finished = []
+    manager = TrainingJobManager("unused.csv", runner=slow_runner, max_finished_jobs=1,
+                                 on_finish=finished.append)
+    running = manager.submit({"name": "a", "seconds": 30})["job_id"]
+    queued = manager.submit({"name": "b"})["job_id"]
+    last = manager.submit({"name": "c"})["job_id"]
+    assert wait_for(lambda: manager.get(running)["status"] == "running")
+
+    # The running job is cancelled first, then the queued one finishes after it
+    manager.cancel(running)
+    manager.cancel(queued)
+
+    # Reaping the cancelled process must still start the next queued job
+    assert wait_for(lambda: (manager.get(last) or {}).get("status") == JOB_SUCCEEDED)
+    assert {job["job_id"] for job in finished} >= {running, queued}
+    assert [job["status"] for job in finished[:2]] == [JOB_CANCELLED] * 2
+    assert len(manager.list_jobs()) == 1
+    manager.shutdown()
@@ -7,6 +7,8 @@ import numpy as np
 from typing import Dict, List, Any
 from pathlib import Path
 
+from utils.synthetic_data import generate_koi_dataset, write_koi_dataset
+
 
 def validate_features(features: Dict[str, float], required_features: List[str]) -> bool:
     """
@@ -22,44 +24,32 @@ def validate_features(features: Dict[str, float], required_features: List[str])
     return all(feature in features for feature in required_features)
 
 
-def load_sample_dataset() -> pd.DataFrame:
+def load_sample_dataset(n_rows: int = 300, seed: int = 42) -> pd.DataFrame:
     """
     Load a sample NASA exoplanet dataset
     This can be used for testing if no dataset is uploaded
     
+    Args:
+        n_rows: Number of rows
+        seed: Random seed; the same seed always gives the same rows
+        
     Returns:
-        Sample DataFrame
+        Sample DataFrame with the Kepler KOI columns
     """
-    # Create sample data based on Kepler dataset structure
-    sample_data = {
-        'koi_disposition': ['CONFIRMED', 'FALSE POSITIVE', 'CANDIDATE'] * 100,
-        'koi_period': np.random.uniform(0.5, 500, 300),
-        'koi_duration': np.random.uniform(1, 10, 300),
-        'koi_depth': np.random.uniform(100, 10000, 300),
-        'koi_prad': np.random.uniform(0.5, 20, 300),
-        'koi_teq': np.random.uniform(200, 2000, 300),
-        'koi_insol': np.random.uniform(0.1, 100, 300),
-        'koi_steff': np.random.uniform(3000, 7000, 300),
-        'koi_slogg': np.random.uniform(3.5, 5.0, 300),
-        'koi_srad': np.random.uniform(0.5, 2.5, 300),
-        'koi_smass': np.random.uniform(0.5, 2.0, 300),
-        'koi_impact': np.random.uniform(0, 1, 300),
-        'koi_model_snr': np.random.uniform(5, 100, 300),
-    }
-    
-    return pd.DataFrame(sample_data)
+    return generate_koi_dataset(n_rows, seed=seed)
 
 
-def create_sample_dataset_file(output_path: str = "./data/nasa_exoplanets.csv"):
+def create_sample_dataset_file(output_path: str = "./data/nasa_exoplanets.csv",
+                               n_rows: int = 300, seed: int = 42):
     """
     Create a sample dataset file for testing
     
     Args:
         output_path: Path where to save the CSV file
+        n_rows: Number of rows (written in chunks, so any size fits in memory)
+        seed: Random seed
     """
-    df = load_sample_dataset()
-    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(output_path, index=False)
+    write_koi_dataset(output_path, n_rows, seed=seed, file_format="csv")
     print(f"✅ Sample dataset created at {output_path}")
 
 
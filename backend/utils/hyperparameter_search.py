@@ -0,0 +1,292 @@
+"""
+Hyperparameter search with successive halving
+Evaluates candidate configurations in a process pool over shared, memory-mapped arrays
+"""
+
+import itertools
+import math
+import multiprocessing as mp
+import os
+import random
+import shutil
+import signal
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+from sklearn.metrics import accuracy_score, f1_score
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+
+from models.dataset_store import DatasetStore
+from models.exoplanet_model import ExoplanetModel, TRAINING_COLUMNS
+
+
+# Default search space per model type
+SEARCH_SPACES: Dict[str, Dict[str, List[Any]]] = {
+    "random_forest": {
+        "n_estimators": [50, 100, 200, 400],
+        "max_depth": [8, 12, 20, None],
+        "min_samples_leaf": [1, 2, 4],
+        "max_features": ["sqrt", 0.5, 1.0],
+    },
+    "xgboost": {
+        "n_estimators": [100, 200, 400],
+        "max_depth": [3, 4, 6, 8],
+        "learning_rate": [0.03, 0.1, 0.3],
+        "subsample": [0.7, 0.85, 1.0],
+        "colsample_bytree": [0.7, 1.0],
+    },
+    "gradient_boost": {
+        "n_estimators": [50, 100, 200],
+        "max_depth": [3, 4, 5],
+        "learning_rate": [0.05, 0.1, 0.2],
+        "subsample": [0.7, 1.0],
+    },
+    "svm": {
+        "C": [0.1, 1.0, 10.0, 100.0],
+        "gamma": ["scale", 0.01, 0.1, 1.0],
+    },
+    "sgd": {
+        "alpha": [0.00001, 0.0001, 0.001, 0.01],
+        "penalty": ["l2", "l1", "elasticnet"],
+    },
+}
+
+SEARCH_STRATEGIES = ["random", "grid"]
+SCORING_METRICS = ["f1_score", "accuracy"]
+
+# Model types whose estimators run threads of their own; pinned to one thread per worker
+THREADED_MODEL_TYPES = ["random_forest", "xgboost"]
+
+# Arrays shared with the pool workers, memory-mapped from .npy files
+SHARED_ARRAYS = ["X_train", "y_train", "X_val", "y_val"]
+_shared: Dict[str, np.ndarray] = {}
+
+
+def sample_candidates(model_types: List[str], strategy: str = "random", n_candidates: int = 16,
+                      search_spaces: Optional[Dict[str, Dict[str, List[Any]]]] = None,
+                      seed: int = 42) -> List[Dict[str, Any]]:
+    """
+    Build the candidate configurations to evaluate
+
+    Args:
+        model_types: Model types to search over
+        strategy: "grid" for every combination, "random" for a random sample of them
+        n_candidates: Number of candidates drawn by random search
+        search_spaces: Search space per model type (defaults to SEARCH_SPACES)
+        seed: Random seed for random search
+
+    Returns:
+        Candidates as {"candidate_id", "model_type", "params"} dictionaries
+    """
+    if strategy not in SEARCH_STRATEGIES:
+        raise ValueError(f"Unknown search strategy: {strategy}. Use one of: {', '.join(SEARCH_STRATEGIES)}")
+
+    spaces = {**SEARCH_SPACES, **(search_spaces or {})}
+    grid = []
+    for model_type in model_types:
+        if model_type not in spaces:
+            raise ValueError(f"No search space for model type: {model_type}")
+        names = list(spaces[model_type])
+        for values in itertools.product(*(spaces[model_type][name] for name in names)):
+            grid.append((model_type, dict(zip(names, values))))
+
+    if strategy == "random" and n_candidates < len(grid):
+        grid = random.Random(seed).sample(grid, n_candidates)
+
+    return [
+        {"candidate_id": i, "model_type": model_type, "params": params}
+        for i, (model_type, params) in enumerate(grid)
+    ]
+
+
+def halving_schedule(n_candidates: int, n_rows: int, eta: int = 3, min_rows: int = 500) -> List[int]:
+    """
+    Training rows used at each rung of successive halving
+
+    The last rung uses every training row; each earlier rung uses 1/eta of
+    the next. Rungs are dropped while the first one would have fewer than
+    min_rows rows, or once there are more rungs than halvings needed to get
+    down to a single candidate.
+
+    Args:
+        n_candidates: Number of candidates at the first rung
+        n_rows: Number of training rows
+        eta: Reduction factor between rungs
+        min_rows: Smallest number of rows a candidate is trained on
+
+    Returns:
+        Rows per rung, increasing
+    """
+    n_rungs = 1 + (math.floor(math.log(n_candidates, eta)) if n_candidates > 1 else 0)
+    while n_rungs > 1 and n_rows // eta ** (n_rungs - 1) < min_rows:
+        n_rungs -= 1
+    return [n_rows // eta ** (n_rungs - 1 - k) for k in range(n_rungs)]
+
+
+def _attach_shared_arrays(array_dir: str):
+    """Pool worker initializer: memory-map the shared arrays"""
+    for name in SHARED_ARRAYS:
+        _shared[name] = np.load(Path(array_dir) / f"{name}.npy", mmap_mode="r")
+
+    # Exit if the search process is killed (e.g. the job is cancelled);
+    # otherwise idle workers would wait for tasks forever
+    parent = os.getppid()
+
+    def exit_with_parent():
+        while os.getppid() == parent:
+            time.sleep(1)
+        os._exit(1)
+
+    threading.Thread(target=exit_with_parent, daemon=True).start()
+
+
+def _evaluate_candidate(candidate: Dict[str, Any], n_rows: int, scoring: str) -> Dict[str, Any]:
+    """Fit a candidate on the first n_rows training rows and score it on the validation set"""
+    model = ExoplanetModel(model_type=candidate["model_type"])
+    params = dict(candidate["params"])
+    if candidate["model_type"] in THREADED_MODEL_TYPES:
+        # Parallelism comes from the pool; avoid oversubscribing the cores
+        params["n_jobs"] = 1
+    model.model.set_params(**params)
+
+    start = time.perf_counter()
+    model.model.fit(_shared["X_train"][:n_rows], _shared["y_train"][:n_rows])
+    fit_time = time.perf_counter() - start
+
+    y_pred = model.model.predict(_shared["X_val"])
+    if scoring == "accuracy":
+        score = accuracy_score(_shared["y_val"], y_pred)
+    else:
+        score = f1_score(_shared["y_val"], y_pred, average="weighted", zero_division=0)
+
+    return {"score": float(score), "fit_time_s": fit_time}
+
+
+def _write_shared_arrays(df, array_dir: Path, validation_size: float, seed: int) -> Dict[str, Any]:
+    """Preprocess the dataset once and store the split, scaled arrays for the workers"""
+    model = ExoplanetModel()
+    X, y = model.preprocess_data(df)
+    X_train, X_val, y_train, y_val = train_test_split(
+        X, y, test_size=validation_size, random_state=seed, stratify=y
+    )
+    scaler = StandardScaler()
+    arrays = {
+        # Shuffled, so every prefix used by an early rung is a random subsample
+        "X_train": scaler.fit_transform(X_train),
+        "y_train": y_train.to_numpy(dtype=np.int64),
+        "X_val": scaler.transform(X_val),
+        "y_val": y_val.to_numpy(dtype=np.int64),
+    }
+    for name, array in arrays.items():
+        np.save(array_dir / f"{name}.npy", np.ascontiguousarray(array))
+
+    return {"n_train": len(X_train), "n_validation": len(X_val), "feature_names": model.feature_names}
+
+
+def run_search(config: Dict[str, Any], dataset_path: str) -> Dict[str, Any]:
+    """
+    Run a successive halving hyperparameter search
+
+    All candidates are trained on a small subsample first; only the best
+    1/eta of them move on to the next rung, which uses eta times as many
+    rows, until the survivors are trained on the full training split.
+
+    Args:
+        config: Search configuration (model types, strategy, candidates, eta, scoring, ...)
+        dataset_path: Path to the CSV dataset
+
+    Returns:
+        Ranked leaderboard and search summary
+    """
+    scoring = config.get("scoring", "f1_score")
+    if scoring not in SCORING_METRICS:
+        raise ValueError(f"Unknown scoring metric: {scoring}. Use one of: {', '.join(SCORING_METRICS)}")
+    eta = max(2, int(config.get("eta", 3)))
+    seed = int(config.get("seed", 42))
+
+    candidates = sample_candidates(
+        config.get("model_types") or ["random_forest", "xgboost", "gradient_boost"],
+        strategy=config.get("strategy", "random"),
+        n_candidates=int(config.get("n_candidates", 16)),
+        search_spaces=config.get("search_spaces"),
+        seed=seed
+    )
+    for candidate in candidates:
+        candidate.update({"scores": [], "fit_times_s": [], "rows": []})
+
+    df = DatasetStore(dataset_path).load(columns=TRAINING_COLUMNS)
+    n_workers = int(config.get("n_workers") or os.cpu_count() or 1)
+    started = time.perf_counter()
+
+    with tempfile.TemporaryDirectory(prefix="tune-") as array_dir:
+        if threading.current_thread() is threading.main_thread():
+            # Cancelling the job terminates this process; remove the arrays first
+            signal.signal(signal.SIGTERM, lambda *_: (shutil.rmtree(array_dir, ignore_errors=True),
+                                                      os._exit(1)))
+
+        data = _write_shared_arrays(df, Path(array_dir), config.get("validation_size", 0.2), seed)
+        del df
+        schedule = halving_schedule(len(candidates), data["n_train"], eta,
+                                    int(config.get("min_rows", 500)))
+
+        # Spawned workers: the search itself may run inside a threaded server process
+        with ProcessPoolExecutor(max_workers=n_workers, mp_context=mp.get_context("spawn"),
+                                 initializer=_attach_shared_arrays,
+                                 initargs=(array_dir,)) as pool:
+            survivors = candidates
+            for rung, n_rows in enumerate(schedule):
+                futures = [
+                    pool.submit(_evaluate_candidate, candidate, n_rows, scoring)
+                    for candidate in survivors
+                ]
+                for candidate, future in zip(survivors, futures):
+                    result = future.result()
+                    candidate["scores"].append(result["score"])
+                    candidate["fit_times_s"].append(result["fit_time_s"])
+                    candidate["rows"].append(n_rows)
+
+                print(f"Rung {rung}: {len(survivors)} candidates on {n_rows} rows")
+                if rung < len(schedule) - 1:
+                    survivors = sorted(survivors, key=lambda c: c["scores"][-1], reverse=True)
+                    survivors = survivors[:max(1, math.ceil(len(survivors) / eta))]
+
+    # Candidates that reached later rungs rank first, then by their last score
+    ranked = sorted(candidates, key=lambda c: (len(c["scores"]), c["scores"][-1]), reverse=True)
+    leaderboard = [
+        {
+            "rank": rank,
+            "candidate_id": c["candidate_id"],
+            "model_type": c["model_type"],
+            "params": c["params"],
+            "score": c["scores"][-1],
+            "rung": len(c["scores"]) - 1,
+            "rows": c["rows"][-1],
+            "fit_time_s": c["fit_times_s"][-1],
+            "total_fit_time_s": sum(c["fit_times_s"]),
+            "scores_by_rung": c["scores"]
+        }
+        for rank, c in enumerate(ranked, start=1)
+    ]
+
+    return {
+        "leaderboard": leaderboard,
+        "best": leaderboard[0],
+        "search": {
+            "strategy": config.get("strategy", "random"),
+            "scoring": scoring,
+            "n_candidates": len(candidates),
+            "eta": eta,
+            "rows_per_rung": schedule,
+            "n_workers": n_workers,
+            "n_train": data["n_train"],
+            "n_validation": data["n_validation"],
+            "feature_names": data["feature_names"],
+            "elapsed_s": time.perf_counter() - started
+        }
+    }
@@ -0,0 +1,166 @@
+"""
+Micro-batching dispatcher for single predictions
+Groups concurrent requests into one vectorized model call
+"""
+
+import asyncio
+import threading
+import time
+from typing import Dict, List, Any, Callable, Optional
+
+
+# Upper bounds of the batch size histogram buckets
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128, 256, 512]
+
+
+def _bucket_label(size: int) -> str:
+    """Histogram bucket label for a batch size, e.g. 5-8 or 513+"""
+    lower = 1
+    for bound in BATCH_SIZE_BUCKETS:
+        if size <= bound:
+            return str(bound) if lower == bound else f"{lower}-{bound}"
+        lower = bound + 1
+    return f"{lower}+"
+
+
+class MicroBatcher:
+    """
+    Collects items submitted within a short window and scores them together
+
+    A batch is dispatched when `max_batch_size` items are waiting or
+    `max_wait_ms` has passed since the first item of the batch arrived,
+    whichever comes first. Scoring runs in a worker thread so the event
+    loop keeps accepting requests while a batch is being scored.
+    """
+
+    def __init__(self, score_batch: Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]],
+                 max_batch_size: int = 64, max_wait_ms: float = 5.0):
+        """
+        Initialize the dispatcher
+
+        Args:
+            score_batch: Function scoring a list of items, returning one result per item
+            max_batch_size: Maximum number of items scored in one call
+            max_wait_ms: Maximum time the first item of a batch waits for others
+        """
+        self.score_batch = score_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max(0.0, max_wait_ms)
+
+        self._pending: List[tuple] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._stats_lock = threading.Lock()
+        self._reset_stats()
+
+    async def submit(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Queue an item and wait for its result
+
+        Args:
+            item: Item to score (e.g. a feature dictionary)
+
+        Returns:
+            Result for this item
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future, time.perf_counter()))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._dispatch(loop)
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_ms / 1000, self._dispatch, loop)
+
+        return await future
+
+    def stats(self) -> Dict[str, Any]:
+        """Get batch size and queueing delay statistics"""
+        with self._stats_lock:
+            batches = self._batches
+            items = self._items
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait_ms,
+                "batches": batches,
+                "requests": items,
+                "failed_batches": self._failed_batches,
+                "mean_batch_size": items / batches if batches else 0.0,
+                "largest_batch": self._largest_batch,
+                "batch_size_histogram": dict(self._size_histogram),
+                "mean_queue_delay_ms": self._queue_delay_ms / items if items else 0.0,
+                "max_queue_delay_ms": self._max_queue_delay_ms,
+                "mean_score_time_ms": self._score_time_ms / batches if batches else 0.0
+            }
+
+    def reset_stats(self):
+        """Reset all collected statistics"""
+        with self._stats_lock:
+            self._reset_stats()
+
+    def _reset_stats(self):
+        self._batches = 0
+        self._items = 0
+        self._failed_batches = 0
+        self._largest_batch = 0
+        self._queue_delay_ms = 0.0
+        self._max_queue_delay_ms = 0.0
+        self._score_time_ms = 0.0
+        self._size_histogram = {
+            _bucket_label(bound): 0 for bound in BATCH_SIZE_BUCKETS
+        }
+        self._size_histogram[_bucket_label(BATCH_SIZE_BUCKETS[-1] + 1)] = 0
+
+    def _dispatch(self, loop: asyncio.AbstractEventLoop):
+        """Take up to max_batch_size pending items and score them"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch = self._pending[:self.max_batch_size]
+        self._pending = self._pending[self.max_batch_size:]
+
+        # Items left over start the window for the next batch
+        if self._pending:
+            self._timer = loop.call_later(self.max_wait_ms / 1000, self._dispatch, loop)
+
+        if batch:
+            loop.create_task(self._score(loop, batch))
+
+    async def _score(self, loop: asyncio.AbstractEventLoop, batch: List[tuple]):
+        """Score a batch in a worker thread and resolve the waiting futures"""
+        started = time.perf_counter()
+        items = [item for item, _, _ in batch]
+
+        try:
+            results = await loop.run_in_executor(None, self.score_batch, items)
+            error = None
+        except Exception as e:
+            results = None
+            error = e
+
+        finished = time.perf_counter()
+        self._record(batch, started, finished, failed=error is not None)
+
+        for i, (_, future, _) in enumerate(batch):
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(results[i])
+
+    def _record(self, batch: List[tuple], started: float, finished: float, failed: bool):
+        """Update statistics for a scored batch"""
+        size = len(batch)
+        delays_ms = [(started - enqueued) * 1000 for _, _, enqueued in batch]
+        bucket = _bucket_label(size)
+
+        with self._stats_lock:
+            self._batches += 1
+            self._items += size
+            self._failed_batches += int(failed)
+            self._largest_batch = max(self._largest_batch, size)
+            self._size_histogram[bucket] += 1
+            self._queue_delay_ms += sum(delays_ms)
+            self._max_queue_delay_ms = max(self._max_queue_delay_ms, max(delays_ms))
+            self._score_time_ms += (finished - started) * 1000
@@ -0,0 +1,116 @@
+"""
+LRU cache for single predictions
+Keyed on the model version and the ordered feature vector
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Tuple
+
+
+class PredictionCache:
+    """
+    Bounded least-recently-used cache of prediction results
+
+    Keys combine the serving model's version with the feature values in
+    the model's feature order, so entries from a replaced model can never
+    be returned. Call `invalidate()` when the model is swapped to release
+    them early.
+    """
+
+    def __init__(self, max_size: int = 10000):
+        """
+        Initialize the cache
+
+        Args:
+            max_size: Maximum number of cached predictions (0 disables caching)
+        """
+        self.max_size = max(0, max_size)
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(model_version: Optional[str], feature_names: List[str],
+                 features: Dict[str, float]) -> Tuple:
+        """
+        Build a cache key from a feature dictionary
+
+        Missing values are normalized to 0, as the model fills them with 0.
+
+        Args:
+            model_version: Version of the model producing the prediction
+            feature_names: Model feature order
+            features: Dictionary of feature values
+
+        Returns:
+            Hashable cache key
+        """
+        values = []
+        for name in feature_names:
+            value = features[name]
+            values.append(0.0 if value is None or value != value else float(value))
+        return (model_version, tuple(values))
+
+    def get(self, key: Tuple) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached result, marking it as recently used
+
+        Args:
+            key: Cache key from make_key
+
+        Returns:
+            Cached prediction result, or None on a miss
+        """
+        if self.max_size == 0:
+            return None
+
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key: Tuple, result: Dict[str, Any]):
+        """
+        Store a result, evicting the least recently used entries when full
+
+        Args:
+            key: Cache key from make_key
+            result: Prediction result
+        """
+        if self.max_size == 0:
+            return
+
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self):
+        """Drop all cached predictions"""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache size and hit/miss/eviction counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "max_size": self.max_size,
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
@@ -0,0 +1,203 @@
+"""
+Opt-in per-request profiling
+Stage timings of one request, returned in a Server-Timing header, with an optional cProfile dump
+
+A request is profiled when it carries an `X-Profile` header or a `profile`
+query parameter ("1" for stage timings, "cprofile" to also dump a cProfile
+of the request). Code records stages with `stage(name)` or `record(name,
+seconds)`; both only look up a context variable when no profile is active,
+so unprofiled requests pay nothing measurable.
+"""
+
+import cProfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import parse_qs
+
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_QUERY_PARAM = "profile"
+# Flag values: stage timings only, or stage timings and a cProfile dump
+TIMING_VALUES = {"1", "true", "yes", "timing"}
+CPROFILE_VALUES = {"cprofile"}
+
+
+class RequestProfile:
+    """Stage timings of one profiled request or job"""
+
+    def __init__(self, dump_dir: Optional[str] = None):
+        """
+        Args:
+            dump_dir: Directory to write a cProfile dump to, or None for stage timings only
+        """
+        self.dump_dir = dump_dir
+        self.dump_path: Optional[str] = None
+        self.started = time.perf_counter()
+        # Seconds per stage, in the order stages were first recorded
+        self.stages: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float):
+        """Add time to a stage (repeated stages, e.g. per chunk, are summed)"""
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def stages_ms(self) -> Dict[str, float]:
+        """Stage timings in milliseconds"""
+        with self._lock:
+            return {name: seconds * 1000 for name, seconds in self.stages.items()}
+
+    def server_timing(self, total_s: Optional[float] = None) -> str:
+        """Stage timings as a Server-Timing header value, plus the total if given"""
+        entries = [f"{name};dur={ms:.3f}" for name, ms in self.stages_ms().items()]
+        if total_s is not None:
+            entries.append(f"total;dur={total_s * 1000:.3f}")
+        return ", ".join(entries)
+
+
+_current: ContextVar[Optional[RequestProfile]] = ContextVar("request_profile", default=None)
+
+# cProfile replaces the thread's profiler, so only one dump is captured at a time
+_cprofile_lock = threading.Lock()
+
+
+def active() -> Optional[RequestProfile]:
+    """The profile of the current request, or None if it is not profiled"""
+    return _current.get()
+
+
+def record(name: str, seconds: float):
+    """Add an already measured duration to the current profile, if any"""
+    profile = _current.get()
+    if profile is not None:
+        profile.add(name, seconds)
+
+
+@contextmanager
+def stage(name: str):
+    """Time the enclosed block as a stage of the current profile, if any"""
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add(name, time.perf_counter() - start)
+
+
+@contextmanager
+def profiled(dump_dir: Optional[str] = None, name: str = "profile"):
+    """
+    Profile the enclosed block
+
+    Args:
+        dump_dir: Directory to write a cProfile dump to, or None for stage timings only.
+            The dump is skipped if another one is being captured.
+        name: Prefix of the dump file name
+
+    Yields:
+        The active RequestProfile; its dump_path is set when a dump is captured
+    """
+    profile = RequestProfile(dump_dir)
+    profiler = None
+    if dump_dir and _cprofile_lock.acquire(blocking=False):
+        Path(dump_dir).mkdir(parents=True, exist_ok=True)
+        profile.dump_path = str(Path(dump_dir) / f"{time.strftime('%Y%m%d-%H%M%S')}-{name}-{uuid.uuid4().hex[:8]}.prof")
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    token = _current.set(profile)
+    try:
+        yield profile
+    finally:
+        _current.reset(token)
+        if profiler is not None:
+            profiler.disable()
+            _cprofile_lock.release()
+            try:
+                profiler.dump_stats(profile.dump_path)
+            except OSError as e:
+                print(f"⚠️ Failed to write profile {profile.dump_path}: {e}")
+                profile.dump_path = None
+
+
+def requested_mode(headers, query_string: bytes) -> Optional[str]:
+    """
+    Profiling mode asked for by a request
+
+    Returns:
+        "timing", "cprofile", or None if the request is not profiled
+    """
+    value = None
+    for key, header_value in headers:
+        if key == PROFILE_HEADER:
+            value = header_value.decode("latin-1")
+            break
+    if value is None and PROFILE_QUERY_PARAM.encode() in query_string:
+        values = parse_qs(query_string.decode("latin-1")).get(PROFILE_QUERY_PARAM)
+        value = values[-1] if values else None
+    if value is None:
+        return None
+
+    value = value.strip().lower()
+    if value in CPROFILE_VALUES:
+        return "cprofile"
+    if value in TIMING_VALUES:
+        return "timing"
+    return None
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware profiling requests that ask for it
+
+    The Server-Timing header lists the stages recorded until the response
+    starts, plus the total time to that point. Streamed bodies are
+    produced after the headers are sent, so their per-chunk stages only
+    appear in the cProfile dump. The dump covers code running on the event
+    loop thread (including other requests served meanwhile), not worker
+    threads or processes; its file name is returned in X-Profile-Dump.
+    """
+
+    def __init__(self, app, dump_dir: Optional[str] = None):
+        """
+        Args:
+            app: ASGI application
+            dump_dir: Directory for cProfile dumps; None disables dumps, and
+                requests asking for one get stage timings only
+        """
+        self.app = app
+        self.dump_dir = dump_dir
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        mode = requested_mode(scope["headers"], scope["query_string"])
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+
+        dump_dir = self.dump_dir if mode == "cprofile" else None
+        name = scope["method"].lower() + scope["path"].replace("/", "-")
+
+        with profiled(dump_dir, name) as profile:
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    total = time.perf_counter() - profile.started
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", profile.server_timing(total).encode("latin-1")))
+                    if profile.dump_path:
+                        headers.append((b"x-profile-dump", Path(profile.dump_path).name.encode("latin-1")))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,240 @@
+"""
+Content-negotiated response bodies for bulk endpoints
+JSON, MessagePack, Arrow IPC stream and CSV encodings chosen from the Accept header
+
+Documents (nested dictionaries) are encoded as JSON or MessagePack; tables
+(a dictionary of equal-length columns, NumPy arrays or lists) as Arrow or
+CSV, with the fields that are not per row sent as response headers. NumPy
+arrays are encoded directly (orjson, Arrow) or converted once per column,
+never per row. orjson, msgpack and pyarrow are optional: without orjson
+JSON falls back to the standard library, and formats whose library is
+missing are not offered.
+"""
+
+import io
+import json
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+
+from utils import profiling
+from utils.metrics import registry as metrics_registry
+
+try:
+    import orjson
+except ImportError:  # JSON is then encoded by the standard library
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # MessagePack is then not offered
+    msgpack = None
+
+try:
+    import pyarrow as pa
+except ImportError:  # Arrow is then not offered
+    pa = None
+
+
+MEDIA_TYPES = {
+    "json": "application/json",
+    "msgpack": "application/msgpack",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "csv": "text/csv"
+}
+# Media types accepted for each format besides its canonical one
+MEDIA_TYPE_ALIASES = {
+    "application/x-msgpack": "msgpack",
+    "application/vnd.msgpack": "msgpack",
+    "application/vnd.apache.arrow.file": "arrow",
+    "application/x-arrow": "arrow"
+}
+# Formats that encode tables rather than documents
+TABLE_FORMATS = {"arrow", "csv"}
+
+# Bytes; from 1 KB to 1 GB
+SIZE_BUCKETS = tuple(1024 * 4 ** i for i in range(11))
+
+ENCODE_SECONDS = metrics_registry.histogram(
+    "http_response_encode_seconds", "Time to encode bulk response bodies by format", ["format"]
+)
+ENCODED_BYTES = metrics_registry.histogram(
+    "http_response_body_bytes", "Size of bulk response bodies by format", ["format"], buckets=SIZE_BUCKETS
+)
+
+
+def available_formats() -> List[str]:
+    """Formats whose encoder is installed, JSON first"""
+    formats = ["json"]
+    if msgpack is not None:
+        formats.append("msgpack")
+    if pa is not None:
+        formats.append("arrow")
+    formats.append("csv")
+    return formats
+
+
+def negotiate(accept: Optional[str], formats: Optional[Sequence[str]] = None) -> Optional[str]:
+    """
+    Pick a response format from an Accept header
+
+    Media types are tried by decreasing quality, then in the order given;
+    wildcards (*/*, application/*) select JSON and text/* selects CSV.
+
+    Args:
+        accept: Accept header value, or None
+        formats: Formats the endpoint can produce (default: every available format)
+
+    Returns:
+        Format name, JSON when the header is missing, or None if no
+        acceptable format can be produced
+    """
+    formats = list(formats or available_formats())
+    if not accept or not accept.strip():
+        return "json" if "json" in formats else formats[0]
+
+    candidates = []
+    for position, entry in enumerate(accept.split(",")):
+        media_type, *params = [part.strip() for part in entry.split(";")]
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            candidates.append((-quality, position, media_type.lower()))
+
+    for _, _, media_type in sorted(candidates):
+        if media_type in ("*/*", "application/*"):
+            return "json" if "json" in formats else formats[0]
+        if media_type == "text/*":
+            fmt = "csv"
+        elif media_type in MEDIA_TYPE_ALIASES:
+            fmt = MEDIA_TYPE_ALIASES[media_type]
+        else:
+            fmt = next((name for name, canonical in MEDIA_TYPES.items() if canonical == media_type), None)
+        if fmt in formats:
+            return fmt
+    return None
+
+
+def _to_builtin(value: Any) -> Any:
+    """Fallback for values the JSON and MessagePack encoders do not handle natively"""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return jsonable_encoder(value)
+
+
+def encode_json(document: Any) -> bytes:
+    """
+    Encode a document as JSON
+
+    With orjson, contiguous numeric NumPy arrays are serialized without
+    converting them to lists, and NaN becomes null; the standard library
+    fallback rejects NaN, like FastAPI's default response.
+    """
+    if orjson is not None:
+        return orjson.dumps(document, default=_to_builtin,
+                            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(document, default=_to_builtin, ensure_ascii=False, allow_nan=False,
+                      separators=(",", ":")).encode()
+
+
+def encode_msgpack(document: Any) -> bytes:
+    """Encode a document as MessagePack; NumPy arrays become arrays of their values"""
+    return msgpack.packb(document, default=_to_builtin, use_bin_type=True)
+
+
+def encode_arrow(columns: Dict[str, Any], metadata: Optional[Dict[str, Any]] = None) -> bytes:
+    """
+    Encode a table as an Arrow IPC stream with one record batch
+
+    Args:
+        columns: Column name to values
+        metadata: Fields that are not per row, stored JSON-encoded in the schema metadata
+    """
+    # Numeric arrays are wrapped without copying; object columns (strings,
+    # numbers with None) are typed by inference, with NaN and None as nulls
+    arrays = [pa.array(values, from_pandas=True) for values in columns.values()]
+    batch = pa.RecordBatch.from_arrays(arrays, names=list(columns))
+    if metadata:
+        batch = batch.replace_schema_metadata({key: json.dumps(value) for key, value in metadata.items()})
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
+
+
+def encode_csv(columns: Dict[str, Any]) -> bytes:
+    """Encode a table as CSV with a header row"""
+    frame = pd.DataFrame(columns, copy=False)
+    buffer = io.StringIO()
+    frame.to_csv(buffer, index=False)
+    return buffer.getvalue().encode()
+
+
+def metadata_headers(metadata: Dict[str, Any]) -> Dict[str, str]:
+    """Fields that are not per row as X- headers (e.g. next_cursor as X-Next-Cursor)"""
+    headers = {}
+    for key, value in metadata.items():
+        if value is None:
+            continue
+        name = "x-" + key.replace("_", "-")
+        headers[name] = value if isinstance(value, str) else json.dumps(value, separators=(",", ":"))
+    return headers
+
+
+def _response(fmt: str, encode, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Encode a body, timed as the "encode" stage and recorded per format"""
+    start = time.perf_counter()
+    with profiling.stage("encode"):
+        body = encode()
+    ENCODE_SECONDS.labels(fmt).observe(time.perf_counter() - start)
+    ENCODED_BYTES.labels(fmt).observe(len(body))
+    return Response(content=body, media_type=MEDIA_TYPES[fmt], headers=headers)
+
+
+def document_response(fmt: str, document: Dict[str, Any]) -> Response:
+    """
+    Build a JSON or MessagePack response
+
+    Args:
+        fmt: "json" or "msgpack"
+        document: Response body
+
+    Returns:
+        Encoded response
+    """
+    if fmt == "msgpack":
+        return _response(fmt, lambda: encode_msgpack(document))
+    return _response("json", lambda: encode_json(document))
+
+
+def table_response(fmt: str, columns: Dict[str, Any], metadata: Optional[Dict[str, Any]] = None) -> Response:
+    """
+    Build an Arrow or CSV response
+
+    Args:
+        fmt: "arrow" or "csv"
+        columns: Column name to values, all of the same length
+        metadata: Fields that are not per row, sent as X- headers
+            (and, for Arrow, also in the schema metadata)
+
+    Returns:
+        Encoded response
+    """
+    metadata = metadata or {}
+    headers = metadata_headers(metadata)
+    if fmt == "arrow":
+        return _response(fmt, lambda: encode_arrow(columns, metadata), headers)
+    return _response("csv", lambda: encode_csv(columns), headers)
@@ -0,0 +1,314 @@
+"""
+Synthetic KOI dataset generator
+Produces any number of Kepler-like rows deterministically from a seed, in chunks
+
+Rows are generated in fixed-size blocks, each from its own random stream
+derived from (seed, block index), so row i is the same whatever the chunk
+size or total number of rows: a smaller dataset is a prefix of a larger one.
+
+Features follow simple physical relations (Kepler's third law, transit depth
+from the radius ratio, equilibrium temperature and insolation from the star)
+with per-class planet radius, impact parameter, depth and noise
+distributions, so models have a real signal to learn.
+
+Run from the backend directory:
+    python -m utils.synthetic_data --rows 10000000 --output data/synthetic_koi.parquet
+"""
+
+import argparse
+import time
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet output needs pyarrow; CSV is written by pandas without it
+    pa = None
+    pa_csv = None
+    pq = None
+
+
+LABEL_COLUMN = "koi_disposition"
+
+# Class shares of the Kepler cumulative KOI table (roughly)
+DEFAULT_CLASS_WEIGHTS = {
+    "FALSE POSITIVE": 0.50,
+    "CONFIRMED": 0.29,
+    "CANDIDATE": 0.21,
+}
+
+FEATURE_COLUMNS = [
+    'koi_period', 'koi_duration', 'koi_depth', 'koi_prad', 'koi_teq', 'koi_insol',
+    'koi_steff', 'koi_slogg', 'koi_srad', 'koi_smass', 'koi_impact', 'koi_model_snr'
+]
+
+# Rows per generation block; every block has its own random stream
+BLOCK_ROWS = 16_384
+DEFAULT_CHUNK_ROWS = 262_144
+
+# Per-class distributions: planet radius (log-normal, Earth radii), impact
+# parameter upper bound, depth dilution (log-normal) and noise scale
+CLASS_PROFILES = {
+    "CONFIRMED": {"prad_median": 2.2, "prad_sigma": 0.7, "impact_max": 0.9,
+                  "dilution_sigma": 0.0, "noise_scale": 1.0},
+    "CANDIDATE": {"prad_median": 2.0, "prad_sigma": 0.9, "impact_max": 1.0,
+                  "dilution_sigma": 0.3, "noise_scale": 1.6},
+    "FALSE POSITIVE": {"prad_median": 6.0, "prad_sigma": 1.2, "impact_max": 1.3,
+                       "dilution_sigma": 1.0, "noise_scale": 1.3},
+}
+
+# Decimals kept per column, as published in the KOI table
+COLUMN_DECIMALS = {
+    'koi_period': 6, 'koi_duration': 4, 'koi_depth': 1, 'koi_prad': 2, 'koi_teq': 0,
+    'koi_insol': 2, 'koi_steff': 0, 'koi_slogg': 3, 'koi_srad': 3, 'koi_smass': 3,
+    'koi_impact': 3, 'koi_model_snr': 1
+}
+
+EARTH_TO_SUN_RADIUS = 0.009158
+SUN_RADIUS_AU = 0.00465
+SUN_TEFF = 5778.0
+OBSERVATION_DAYS = 1460.0
+
+
+def _generate_block(seed: int, block: int, n_rows: int, labels: np.ndarray,
+                    class_probs: np.ndarray, missing_rates: Dict[str, float],
+                    start_index: int) -> pd.DataFrame:
+    """Generate one block of rows from its own random stream"""
+    rng = np.random.default_rng([seed, block])
+
+    label_idx = rng.choice(len(labels), size=n_rows, p=class_probs)
+    profile = {
+        key: np.array([CLASS_PROFILES[label][key] for label in labels])[label_idx]
+        for key in CLASS_PROFILES["CONFIRMED"]
+    }
+
+    # Host star
+    steff = np.clip(rng.normal(5600.0, 800.0, n_rows), 2500.0, 12000.0)
+    srad = np.exp(rng.normal(0.0, 0.35, n_rows))
+    smass = np.clip(rng.normal(1.0, 0.2, n_rows), 0.1, 3.0)
+    slogg = 4.438 + np.log10(smass / srad ** 2) + rng.normal(0.0, 0.05, n_rows)
+
+    # Orbit and planet
+    period = np.exp(rng.uniform(np.log(0.5), np.log(500.0), n_rows))
+    prad = np.clip(profile["prad_median"] * np.exp(rng.standard_normal(n_rows) * profile["prad_sigma"]),
+                   0.3, 300.0)
+    impact = rng.uniform(0.0, 1.0, n_rows) * profile["impact_max"]
+
+    a_au = np.cbrt(smass * (period / 365.25) ** 2)
+    teq = steff * np.sqrt(srad * SUN_RADIUS_AU / (2 * a_au))
+    insol = srad ** 2 * (steff / SUN_TEFF) ** 4 / a_au ** 2
+
+    chord = np.sqrt(np.clip(1 - np.minimum(impact, 1.0) ** 2, 0.01, 1.0))
+    duration = 13.0 * (period / 365.25) ** (1 / 3) * srad * smass ** (-1 / 3) * chord
+
+    ratio = prad * EARTH_TO_SUN_RADIUS / srad
+    depth = np.minimum(ratio ** 2 * np.exp(rng.standard_normal(n_rows) * profile["dilution_sigma"]), 1.0) * 1e6
+    noise = 60.0 * profile["noise_scale"] * np.exp(rng.normal(0.0, 0.4, n_rows))
+    snr = depth / noise * np.sqrt(OBSERVATION_DAYS / period)
+
+    df = pd.DataFrame({
+        "kepoi_name": [f"S{i:09d}.01" for i in range(start_index, start_index + n_rows)],
+        LABEL_COLUMN: labels[label_idx],
+        "koi_period": period,
+        "koi_duration": duration,
+        "koi_depth": depth,
+        "koi_prad": prad,
+        "koi_teq": teq,
+        "koi_insol": insol,
+        "koi_steff": steff,
+        "koi_slogg": slogg,
+        "koi_srad": srad,
+        "koi_smass": smass,
+        "koi_impact": impact,
+        "koi_model_snr": snr,
+    })
+
+    df = df.round(COLUMN_DECIMALS)
+
+    for column, rate in missing_rates.items():
+        if rate > 0:
+            df.loc[rng.random(n_rows) < rate, column] = np.nan
+
+    return df
+
+
+def _normalize_options(class_weights: Optional[Dict[str, float]],
+                       missing_rate: Union[float, Dict[str, float]]):
+    """Validate the class weights and missing-value rates"""
+    weights = class_weights or DEFAULT_CLASS_WEIGHTS
+    unknown = [label for label in weights if label not in CLASS_PROFILES]
+    if unknown:
+        raise ValueError(f"Unknown classes: {', '.join(unknown)}. Use: {', '.join(CLASS_PROFILES)}")
+    total = sum(weights.values())
+    if total <= 0 or any(w < 0 for w in weights.values()):
+        raise ValueError("Class weights must be non-negative and not all zero")
+
+    labels = np.array(list(weights))
+    class_probs = np.array([weights[label] / total for label in labels])
+
+    if isinstance(missing_rate, dict):
+        missing_rates = dict(missing_rate)
+        unknown = [col for col in missing_rates if col not in FEATURE_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown feature columns: {', '.join(unknown)}")
+    else:
+        missing_rates = {col: float(missing_rate) for col in FEATURE_COLUMNS}
+    if any(not 0 <= rate <= 1 for rate in missing_rates.values()):
+        raise ValueError("Missing-value rates must be between 0 and 1")
+
+    return labels, class_probs, missing_rates
+
+
+def generate_koi_chunks(n_rows: int, seed: int = 42, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                        class_weights: Optional[Dict[str, float]] = None,
+                        missing_rate: Union[float, Dict[str, float]] = 0.0) -> Iterator[pd.DataFrame]:
+    """
+    Generate a synthetic KOI dataset chunk by chunk
+
+    Args:
+        n_rows: Total number of rows
+        seed: Random seed; the same seed and options always give the same rows
+        chunk_rows: Rows per yielded chunk (rounded up to a multiple of BLOCK_ROWS)
+        class_weights: Relative share of each disposition (defaults to DEFAULT_CLASS_WEIGHTS)
+        missing_rate: Fraction of missing values, for every feature column or per column
+
+    Yields:
+        DataFrames with a kepoi_name, the koi_disposition label and the feature columns
+    """
+    if n_rows < 1:
+        raise ValueError("n_rows must be at least 1")
+    labels, class_probs, missing_rates = _normalize_options(class_weights, missing_rate)
+    blocks_per_chunk = max(1, -(-chunk_rows // BLOCK_ROWS))
+
+    block = 0
+    generated = 0
+    while generated < n_rows:
+        parts = []
+        for _ in range(blocks_per_chunk):
+            size = min(BLOCK_ROWS, n_rows - generated)
+            if size <= 0:
+                break
+            # Always draw a whole block, so the rows do not depend on n_rows
+            part = _generate_block(seed, block, BLOCK_ROWS, labels, class_probs,
+                                   missing_rates, generated)
+            parts.append(part if size == BLOCK_ROWS else part.iloc[:size])
+            block += 1
+            generated += size
+        yield parts[0] if len(parts) == 1 else pd.concat(parts, ignore_index=True)
+
+
+def generate_koi_dataset(n_rows: int, seed: int = 42,
+                         class_weights: Optional[Dict[str, float]] = None,
+                         missing_rate: Union[float, Dict[str, float]] = 0.0) -> pd.DataFrame:
+    """
+    Generate a synthetic KOI dataset in memory
+
+    Args:
+        n_rows: Number of rows
+        seed: Random seed
+        class_weights: Relative share of each disposition
+        missing_rate: Fraction of missing values, for every feature column or per column
+
+    Returns:
+        Dataset DataFrame (the same rows write_koi_dataset produces for these options)
+    """
+    return next(generate_koi_chunks(n_rows, seed, n_rows, class_weights, missing_rate))
+
+
+def write_koi_dataset(output_path: str, n_rows: int, seed: int = 42,
+                      chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                      class_weights: Optional[Dict[str, float]] = None,
+                      missing_rate: Union[float, Dict[str, float]] = 0.0,
+                      file_format: Optional[str] = None) -> Dict[str, float]:
+    """
+    Stream a synthetic KOI dataset to a CSV or Parquet file
+
+    Only one chunk is held in memory at a time; each chunk becomes a row
+    group of the Parquet file.
+
+    Args:
+        output_path: Destination file
+        n_rows: Number of rows
+        seed: Random seed
+        chunk_rows: Rows generated and written at a time
+        class_weights: Relative share of each disposition
+        missing_rate: Fraction of missing values, for every feature column or per column
+        file_format: "csv" or "parquet" (inferred from the file extension when omitted)
+
+    Returns:
+        Rows written, file size and elapsed time
+    """
+    path = Path(output_path)
+    file_format = file_format or ("parquet" if path.suffix in (".parquet", ".pq") else "csv")
+    if file_format not in ("csv", "parquet"):
+        raise ValueError(f"Unsupported format: {file_format}. Use 'csv' or 'parquet'")
+    if file_format == "parquet" and pq is None:
+        raise ImportError("Parquet output requires pyarrow")
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+    written = 0
+    writer = None
+
+    try:
+        for chunk in generate_koi_chunks(n_rows, seed, chunk_rows, class_weights, missing_rate):
+            if file_format == "csv" and pa_csv is None:
+                chunk.to_csv(path, mode="w" if written == 0 else "a", header=written == 0, index=False)
+            elif file_format == "csv":
+                # Several times faster than DataFrame.to_csv
+                with open(path, "wb" if written == 0 else "ab") as f:
+                    pa_csv.write_csv(pa.Table.from_pandas(chunk, preserve_index=False), f,
+                                     pa_csv.WriteOptions(include_header=written == 0))
+            else:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(str(path), table.schema)
+                writer.write_table(table)
+            written += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return {
+        "rows": written,
+        "bytes": path.stat().st_size if path.exists() else 0,
+        "elapsed_s": time.perf_counter() - start
+    }
+
+
+def _parse_class_weights(value: str) -> Dict[str, float]:
+    """Parse "CONFIRMED=0.3,CANDIDATE=0.2,FALSE POSITIVE=0.5" """
+    weights = {}
+    for item in value.split(","):
+        label, _, weight = item.partition("=")
+        weights[label.strip().upper()] = float(weight)
+    return weights
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, required=True, help="Number of rows to generate")
+    parser.add_argument("--output", required=True, help="Output file (.csv or .parquet)")
+    parser.add_argument("--format", choices=["csv", "parquet"], help="Defaults to the file extension")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument("--class-weights", type=_parse_class_weights,
+                        help='e.g. "CONFIRMED=0.3,CANDIDATE=0.2,FALSE POSITIVE=0.5"')
+    parser.add_argument("--missing-rate", type=float, default=0.0,
+                        help="Fraction of missing values in every feature column")
+    args = parser.parse_args()
+
+    result = write_koi_dataset(args.output, args.rows, seed=args.seed, chunk_rows=args.chunk_rows,
+                               class_weights=args.class_weights, missing_rate=args.missing_rate,
+                               file_format=args.format)
+    print(f"✅ Wrote {result['rows']:,} rows ({result['bytes'] / 1e6:.1f} MB) to {args.output} "
+          f"in {result['elapsed_s']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,585 @@
+"""
+Background training job queue
+Runs model training in separate worker processes so the API stays responsive
+"""
+
+import multiprocessing as mp
+import sys
+import threading
+import time
+import traceback
+import uuid
+from collections import deque
+from datetime import datetime
+from functools import partial
+from typing import Dict, List, Any, Optional, Callable
+
+import numpy as np
+
+from models.dataset_store import DatasetStore, iter_file_chunks, INGEST_CHUNK_ROWS
+from models.exoplanet_model import (
+    ExoplanetModel, TRAINING_COLUMNS, TREE_MODEL_TYPES, OUT_OF_CORE_EPOCHS, DISTILLATION_STUDENT_PARAMS
+)
+from models.model_registry import ModelRegistry
+from utils import profiling
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; peak memory is then not reported
+    resource = None
+
+
+# Job lifecycle states
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+FINISHED_STATES = {JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED}
+
+# Random rows added to the distillation transfer set, and rows timed to compare latencies
+DISTILLATION_SYNTHETIC_ROWS = 20_000
+LATENCY_SAMPLE_ROWS = 1_000
+
+
+def run_training(config: Dict[str, Any], dataset_path: str,
+                 registry_root: str = "./models/registry",
+                 max_versions: int = 20) -> Dict[str, Any]:
+    """
+    Train a model from a training configuration and publish it to the registry
+
+    Args:
+        config: Training configuration (model type, test size, hyperparameters)
+        dataset_path: Path to the CSV dataset
+        registry_root: Root directory of the model registry
+        max_versions: Versions the registry keeps on disk when publishing
+
+    Returns:
+        Training metrics and the published model version
+    """
+    if config.get('mode') == 'incremental':
+        return run_incremental_training(config, dataset_path, registry_root, max_versions)
+    if config.get('mode') == 'out_of_core':
+        return run_out_of_core_training(config, dataset_path, registry_root, max_versions)
+
+    # Only the label and feature columns are read from the columnar cache
+    store = DatasetStore(dataset_path)
+    with profiling.stage("load_dataset"):
+        df = store.load(columns=TRAINING_COLUMNS)
+
+    model = _configured_model(config, config.get('model_type', 'random_forest'))
+
+    X, y = model.preprocess_data(df)
+    metrics = model.train(X, y, test_size=config.get('test_size', 0.2))
+    metrics['dataset'] = _dataset_fingerprint(store, len(df))
+    with profiling.stage("publish"):
+        version = ModelRegistry(registry_root, max_versions=max_versions).publish(model)
+    metrics['peak_rss_mb'] = _peak_rss_mb()
+
+    return {"metrics": metrics, "model_version": version}
+
+
+def _configured_model(config: Dict[str, Any], model_type: str) -> ExoplanetModel:
+    """New model of the given type with the configuration's hyperparameters"""
+    model = ExoplanetModel(model_type=model_type)
+
+    # Update hyperparameters if provided (tree sizes only apply to tree ensembles)
+    params = {}
+    if config.get('n_estimators') and model_type in TREE_MODEL_TYPES:
+        params['n_estimators'] = config['n_estimators']
+    if config.get('max_depth') and model_type in TREE_MODEL_TYPES:
+        params['max_depth'] = config['max_depth']
+    if config.get('learning_rate') and model_type in ['xgboost', 'gradient_boost']:
+        params['learning_rate'] = config['learning_rate']
+    params.update(config.get('params') or {})
+
+    if params:
+        model.update_hyperparameters(params)
+    return model
+
+
+def run_incremental_training(config: Dict[str, Any], dataset_path: str,
+                             registry_root: str = "./models/registry",
+                             max_versions: int = 20) -> Dict[str, Any]:
+    """
+    Continue training a published model on the current dataset and publish the result
+
+    The base version (the serving version unless `base_version` is given)
+    gets `additional_estimators` more trees or boosting rounds. If it cannot
+    be trained incrementally (unsupported model type, or data the fitted
+    scaler no longer fits), a new model with the same hyperparameters is
+    trained from scratch, unless `fallback_to_full` is false.
+
+    Args:
+        config: Training configuration (base version, additional estimators, test size)
+        dataset_path: Path to the CSV dataset
+        registry_root: Root directory of the model registry
+        max_versions: Versions the registry keeps on disk when publishing
+
+    Returns:
+        Training metrics and the published model version
+    """
+    registry = ModelRegistry(registry_root, max_versions=max_versions)
+    base_version = config.get('base_version') or registry.current_version()
+    if base_version is None:
+        raise ValueError("No trained model to continue training. Train a model first.")
+
+    with profiling.stage("load_model"):
+        model = registry.load(base_version, warm_up=False)
+    store = DatasetStore(dataset_path)
+    with profiling.stage("load_dataset"):
+        df = store.load(columns=TRAINING_COLUMNS)
+    X, y = model.preprocess_data(df)
+    test_size = config.get('test_size', 0.2)
+
+    try:
+        metrics = model.train_incremental(X, y, config.get('additional_estimators') or 50, test_size)
+    except ValueError as e:
+        if not config.get('fallback_to_full', True):
+            raise
+        print(f"⚠️ {e}; training from scratch instead")
+        params = model.model.get_params()
+        model = ExoplanetModel(model_type=model.model_type)
+        model.update_hyperparameters(params)
+        X, y = model.preprocess_data(df)
+        metrics = model.train(X, y, test_size=test_size)
+        metrics['fallback_reason'] = str(e)
+
+    metrics['base_version'] = base_version
+    metrics['dataset'] = _dataset_fingerprint(store, len(df))
+    with profiling.stage("publish"):
+        version = registry.publish(model)
+    metrics['peak_rss_mb'] = _peak_rss_mb()
+
+    return {"metrics": metrics, "model_version": version}
+
+
+def run_out_of_core_training(config: Dict[str, Any], dataset_path: str,
+                             registry_root: str = "./models/registry",
+                             max_versions: int = 20) -> Dict[str, Any]:
+    """
+    Train a model on a dataset streamed in chunks and publish it
+
+    For datasets larger than memory: only one chunk of rows (plus the
+    evaluation sample) is held at a time. dataset_path is the stored CSV
+    dataset (read from its columnar cache when fresh), or any CSV, Parquet
+    or Feather file, e.g. one written by utils.synthetic_data.
+
+    Args:
+        config: Training configuration (model type "xgboost" or "sgd",
+            hyperparameters, test size, chunk rows, epochs)
+        dataset_path: Path to the dataset file
+        registry_root: Root directory of the model registry
+        max_versions: Versions the registry keeps on disk when publishing
+
+    Returns:
+        Training metrics and the published model version
+    """
+    model = _configured_model(config, config.get('model_type', 'xgboost'))
+    chunk_rows = config.get('chunk_rows') or INGEST_CHUNK_ROWS
+
+    store = DatasetStore(dataset_path)
+    if store.csv_path.suffix.lower() == ".csv":
+        chunks = partial(store.iter_chunks, TRAINING_COLUMNS, chunk_rows)
+    else:
+        chunks = partial(iter_file_chunks, dataset_path, TRAINING_COLUMNS, chunk_rows)
+
+    # XGBoost's external-memory pages are written next to the dataset
+    metrics = model.train_out_of_core(
+        chunks,
+        test_size=config.get('test_size', 0.2),
+        epochs=config.get('epochs') or OUT_OF_CORE_EPOCHS,
+        cache_dir=str(store.csv_path.parent)
+    )
+    metrics['dataset'] = _dataset_fingerprint(store, metrics['n_samples'], build_cache=False)
+    with profiling.stage("publish"):
+        version = ModelRegistry(registry_root, max_versions=max_versions).publish(model)
+    metrics['peak_rss_mb'] = _peak_rss_mb()
+
+    return {"metrics": metrics, "model_version": version}
+
+
+def run_distillation(config: Dict[str, Any], dataset_path: str,
+                     registry_root: str = "./models/registry",
+                     max_versions: int = 20) -> Dict[str, Any]:
+    """
+    Distill a published model into a compact student model and publish the student
+
+    The student (shallow XGBoost trees by default, or the linear "sgd"
+    model) is trained on the teacher's probabilities and timed against it,
+    single rows and batches, in the backend it would be served with.
+
+    Args:
+        config: Distillation configuration (teacher version, student type,
+            student hyperparameters, synthetic rows, test size)
+        dataset_path: Path to the CSV dataset
+        registry_root: Root directory of the model registry
+        max_versions: Versions the registry keeps on disk when publishing
+
+    Returns:
+        Student metrics (with the accuracy/latency comparison), the published
+        student version and the teacher version
+    """
+    registry = ModelRegistry(registry_root, max_versions=max_versions)
+    teacher_version = config.get('teacher_version') or registry.current_version()
+    if teacher_version is None:
+        raise ValueError("No trained model to distill. Train a model first.")
+
+    with profiling.stage("load_model"):
+        teacher = registry.load(teacher_version, warm_up=False)
+    store = DatasetStore(dataset_path)
+    with profiling.stage("load_dataset"):
+        df = store.load(columns=TRAINING_COLUMNS)
+
+    student_type = config.get('student_type', 'xgboost')
+    student = ExoplanetModel(model_type=student_type)
+    params = {**DISTILLATION_STUDENT_PARAMS.get(student_type, {}), **(config.get('params') or {})}
+    if params:
+        student.update_hyperparameters(params)
+
+    X, y = student.preprocess_data(df)
+    synthetic_rows = config.get('synthetic_rows')
+    metrics = student.train_distilled(
+        teacher, X, y,
+        synthetic_rows=DISTILLATION_SYNTHETIC_ROWS if synthetic_rows is None else synthetic_rows,
+        test_size=config.get('test_size', 0.2)
+    )
+
+    with profiling.stage("latency"):
+        # Each model as it is served: tree ensembles through the compiled engine when it matches
+        for model in (teacher, student):
+            if model.model_type in TREE_MODEL_TYPES and model.inference_backend != "compiled":
+                model.set_inference_backend("compiled")
+        teacher_latency = _latency_profile(teacher)
+        student_latency = _latency_profile(student)
+    metrics['latency'] = {
+        "teacher": teacher_latency,
+        "student": student_latency,
+        "single_speedup": teacher_latency["single_p50_us"] / student_latency["single_p50_us"],
+        "batch_speedup": teacher_latency["batch_us_per_row"] / student_latency["batch_us_per_row"]
+    }
+    metrics['dataset'] = _dataset_fingerprint(store, len(df))
+
+    with profiling.stage("publish"):
+        version = registry.publish(student)
+    metrics['peak_rss_mb'] = _peak_rss_mb()
+
+    return {"metrics": metrics, "model_version": version, "teacher_version": teacher_version}
+
+
+def _latency_profile(model: ExoplanetModel, n_rows: int = LATENCY_SAMPLE_ROWS) -> Dict[str, Any]:
+    """Single-row (p50/p99) and batch (per row) prediction latency in microseconds"""
+    rows = model._synthetic_features(n_rows, seed=7)
+    features = rows.to_dict(orient="records")
+
+    record_metrics, model.record_metrics = model.record_metrics, False
+    try:
+        model.predict(features[0])
+        timings = []
+        for row in features:
+            start = time.perf_counter()
+            model.predict(row)
+            timings.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        model.predict_batch_columnar(rows)
+        batch_s = time.perf_counter() - start
+    finally:
+        model.record_metrics = record_metrics
+
+    timings_us = np.array(timings) * 1e6
+    return {
+        "inference_backend": model.inference_backend,
+        "single_p50_us": float(np.percentile(timings_us, 50)),
+        "single_p99_us": float(np.percentile(timings_us, 99)),
+        "batch_us_per_row": batch_s / n_rows * 1e6
+    }
+
+
+def _dataset_fingerprint(store: DatasetStore, n_rows: int, build_cache: bool = True) -> Dict[str, Any]:
+    """Identify the dataset version a model was trained on"""
+    return {
+        "path": str(store.csv_path),
+        "content_hash": store.content_hash(build_cache=build_cache),
+        "n_rows": n_rows
+    }
+
+
+def _peak_rss_mb() -> Optional[float]:
+    """Peak resident memory of this process in MB (each job runs in its own worker process)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere
+    return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
+
+
+def _training_worker(runner: Callable[[Dict[str, Any], str], Dict[str, Any]],
+                     config: Dict[str, Any], dataset_path: str, conn):
+    """
+    Entry point of the training worker process
+
+    A config with a "profile" entry ({"dump_dir": ...}) is run under a
+    profile whose stage timings (and cProfile dump) are added to the result.
+    """
+    try:
+        if config.get("profile") is not None:
+            with profiling.profiled(config["profile"].get("dump_dir"), name="job") as profile:
+                result = runner(config, dataset_path)
+                total_ms = (time.perf_counter() - profile.started) * 1000
+            result = {**result, "profile": {
+                "stages_ms": profile.stages_ms(),
+                "total_ms": total_ms,
+                "cprofile_dump": profile.dump_path
+            }}
+        else:
+            result = runner(config, dataset_path)
+        conn.send({"ok": True, **result})
+    except Exception as e:
+        conn.send({
+            "ok": False,
+            "error": str(e),
+            "traceback": traceback.format_exc()
+        })
+    finally:
+        conn.close()
+
+
+class TrainingJobManager:
+    """
+    Queue of training jobs executed in worker processes
+
+    Jobs are started in submission order, at most `max_concurrent_jobs`
+    at a time. Each job runs in its own process so it can be cancelled
+    by terminating that process. The fields of the dictionary returned by
+    the runner are added to the job record when it succeeds. Only the
+    `max_finished_jobs` most recently finished jobs are kept; older ones
+    are forgotten and no longer listed.
+    """
+
+    def __init__(self, dataset_path: str, registry_root: str = "./models/registry",
+                 max_concurrent_jobs: int = 1,
+                 on_success: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 runner: Optional[Callable[[Dict[str, Any], str], Dict[str, Any]]] = None,
+                 result_fields: Optional[List[str]] = None,
+                 daemon: bool = True,
+                 on_finish: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 registry_max_versions: int = 20,
+                 max_finished_jobs: int = 100):
+        """
+        Initialize the job manager
+
+        Args:
+            dataset_path: Path to the CSV dataset used for training
+            registry_root: Model registry that trained models are published to
+            max_concurrent_jobs: Number of training processes allowed at once
+            on_success: Callback invoked with the job record after a job succeeds
+            runner: Module-level function run as runner(config, dataset_path) in the
+                worker (defaults to run_training)
+            result_fields: Fields of the runner's result, listed as None until the job succeeds
+            daemon: Run workers as daemon processes; workers that start process
+                pools of their own must not be daemonic
+            on_finish: Callback invoked with the job record after a job succeeds,
+                fails or is cancelled
+            registry_max_versions: Versions the registry keeps on disk when the
+                default runner publishes
+            max_finished_jobs: Succeeded, failed and cancelled jobs kept for
+                status queries; the oldest are evicted beyond this
+        """
+        self.dataset_path = str(dataset_path)
+        self.registry_root = str(registry_root)
+        self.max_concurrent_jobs = max(1, max_concurrent_jobs)
+        self.on_success = on_success
+        self.runner = runner or partial(run_training, registry_root=self.registry_root,
+                                        max_versions=registry_max_versions)
+        self.result_fields = result_fields or ["metrics", "model_version"]
+        self.daemon = daemon
+        self.on_finish = on_finish
+        self.max_finished_jobs = max(1, max_finished_jobs)
+
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._pending: deque = deque()
+        self._processes: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        # Spawn rather than fork: the server process runs threads and OpenMP pools
+        self._ctx = mp.get_context("spawn")
+
+    def submit(self, config: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Queue a new training job
+
+        Args:
+            config: Training configuration
+
+        Returns:
+            Snapshot of the created job
+        """
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id,
+            "status": JOB_QUEUED,
+            "config": dict(config),
+            "created_at": datetime.now().isoformat(),
+            "started_at": None,
+            "finished_at": None,
+            **{field: None for field in self.result_fields},
+            "error": None
+        }
+
+        with self._lock:
+            self._jobs[job_id] = job
+            self._pending.append(job_id)
+            snapshot = dict(job)
+
+        self._schedule()
+        return snapshot
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a snapshot of a job, or None if it does not exist"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        """Get snapshots of all jobs, most recent first"""
+        with self._lock:
+            jobs = [dict(job) for job in self._jobs.values()]
+        return sorted(jobs, key=lambda job: job["created_at"], reverse=True)
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Cancel a queued or running job
+
+        Args:
+            job_id: Job identifier
+
+        Returns:
+            Snapshot of the job after cancellation, or None if it does not exist.
+            Jobs that already finished are returned unchanged.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job["status"] in FINISHED_STATES:
+                return dict(job)
+
+            was_queued = job["status"] == JOB_QUEUED
+            if was_queued:
+                self._pending.remove(job_id)
+
+            job["status"] = JOB_CANCELLED
+            job["finished_at"] = datetime.now().isoformat()
+            process = self._processes.get(job_id)
+            snapshot = dict(job)
+            if was_queued:
+                self._evict_finished()
+
+        # The watcher thread reaps the process, reports it and starts the next job
+        if process is not None and process.is_alive():
+            process.terminate()
+        if was_queued:
+            self._notify(self.on_finish, snapshot)
+
+        return snapshot
+
+    def shutdown(self):
+        """Cancel all pending jobs and terminate running workers"""
+        with self._lock:
+            job_ids = list(self._pending) + list(self._processes.keys())
+        for job_id in job_ids:
+            self.cancel(job_id)
+
+    def _schedule(self):
+        """Start queued jobs while worker slots are available"""
+        with self._lock:
+            while self._pending and len(self._processes) < self.max_concurrent_jobs:
+                job_id = self._pending.popleft()
+                self._start(job_id)
+
+    def _start(self, job_id: str):
+        """Start the worker process for a job (caller holds the lock)"""
+        job = self._jobs[job_id]
+
+        receiver, sender = self._ctx.Pipe(duplex=False)
+        process = self._ctx.Process(
+            target=_training_worker,
+            args=(self.runner, job["config"], self.dataset_path, sender),
+            daemon=self.daemon
+        )
+        process.start()
+        sender.close()
+
+        job["status"] = JOB_RUNNING
+        job["started_at"] = datetime.now().isoformat()
+        self._processes[job_id] = process
+
+        threading.Thread(
+            target=self._watch,
+            args=(job_id, process, receiver),
+            daemon=True
+        ).start()
+
+    def _watch(self, job_id: str, process, receiver):
+        """Wait for a worker process to finish and record its outcome"""
+        try:
+            result = receiver.recv()
+        except (EOFError, OSError):
+            result = None
+        finally:
+            receiver.close()
+        process.join()
+
+        succeeded = False
+        with self._lock:
+            self._processes.pop(job_id, None)
+            # The job may be gone if it was evicted while its process was exiting
+            job = self._jobs.get(job_id)
+            if job is not None and job["status"] != JOB_CANCELLED:
+                job["finished_at"] = datetime.now().isoformat()
+                if result is None:
+                    job["status"] = JOB_FAILED
+                    job["error"] = f"Training process exited unexpectedly (exit code {process.exitcode})"
+                elif result["ok"]:
+                    job["status"] = JOB_SUCCEEDED
+                    job.update({k: v for k, v in result.items() if k != "ok"})
+                    succeeded = True
+                else:
+                    job["status"] = JOB_FAILED
+                    job["error"] = result["error"]
+
+            snapshot = dict(job) if job is not None else None
+            self._evict_finished()
+
+        if succeeded and self.on_success is not None:
+            try:
+                self.on_success(snapshot)
+            except Exception as e:
+                print(f"⚠️ Failed to activate model from job {job_id}: {e}")
+        if snapshot is not None:
+            self._notify(self.on_finish, snapshot)
+
+        self._schedule()
+
+    def _evict_finished(self):
+        """Forget the oldest finished jobs beyond max_finished_jobs (caller holds the lock)"""
+        # Cancelled jobs whose process is still exiting are kept for their watcher
+        finished = [job for job in self._jobs.values()
+                    if job["status"] in FINISHED_STATES and job["job_id"] not in self._processes]
+        excess = len(finished) - self.max_finished_jobs
+        if excess <= 0:
+            return
+        finished.sort(key=lambda job: job["finished_at"])
+        for job in finished[:excess]:
+            del self._jobs[job["job_id"]]
+
+    @staticmethod
+    def _notify(callback: Optional[Callable[[Dict[str, Any]], None]], job: Dict[str, Any]):
+        """Invoke a job callback, logging instead of raising its errors"""
+        if callback is None:
+            return
+        try:
+            callback(job)
+        except Exception as e:
+            print(f"⚠️ Job callback failed for job {job['job_id']}: {e}")
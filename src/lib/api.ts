@@ -131,6 +131,17 @@ export interface MetricsResponse {
   model_type: string;
 }
 
+export interface TrainingJob {
+  job_id: string;
+  status: 'queued' | 'running' | 'succeeded' | 'failed' | 'cancelled';
+  config: TrainingConfig;
+  created_at: string;
+  started_at: string | null;
+  finished_at: string | null;
+  metrics: MetricsResponse | null;
+  error: string | null;
+}
+
 export interface DatasetInfo {
   total_rows: number;
   total_columns: number;
@@ -289,8 +300,8 @@ class ExoplanetAPI {
   }
 
   // OLD ENDPOINTS (keeping for backward compatibility)
-  // Train model
-  async trainModel(config: TrainingConfig): Promise<MetricsResponse> {
+  // Train model (submits a background job and polls until it finishes)
+  async trainModel(config: TrainingConfig, pollIntervalMs: number = 1000): Promise<MetricsResponse> {
     const response = await fetch(`${this.baseUrl}/api/train`, {
       method: 'POST',
       headers: {
@@ -304,6 +315,42 @@ class ExoplanetAPI {
       throw new Error(error.detail || 'Training failed');
     }
     
+    let job: TrainingJob = await response.json();
+    while (job.status === 'queued' || job.status === 'running') {
+      await new Promise((resolve) => setTimeout(resolve, pollIntervalMs));
+      job = await this.getTrainingJob(job.job_id);
+    }
+    
+    if (job.status !== 'succeeded' || !job.metrics) {
+      throw new Error(job.error || `Training ${job.status}`);
+    }
+    
+    return job.metrics;
+  }
+
+  // Get training job status
+  async getTrainingJob(jobId: string): Promise<TrainingJob> {
+    const response = await fetch(`${this.baseUrl}/api/train/${encodeURIComponent(jobId)}`);
+    
+    if (!response.ok) {
+      const error = await response.json();
+      throw new Error(error.detail || 'Failed to fetch training job');
+    }
+    
+    return response.json();
+  }
+
+  // Cancel training job
+  async cancelTrainingJob(jobId: string): Promise<TrainingJob> {
+    const response = await fetch(`${this.baseUrl}/api/train/${encodeURIComponent(jobId)}/cancel`, {
+      method: 'POST',
+    });
+    
+    if (!response.ok) {
+      const error = await response.json();
+      throw new Error(error.detail || 'Failed to cancel training job');
+    }
+    
     return response.json();
   }
 
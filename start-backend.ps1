@@ -28,7 +28,7 @@ Write-Host ""
 
 # Create sample dataset
 Write-Host "📊 Creating sample NASA dataset..." -ForegroundColor Yellow
-python utils/helpers.py
+python -m utils.helpers
 
 Write-Host ""
 Write-Host "🎯 Backend server starting on http://localhost:8000" -ForegroundColor Cyan